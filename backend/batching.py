@@ -0,0 +1,13 @@
+from typing import Iterator, List, Sequence, TypeVar
+
+T = TypeVar("T")
+
+# SQLite caps the number of bound parameters per statement, so IN lists of ids are split.
+ID_CHUNK_SIZE = 500
+
+
+def chunked(ids: Sequence[T], size: int = ID_CHUNK_SIZE) -> Iterator[List[T]]:
+    """Consecutive slices of ``ids`` of at most ``size`` items, for ``IN (...)`` queries."""
+    ids = list(ids)
+    for start in range(0, len(ids), size):
+        yield ids[start:start + size]
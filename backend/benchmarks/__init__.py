@@ -0,0 +1,6 @@
+"""Benchmark harness: synthetic data generation and timed API scenarios.
+
+    python -m benchmarks.datagen --measures 1000000 --output /tmp/bench.db
+    python -m benchmarks.run --database /tmp/bench.db --output results.json
+    python -m benchmarks.compare baseline.json results.json
+"""
@@ -0,0 +1,46 @@
+import argparse
+import json
+from typing import Dict, List, Tuple
+
+
+############################################
+#
+#   Result comparison
+#
+############################################
+
+def compare(baseline: dict, current: dict, stat: str = "median") -> List[Tuple[str, str, float, float, float]]:
+    """(transport, scenario, baseline ms, current ms, ratio) for scenarios present in both runs."""
+    rows = []
+    for transport, scenarios in current["transports"].items():
+        before: Dict[str, dict] = {item["name"]: item for item in baseline["transports"].get(transport, [])}
+        for item in scenarios:
+            if item["name"] in before:
+                old, new = before[item["name"]]["ms"][stat], item["ms"][stat]
+                rows.append((transport, item["name"], old, new, new / old if old else float("inf")))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare two benchmark result files.")
+    parser.add_argument("baseline")
+    parser.add_argument("current")
+    parser.add_argument("--stat", default="median", choices=("min", "median", "p95", "mean", "max"))
+    parser.add_argument("--threshold", type=float, default=1.10,
+                        help="exit non-zero when any scenario is slower by this ratio")
+    args = parser.parse_args()
+
+    with open(args.baseline) as baseline, open(args.current) as current:
+        baseline, current = json.load(baseline), json.load(current)
+    rows = compare(baseline, current, args.stat)
+    print(f"{baseline['commit'][:10]} -> {current['commit'][:10]} ({args.stat} ms)")
+    regressions = 0
+    for transport, name, old, new, ratio in rows:
+        flag = " REGRESSION" if ratio > args.threshold else ""
+        regressions += bool(flag)
+        print(f"{transport:<10} {name:<28} {old:>10.2f} {new:>10.2f} {ratio:>6.2f}x{flag}")
+    raise SystemExit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
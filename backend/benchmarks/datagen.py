@@ -0,0 +1,165 @@
+import argparse
+import os
+import time
+from dataclasses import asdict, dataclass
+from datetime import datetime, timedelta
+from typing import Dict, List
+
+import numpy as np
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import Session
+
+from sql_alchemy import (
+    Base, Comments, Configuration, ConfParam, Dataset, DatasetType, Datashape, Derived, Direct, EvaluationStatus,
+    Evaluation, LegalRequirement, LicensingType, Measure, MetricCategory, Model, Observation, Project, ProjectStatus,
+    Tool, derived_metric, evaluates_eval, metriccategory_metric,
+)
+
+# Rows per INSERT batch; keeps memory flat at 10M measures.
+CHUNK_SIZE = 50_000
+
+
+############################################
+#
+#   Synthetic dataset generator
+#
+############################################
+
+@dataclass
+class Sizes:
+    measures: int = 10_000
+    models: int = 200
+    metrics: int = 50
+    derived: int = 5
+    categories: int = 5
+    evaluations: int = 100
+    observations_per_evaluation: int = 4
+    projects: int = 5
+    datasets: int = 20
+    tools: int = 10
+    comments: int = 100
+
+
+def _bulk(session: Session, entity, rows: List[dict]):
+    for start in range(0, len(rows), CHUNK_SIZE):
+        session.execute(insert(entity), rows[start:start + CHUNK_SIZE])
+
+
+def generate(database_url: str, sizes: Sizes = Sizes(), seed: int = 0) -> Dict[str, int]:
+    """Create the schema at ``database_url`` and fill it through the ``sql_alchemy`` models.
+
+    Ids are assigned explicitly so joined-inheritance rows (Model, Dataset,
+    Direct, Derived) go through ORM bulk inserts without RETURNING. The same
+    ``seed`` and sizes always produce the same database.
+    """
+    rng = np.random.default_rng(seed)
+    engine = create_engine(database_url)
+    Base.metadata.create_all(engine)
+    now = datetime(2026, 1, 1)
+
+    # Elements (datasets and models) share one id space.
+    dataset_ids = list(range(1, sizes.datasets + 1))
+    model_ids = list(range(sizes.datasets + 1, sizes.datasets + sizes.models + 1))
+    direct_ids = list(range(1, sizes.metrics + 1))
+    derived_ids = list(range(sizes.metrics + 1, sizes.metrics + sizes.derived + 1))
+    observation_count = sizes.evaluations * sizes.observations_per_evaluation
+
+    with Session(engine) as session:
+        _bulk(session, Project, [
+            {"id": i, "name": f"Project {i}", "status": list(ProjectStatus)[i % len(ProjectStatus)]}
+            for i in range(1, sizes.projects + 1)])
+        _bulk(session, Datashape, [{"id": 1, "accepted_target_values": "0,1"}])
+        _bulk(session, Dataset, [
+            {"id": i, "name": f"dataset_{i}", "description": "synthetic", "project_id": 1 + i % sizes.projects,
+             "type_spec": "dataset", "source": "synthetic", "version": "1", "licensing": LicensingType.Open_Source,
+             "dataset_type": list(DatasetType)[i % len(DatasetType)], "datashape_id": 1}
+            for i in dataset_ids])
+        _bulk(session, Model, [
+            {"id": i, "name": f"model_{i}", "description": "synthetic", "project_id": 1 + i % sizes.projects,
+             "type_spec": "model", "pid": f"family_{i % 25}/model_{i}", "data": "", "source": f"family_{i % 25}",
+             "licensing": list(LicensingType)[i % len(LicensingType)],
+             "dataset_id": dataset_ids[i % len(dataset_ids)]}
+            for i in model_ids])
+        _bulk(session, Direct, [
+            {"id": i, "name": f"metric_{i}", "description": "synthetic", "type_spec": "Direct"}
+            for i in direct_ids])
+        _bulk(session, Derived, [
+            {"id": i, "name": f"derived_{i}", "description": "synthetic", "type_spec": "Derived",
+             "expression": f"(metric_{1 + i % sizes.metrics} + metric_{1 + (i + 1) % sizes.metrics}) / 2"}
+            for i in derived_ids])
+        session.execute(insert(derived_metric), [
+            {"baseMetric": 1 + (i + offset) % sizes.metrics, "derivedBy": i}
+            for i in derived_ids for offset in (0, 1)])
+        _bulk(session, MetricCategory, [
+            {"id": i, "name": f"category_{i}", "description": "synthetic"} for i in range(1, sizes.categories + 1)])
+        session.execute(insert(metriccategory_metric), [
+            {"metrics": metric_id, "category": 1 + metric_id % sizes.categories} for metric_id in direct_ids])
+        _bulk(session, Tool, [
+            {"id": i, "name": f"tool_{i}", "source": "synthetic", "version": "1",
+             "licensing": LicensingType.Open_Source}
+            for i in range(1, sizes.tools + 1)])
+        _bulk(session, Configuration, [
+            {"id": i, "name": f"config_{i}", "description": "synthetic"} for i in range(1, sizes.evaluations + 1)])
+        _bulk(session, ConfParam, [
+            {"id": i, "name": "temperature", "description": "synthetic", "param_type": "float",
+             "value": str(round(float(rng.random()), 2)), "conf_id": i}
+            for i in range(1, sizes.evaluations + 1)])
+        _bulk(session, Evaluation, [
+            {"id": i, "status": list(EvaluationStatus)[i % len(EvaluationStatus)], "config_id": i,
+             "project_id": 1 + i % sizes.projects}
+            for i in range(1, sizes.evaluations + 1)])
+        session.execute(insert(evaluates_eval), [
+            {"evaluates": model_ids[(i * 7 + k) % len(model_ids)], "evalu": i}
+            for i in range(1, sizes.evaluations + 1) for k in range(min(3, len(model_ids)))])
+        seconds = rng.integers(0, 365 * 24 * 3600, observation_count)
+        _bulk(session, Observation, [
+            {"id": i + 1, "name": f"observation_{i + 1}", "description": "synthetic", "observer": "benchmark",
+             "whenObserved": now - timedelta(seconds=int(seconds[i])), "tool_id": 1 + i % sizes.tools,
+             "dataset_id": dataset_ids[i % len(dataset_ids)], "eval_id": 1 + i // sizes.observations_per_evaluation}
+            for i in range(observation_count)])
+        _bulk(session, LegalRequirement, [
+            {"id": i, "legal_ref": f"Art. {i}", "standard": "synthetic", "principle": "synthetic",
+             "project_1_id": 1 + i % sizes.projects}
+            for i in range(1, sizes.projects * 4 + 1)])
+        _bulk(session, Comments, [
+            {"id": i, "Name": "benchmark", "Comments": f"comment {i}", "TimeStamp": now}
+            for i in range(1, sizes.comments + 1)])
+
+        for start in range(0, sizes.measures, CHUNK_SIZE):
+            count = min(CHUNK_SIZE, sizes.measures - start)
+            measurands = rng.integers(0, len(model_ids), count)
+            metrics = rng.integers(0, len(direct_ids), count)
+            observations = rng.integers(1, observation_count + 1, count)
+            values = rng.random(count)
+            uncertainties = rng.random(count) * 0.05
+            session.execute(insert(Measure), [
+                {"id": start + j + 1, "value": float(values[j]), "error": "", "uncertainty": float(uncertainties[j]),
+                 "unit": "", "measurand_id": model_ids[measurands[j]], "metric_id": direct_ids[metrics[j]],
+                 "observation_id": int(observations[j])}
+                for j in range(count)])
+        session.commit()
+    engine.dispose()
+    return {**asdict(sizes), "observations": observation_count}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a synthetic benchmark database.")
+    parser.add_argument("--output", required=True, help="SQLite file to create")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--force", action="store_true", help="overwrite an existing file")
+    for name, default in asdict(Sizes()).items():
+        parser.add_argument(f"--{name.replace('_', '-')}", type=int, default=default)
+    args = parser.parse_args()
+
+    if os.path.exists(args.output):
+        if not args.force:
+            parser.error(f"{args.output} exists; pass --force to overwrite")
+        os.remove(args.output)
+    sizes = Sizes(**{name: getattr(args, name) for name in asdict(Sizes())})
+    started = time.perf_counter()
+    counts = generate(f"sqlite:///{args.output}", sizes, args.seed)
+    print(f"Generated {counts} in {time.perf_counter() - started:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
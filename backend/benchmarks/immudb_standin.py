@@ -0,0 +1,118 @@
+import contextlib
+import re
+import threading
+import time
+from typing import Dict, Iterator, List, Optional
+
+# Statement shapes main_api sends to immudb.
+_CREATE = re.compile(r"CREATE\s+TABLE\s+(?:IF\s+NOT\s+EXISTS\s+)?(\w+)", re.IGNORECASE)
+_INSERT = re.compile(r"INSERT\s+INTO\s+(\w+)\s*\(([^)]*)\)\s*VALUES\s*\(([^)]*)\)", re.IGNORECASE)
+_SELECT = re.compile(r"SELECT\s+(.+?)\s+FROM\s+(\w+)(?:\s+ORDER\s+BY\s+(\w+)(?:\s+(ASC|DESC))?)?"
+                     r"(?:\s+LIMIT\s+(\d+)(?:\s+OFFSET\s+(\d+))?)?\s*;?\s*$", re.IGNORECASE | re.DOTALL)
+
+
+############################################
+#
+#   In-memory immudb stand-in
+#
+############################################
+
+class InMemoryImmudb:
+    """Drop-in for ``ImmudbClient`` covering the calls main_api makes (database
+    management, CREATE TABLE, INSERT and ordered/paged SELECT), so the audit
+    log works in load tests without an immudb server. ``latency`` is added to
+    every call to mimic the round trip.
+    """
+
+    latency = 0.0
+    _lock = threading.Lock()
+    _databases: Dict[str, Dict[str, List[dict]]] = {"defaultdb": {}}
+
+    def __init__(self, address: Optional[str] = None):
+        self.address = address
+        self._database = "defaultdb"
+
+    def _call(self):
+        if self.latency:
+            time.sleep(self.latency)
+
+    @staticmethod
+    def _name(name) -> str:
+        return name.decode() if isinstance(name, bytes) else name
+
+    def login(self, username, password):
+        self._call()
+
+    def logout(self):
+        self._call()
+
+    def databaseList(self) -> List[str]:
+        self._call()
+        with self._lock:
+            return list(self._databases)
+
+    def createDatabase(self, name):
+        self._call()
+        with self._lock:
+            self._databases.setdefault(self._name(name), {})
+
+    def useDatabase(self, name):
+        self._call()
+        with self._lock:
+            self._database = self._name(name)
+            self._databases.setdefault(self._database, {})
+
+    def _tables(self) -> Dict[str, List[dict]]:
+        return self._databases[self._database]
+
+    def sqlExec(self, sql: str, params: Optional[dict] = None):
+        self._call()
+        with self._lock:
+            create = _CREATE.search(sql)
+            if create:
+                self._tables().setdefault(create.group(1), [])
+                return None
+            insert = _INSERT.search(sql)
+            if insert is None:
+                raise ValueError(f"Statement not supported by the immudb stand-in: {sql.strip()[:80]}")
+            table, columns, values = insert.groups()
+            columns = [column.strip() for column in columns.split(",")]
+            values = [value.strip() for value in values.split(",")]
+            row = {column: (params or {})[value[1:]] if value.startswith("@") else value
+                   for column, value in zip(columns, values)}
+            self._tables().setdefault(table, []).append(row)
+            return None
+
+    def sqlQuery(self, sql: str, params: Optional[dict] = None) -> List[tuple]:
+        self._call()
+        select = _SELECT.search(sql.strip())
+        if select is None:
+            raise ValueError(f"Query not supported by the immudb stand-in: {sql.strip()[:80]}")
+        columns, table, order_by, direction, limit, offset = select.groups()
+        columns = [column.strip() for column in columns.split(",")]
+        with self._lock:
+            rows = list(self._tables().get(table, []))
+        if order_by:
+            rows.sort(key=lambda row: row.get(order_by), reverse=(direction or "").upper() == "DESC")
+        start = int(offset or 0)
+        rows = rows[start:start + int(limit)] if limit else rows[start:]
+        return [tuple(row.get(column) for column in columns) for row in rows]
+
+    @classmethod
+    def reset(cls):
+        with cls._lock:
+            cls._databases = {"defaultdb": {}}
+
+
+@contextlib.contextmanager
+def installed(latency_ms: float = 0.0) -> Iterator[type]:
+    """Point main_api at the stand-in for the duration of the block."""
+    import main_api
+
+    original = main_api.ImmudbClient
+    InMemoryImmudb.latency = latency_ms / 1000
+    main_api.ImmudbClient = InMemoryImmudb
+    try:
+        yield InMemoryImmudb
+    finally:
+        main_api.ImmudbClient = original
@@ -0,0 +1,235 @@
+import argparse
+import asyncio
+import contextlib
+import json
+import os
+import random
+import statistics
+import sys
+import time
+from collections import Counter, defaultdict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import httpx
+
+from benchmarks.scenarios import percentile
+
+UI_COMPONENTS = Path(__file__).resolve().parents[2] / "frontend" / "src" / "data" / "ui_components.json"
+CHART_TYPES = ("bar-chart", "line-chart", "pie-chart", "radial-bar-chart", "radar-chart")
+# Browsers open at most this many HTTP/1.1 connections per host.
+BROWSER_CONNECTIONS = 6
+AUDIT_PAGE_SIZE = 25
+
+
+############################################
+#
+#   Request mix from ui_components.json
+#
+############################################
+
+@dataclass(frozen=True)
+class PageRequest:
+    component: str
+    kind: str
+    url: str
+
+
+def _nested(field: Optional[str]) -> bool:
+    return bool(field) and "." in field
+
+
+def component_requests(component: dict) -> List[PageRequest]:
+    """The GETs Renderer.tsx / TableComponent.tsx issue when ``component`` mounts."""
+    kind = component.get("type", "")
+    name = component.get("id") or component.get("name") or kind
+    requests = []
+    if kind in CHART_TYPES:
+        for series in component.get("series") or []:
+            source = series.get("dataSource") or series.get("data-source")
+            endpoint = series.get("endpoint") or (f"/{source}/" if source else None)
+            if endpoint:
+                detailed = _nested(series.get("labelField") or series.get("label-field")) or \
+                    _nested(series.get("dataField") or series.get("data-field"))
+                requests.append(PageRequest(name, kind, endpoint + ("?detailed=true" if detailed else "")))
+    binding = component.get("data_binding") or {}
+    if kind == "audit-logs" and binding.get("endpoint"):
+        requests.append(PageRequest(name, kind, f"{binding['endpoint']}?limit={AUDIT_PAGE_SIZE}&offset=0"))
+    elif kind in CHART_TYPES + ("metric-card", "table") and binding.get("endpoint"):
+        columns = (component.get("chart") or {}).get("columns") or []
+        lookups = [column for column in columns if isinstance(column, dict) and column.get("column_type") == "lookup"]
+        detailed = bool(lookups) or _nested(binding.get("label_field")) or _nested(binding.get("data_field"))
+        requests.append(PageRequest(name, kind, binding["endpoint"] + ("?detailed=true" if detailed else "")))
+        for column in lookups:
+            if column.get("entity"):
+                requests.append(PageRequest(name, kind, f"/{column['entity'].lower()}/"))
+    if kind == "data-list" and component.get("data_sources"):
+        source = component["data_sources"][0]
+        endpoint = source.get("endpoint") or (f"/{source['domain'].lower()}/" if source.get("domain") else None)
+        if endpoint:
+            requests.append(PageRequest(name, kind, endpoint))
+    return requests
+
+
+def dashboard_requests(path: Path = UI_COMPONENTS) -> Dict[str, List[PageRequest]]:
+    """Requests fired when each page of the dashboard renders, keyed by page name."""
+    with open(path) as handle:
+        pages = json.load(handle)["pages"]
+
+    def walk(node: Any, found: List[PageRequest]):
+        if isinstance(node, dict):
+            found.extend(component_requests(node))
+            for value in node.values():
+                walk(value, found)
+        elif isinstance(node, list):
+            for value in node:
+                walk(value, found)
+        return found
+
+    return {page["name"]: walk(page.get("components", []), []) for page in pages}
+
+
+############################################
+#
+#   Replay
+#
+############################################
+
+async def _visit(client: httpx.AsyncClient, page: str, requests: List[PageRequest], samples: List[dict]):
+    """Load one page: every component fetches concurrently, as the React effects do."""
+    async def fetch(request: PageRequest):
+        started = time.perf_counter()
+        sample = {"page": page, "url": request.url, "status": None, "error": None}
+        try:
+            response = await client.get(request.url)
+            await response.aread()
+            sample["status"] = response.status_code
+        except httpx.HTTPError as exc:
+            sample["error"] = type(exc).__name__
+        sample["ms"] = (time.perf_counter() - started) * 1000
+        samples.append(sample)
+
+    await asyncio.gather(*(fetch(request) for request in requests))
+
+
+async def replay(base_url: str, pages: Dict[str, List[PageRequest]], concurrency: int = 10,
+                 duration: Optional[float] = 30.0, visits: Optional[int] = None, think: float = 0.0,
+                 seed: int = 0, transport: Optional[httpx.AsyncBaseTransport] = None) -> dict:
+    """Run ``concurrency`` visitors, each loading random pages back to back, until
+    ``duration`` seconds have passed or ``visits`` page loads have started."""
+    rng = random.Random(seed)
+    names = [name for name, requests in pages.items() if requests]
+    samples: List[dict] = []
+    started = time.perf_counter()
+    deadline = started + duration if duration else None
+    remaining = {"visits": visits}
+
+    def more() -> bool:
+        if deadline is not None and time.perf_counter() >= deadline:
+            return False
+        if remaining["visits"] is not None:
+            if remaining["visits"] <= 0:
+                return False
+            remaining["visits"] -= 1
+        return True
+
+    async def visitor():
+        limits = httpx.Limits(max_connections=BROWSER_CONNECTIONS)
+        async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=120, transport=transport) as client:
+            while more():
+                page = rng.choice(names)
+                await _visit(client, page, pages[page], samples)
+                if think:
+                    await asyncio.sleep(think)
+
+    await asyncio.gather(*(visitor() for _ in range(concurrency)))
+    return summarise(samples, time.perf_counter() - started, concurrency)
+
+
+def _latency(values: List[float]) -> dict:
+    return {
+        "p50": round(percentile(values, 0.50), 3),
+        "p90": round(percentile(values, 0.90), 3),
+        "p95": round(percentile(values, 0.95), 3),
+        "p99": round(percentile(values, 0.99), 3),
+        "max": round(max(values), 3),
+        "mean": round(statistics.fmean(values), 3),
+    }
+
+
+def summarise(samples: List[dict], elapsed: float, concurrency: int) -> dict:
+    failed = [sample for sample in samples if sample["error"] or sample["status"] >= 400]
+    by_url: Dict[str, List[dict]] = defaultdict(list)
+    for sample in samples:
+        by_url[sample["url"]].append(sample)
+    return {
+        "concurrency": concurrency,
+        "seconds": round(elapsed, 3),
+        "requests": len(samples),
+        "throughput_rps": round(len(samples) / elapsed, 3) if elapsed else None,
+        "error_rate": round(len(failed) / len(samples), 6) if samples else 0.0,
+        "latency_ms": _latency([sample["ms"] for sample in samples]) if samples else None,
+        "endpoints": {
+            url: {
+                "requests": len(items),
+                "errors": sum(1 for item in items if item["error"] or item["status"] >= 400),
+                "statuses": dict(sorted(Counter(str(item["status"] or item["error"]) for item in items).items())),
+                "latency_ms": _latency([item["ms"] for item in items]),
+            }
+            for url, items in sorted(by_url.items())
+        },
+    }
+
+
+@contextlib.contextmanager
+def _served(database: Optional[str], immudb_latency_ms: float):
+    if database:
+        os.environ["SQLALCHEMY_DATABASE_URL"] = f"sqlite:///{Path(database).resolve()}"
+    import main_api
+    from benchmarks.immudb_standin import installed
+    from benchmarks.run import asgi_server
+
+    with installed(immudb_latency_ms), asgi_server(main_api.app) as base_url:
+        yield base_url
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay dashboard page loads derived from ui_components.json.")
+    target = parser.add_mutually_exclusive_group(required=True)
+    target.add_argument("--url", help="base URL of a running instance")
+    target.add_argument("--serve", action="store_true",
+                        help="serve the app in-process with an in-memory immudb stand-in")
+    parser.add_argument("--database", help="SQLite file for --serve (default: SQLALCHEMY_DATABASE_URL)")
+    parser.add_argument("--immudb-latency-ms", type=float, default=2.0, help="stand-in round trip for --serve")
+    parser.add_argument("--components", type=Path, default=UI_COMPONENTS)
+    parser.add_argument("--page", action="append", help="only load these pages (repeatable)")
+    parser.add_argument("--concurrency", type=int, default=10, help="simultaneous visitors")
+    parser.add_argument("--duration", type=float, default=30.0, help="seconds to run")
+    parser.add_argument("--visits", type=int, help="stop after this many page loads")
+    parser.add_argument("--think-ms", type=float, default=0.0, help="pause between a visitor's page loads")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default="-", help="results file (default: stdout)")
+    args = parser.parse_args()
+
+    pages = dashboard_requests(args.components)
+    if args.page:
+        pages = {name: requests for name, requests in pages.items() if name in args.page}
+    if not any(pages.values()):
+        parser.error("the selected pages issue no data requests")
+
+    with contextlib.ExitStack() as stack:
+        base_url = stack.enter_context(_served(args.database, args.immudb_latency_ms)) if args.serve else args.url
+        results = asyncio.run(replay(base_url, pages, args.concurrency, args.duration, args.visits,
+                                     args.think_ms / 1000, args.seed))
+    results["mix"] = {name: [request.url for request in requests] for name, requests in pages.items()}
+
+    output = json.dumps(results, indent=2)
+    if args.output == "-":
+        sys.stdout.write(output + "\n")
+    else:
+        Path(args.output).write_text(output + "\n")
+
+
+if __name__ == "__main__":
+    main()
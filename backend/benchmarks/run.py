@@ -0,0 +1,116 @@
+import argparse
+import contextlib
+import json
+import os
+import platform
+import socket
+import subprocess
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Iterator
+
+TRANSPORTS = ("testclient", "asgi")
+
+
+############################################
+#
+#   Benchmark runner
+#
+############################################
+
+def _commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True,
+                              cwd=Path(__file__).resolve().parent, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+@contextlib.contextmanager
+def asgi_server(app) -> Iterator[str]:
+    """Serve ``app`` with uvicorn on a free local port for the duration of the block.
+
+    The lifespan is off, so the startup hook (``main_api.init()`` plus the
+    background immudb connection) does not run; the caller initialises the
+    database itself and no scenario needs immudb.
+    """
+    import uvicorn
+
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        port = probe.getsockname()[1]
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning",
+                                           lifespan="off"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        if not thread.is_alive():
+            raise RuntimeError("uvicorn failed to start")
+        time.sleep(0.01)
+    try:
+        yield f"http://127.0.0.1:{port}"
+    finally:
+        server.should_exit = True
+        thread.join()
+
+
+@contextlib.contextmanager
+def client_for(transport: str, app):
+    if transport == "testclient":
+        from fastapi.testclient import TestClient
+
+        # A failing endpoint is reported through its status, not by aborting the run.
+        yield TestClient(app, raise_server_exceptions=False)
+    else:
+        import httpx
+
+        with asgi_server(app) as base_url, httpx.Client(base_url=base_url, timeout=600) as client:
+            yield client
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run timed API scenarios and write JSON results.")
+    parser.add_argument("--database", required=True, help="SQLite file, e.g. one made by benchmarks.datagen")
+    parser.add_argument("--output", default="-", help="results file (default: stdout)")
+    parser.add_argument("--transport", choices=TRANSPORTS + ("all",), default="all")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--warmup", type=int, default=1)
+    parser.add_argument("--warm-cache", action="store_true", help="keep the query cache between requests")
+    parser.add_argument("--scenario", action="append", help="only run these scenarios (repeatable)")
+    args = parser.parse_args()
+
+    # main_api.init() creates the engine from this on first use.
+    os.environ["SQLALCHEMY_DATABASE_URL"] = f"sqlite:///{Path(args.database).resolve()}"
+    import main_api
+    from benchmarks.scenarios import SCENARIOS, context_for, run_scenarios
+
+    scenarios = [scenario for scenario in SCENARIOS if not args.scenario or scenario.name in args.scenario]
+    with main_api.SessionLocal() as session:
+        context = context_for(session)
+
+    results = {
+        "commit": _commit(),
+        "at": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "database": {"path": str(args.database), "bytes": os.path.getsize(args.database), **context},
+        "options": {"repeat": args.repeat, "warmup": args.warmup, "cold_cache": not args.warm_cache},
+        "transports": {},
+    }
+    for transport in (TRANSPORTS if args.transport == "all" else (args.transport,)):
+        with client_for(transport, main_api.app) as client:
+            results["transports"][transport] = run_scenarios(
+                client, context, scenarios, repeat=args.repeat, warmup=args.warmup, cold_cache=not args.warm_cache)
+
+    output = json.dumps(results, indent=2)
+    if args.output == "-":
+        sys.stdout.write(output + "\n")
+    else:
+        Path(args.output).write_text(output + "\n")
+
+
+if __name__ == "__main__":
+    main()
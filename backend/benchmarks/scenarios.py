@@ -0,0 +1,129 @@
+import statistics
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Union
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from sql_alchemy import Measure, Metric, Model, Observation
+
+Context = Dict[str, Any]
+
+
+############################################
+#
+#   Timed API scenarios
+#
+############################################
+
+@dataclass
+class Scenario:
+    name: str
+    method: str
+    path: Union[str, Callable[[Context], str]]
+    params: Union[dict, Callable[[Context], dict]] = field(default_factory=dict)
+    body: Optional[Callable[[Context], Any]] = None
+    # Writes change the data the other scenarios read, so they run last.
+    writes: bool = False
+
+    def request(self, context: Context) -> dict:
+        return {
+            "method": self.method,
+            "url": self.path(context) if callable(self.path) else self.path,
+            "params": self.params(context) if callable(self.params) else self.params,
+            "json": self.body(context) if self.body is not None else None,
+        }
+
+
+def _bulk_measures(context: Context, size: int = 1000) -> List[dict]:
+    return [{"value": i / size, "error": "", "uncertainty": 0.0, "unit": "", "measurand": context["model_id"],
+             "metric": context["metric_id"], "observation": context["observation_id"]} for i in range(size)]
+
+
+SCENARIOS = [
+    Scenario("list_measures", "GET", "/measure/"),
+    Scenario("list_measures_detailed", "GET", "/measure/", {"detailed": "true"}),
+    Scenario("list_models_detailed", "GET", "/model/", {"detailed": "true"}),
+    Scenario("paginate_measures_first", "GET", "/measure/paginated/", {"skip": 0, "limit": 100}),
+    Scenario("paginate_measures_deep", "GET", "/measure/paginated/",
+             lambda context: {"skip": max(context["measures"] - 100, 0), "limit": 100}),
+    Scenario("measure_detail", "GET", lambda context: f"/measure/{context['measure_id']}/"),
+    Scenario("search_measures", "GET", "/measure/search/"),
+    Scenario("search_tools", "GET", "/tool/search/"),
+    Scenario("statistics", "GET", "/statistics"),
+    Scenario("chart_metrics_detailed", "GET", "/metric/", {"detailed": "true"}),
+    Scenario("chart_model_cards", "GET", "/model_count_4_card/"),
+    Scenario("chart_leaderboard", "GET", "/leaderboard"),
+    Scenario("chart_radar", "GET", "/radar"),
+    Scenario("chart_measure_aggregate", "GET", "/measure/aggregate", {"group_by": "metric,measurand"}),
+    Scenario("chart_timeseries", "GET", "/observation/timeseries",
+             lambda context: {"metric": context["metric_id"], "bucket": "1d"}),
+    Scenario("bulk_insert_measures", "POST", "/measure/bulk/", body=_bulk_measures, writes=True),
+]
+
+
+def context_for(session: Session) -> Context:
+    """Ids and sizes the scenarios parameterise their requests with."""
+    return {
+        "measures": session.execute(select(func.count(Measure.id))).scalar(),
+        "measure_id": session.execute(select(func.max(Measure.id))).scalar(),
+        "model_id": session.execute(select(func.min(Model.id))).scalar(),
+        "metric_id": session.execute(select(func.min(Metric.id))).scalar(),
+        "observation_id": session.execute(select(func.min(Observation.id))).scalar(),
+    }
+
+
+def percentile(values: List[float], fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+
+def run_scenario(client, scenario: Scenario, context: Context, repeat: int = 5, warmup: int = 1,
+                 cold_cache: bool = True) -> dict:
+    """Time ``repeat`` requests of ``scenario`` through ``client`` (a TestClient or httpx.Client).
+
+    With ``cold_cache`` the query result cache is dropped before every
+    request, outside the timed section, so each run reaches the database.
+    """
+    durations, statements, db_ms = [], [], []
+    status = size = None
+    headers = {"X-Query-Stats": "1"}
+    for iteration in range(warmup + repeat):
+        if cold_cache:
+            client.delete("/cache/")
+        request = scenario.request(context)
+        started = time.perf_counter()
+        response = client.request(request["method"], request["url"], params=request["params"],
+                                  json=request["json"], headers=headers)
+        body = response.content
+        elapsed = time.perf_counter() - started
+        status, size = response.status_code, len(body)
+        if iteration < warmup:
+            continue
+        durations.append(elapsed * 1000)
+        if "x-query-count" in response.headers:
+            statements.append(int(response.headers["x-query-count"]))
+            db_ms.append(float(response.headers["x-db-time-ms"]))
+    return {
+        "name": scenario.name,
+        "method": scenario.method,
+        "status": status,
+        "bytes": size,
+        "repeat": repeat,
+        "ms": {
+            "min": round(min(durations), 3),
+            "median": round(statistics.median(durations), 3),
+            "p95": round(percentile(durations, 0.95), 3),
+            "mean": round(statistics.fmean(durations), 3),
+            "max": round(max(durations), 3),
+        },
+        "statements": statistics.median(statements) if statements else None,
+        "db_ms": round(statistics.median(db_ms), 3) if db_ms else None,
+    }
+
+
+def run_scenarios(client, context: Context, scenarios: List[Scenario] = SCENARIOS, **options) -> List[dict]:
+    ordered = [scenario for scenario in scenarios if not scenario.writes] + \
+              [scenario for scenario in scenarios if scenario.writes]
+    return [run_scenario(client, scenario, context, **options) for scenario in ordered]
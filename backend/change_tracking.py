@@ -0,0 +1,195 @@
+import logging
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy import event, inspect, select
+from sqlalchemy.orm.base import NO_VALUE
+
+logger = logging.getLogger(__name__)
+
+
+############################################
+#
+#   Session change tracking
+#
+############################################
+
+# Tables and rows written during the current transaction are accumulated in
+# ``session.info`` and handed to subscribers once the transaction commits,
+# so listeners never observe writes that are later rolled back.
+WRITTEN_TABLES_KEY = "written_tables"
+CHANGES_KEY = "row_changes"
+# Changes not yet handed to the before-commit subscribers.
+PENDING_KEY = "pending_row_changes"
+
+
+@dataclass
+class Change:
+    """A single row-level write, as observed by the session."""
+    entity: str
+    tables: Tuple[str, ...]
+    id: Optional[int]
+    action: str  # "create" | "update" | "delete"
+    row: Dict[str, Any] = field(default_factory=dict)
+    # Prior values of the columns modified by an update.
+    previous: Dict[str, Any] = field(default_factory=dict)
+
+
+_table_subscribers: List[Callable[[Set[str]], None]] = []
+_change_subscribers: List[Callable[[List[Change]], None]] = []
+_before_commit_subscribers: List[Callable[[Any, List[Change]], None]] = []
+
+
+def subscribe(callback: Callable[[Set[str]], None]) -> Callable[[Set[str]], None]:
+    """Register a callback receiving the set of table names written by each commit."""
+    _table_subscribers.append(callback)
+    return callback
+
+
+def subscribe_changes(callback: Callable[[List[Change]], None]) -> Callable[[List[Change]], None]:
+    """Register a callback receiving the row-level changes of each commit, in flush order."""
+    _change_subscribers.append(callback)
+    return callback
+
+
+def subscribe_before_commit(callback: Callable[[Any, List[Change]], None]) -> Callable[[Any, List[Change]], None]:
+    """Register a callback invoked with ``(session, changes)`` just before the writing transaction commits.
+
+    The changes of every flush in the transaction are delivered in one call,
+    so bookkeeping can be persisted atomically with the data in a single
+    statement. Callbacks must use ``session.connection()`` rather than the ORM
+    to avoid dirtying the session again. Nothing is delivered on rollback.
+    """
+    _before_commit_subscribers.append(callback)
+    return callback
+
+
+def _mark_written(session, table_names: Iterable[str]):
+    session.info.setdefault(WRITTEN_TABLES_KEY, set()).update(table_names)
+
+
+def _record(session, change: Change) -> Change:
+    _mark_written(session, change.tables)
+    session.info.setdefault(CHANGES_KEY, []).append(change)
+    session.info.setdefault(PENDING_KEY, []).append(change)
+    return change
+
+
+def _row_of(state) -> Dict[str, Any]:
+    # Read from the instance dict only: touching expired attributes here
+    # would emit SQL from inside the flush.
+    return {attr.key: state.dict[attr.key] for attr in state.mapper.column_attrs if attr.key in state.dict}
+
+
+def _previous_of(state) -> Dict[str, Any]:
+    columns = {attr.key for attr in state.mapper.column_attrs}
+    return {key: value for key, value in state.committed_state.items()
+            if key in columns and value is not NO_VALUE}
+
+
+def _change_for(obj, action: str) -> Change:
+    state = inspect(obj)
+    row = _row_of(state)
+    return Change(
+        entity=state.mapper.class_.__name__,
+        tables=tuple(table.name for table in state.mapper.tables),
+        id=row.get("id"),
+        action=action,
+        row=row,
+        previous=_previous_of(state) if action == "update" else {},
+    )
+
+
+def _after_flush(session, flush_context):
+    for obj in session.new:
+        _record(session, _change_for(obj, "create"))
+    for obj in session.dirty:
+        if session.is_modified(obj):
+            _record(session, _change_for(obj, "update"))
+    for obj in session.deleted:
+        _record(session, _change_for(obj, "delete"))
+
+
+def _key_columns(mapper) -> list:
+    """Primary key, plus the foreign keys of single-table mappers, labelled by attribute name.
+    Only key columns are read, so enum coercion never runs on stored values."""
+    columns = [mapper.primary_key[0]]
+    if len(mapper.tables) == 1:
+        columns += [column for column in mapper.local_table.columns if column.foreign_keys]
+    return [column.label(mapper.get_property_by_column(column).key) for column in columns]
+
+
+def _do_orm_execute(orm_execute_state):
+    # Bulk Query.update()/delete() and Core statements on association tables
+    # bypass the unit of work, so they are picked up here instead.
+    if not (orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete):
+        return
+    action = "create" if orm_execute_state.is_insert else "update" if orm_execute_state.is_update else "delete"
+    statement = orm_execute_state.statement
+    mapper = orm_execute_state.bind_mapper
+    session = orm_execute_state.session
+
+    if mapper is None:
+        table = getattr(statement, "table", None)
+        if table is not None:
+            _record(session, Change(entity=table.name, tables=(table.name,), id=None, action=action))
+        return
+
+    tables = tuple(table.name for table in mapper.tables)
+    keys: List[Dict[str, Any]] = [{}]
+    if not orm_execute_state.is_insert and statement.whereclause is not None:
+        # Resolve the affected rows up front so row-level listeners still see
+        # one change per row.
+        columns = _key_columns(mapper) if action == "delete" else _key_columns(mapper)[:1]
+        keys = [dict(row._mapping) for row in session.execute(select(*columns).where(statement.whereclause))]
+    for values in keys:
+        # Deleted rows keep their keys in ``row``; updates only know the id, since
+        # the new values are set by the statement.
+        _record(session, Change(entity=mapper.class_.__name__, tables=tables, id=values.get("id"), action=action,
+                                row=values if action == "delete" else {}))
+
+
+def _before_commit(session):
+    if not _before_commit_subscribers:
+        session.info.pop(PENDING_KEY, None)
+        return
+    # commit() only flushes pending objects after this event, so flush now to
+    # hand every change of the transaction to the subscribers.
+    session.flush()
+    changes = session.info.pop(PENDING_KEY, None)
+    if changes:
+        for callback in _before_commit_subscribers:
+            callback(session, changes)
+
+
+def _after_commit(session):
+    written = session.info.pop(WRITTEN_TABLES_KEY, None)
+    changes = session.info.pop(CHANGES_KEY, None)
+    if written:
+        for callback in _table_subscribers:
+            try:
+                callback(written)
+            except Exception:
+                logger.exception("Change subscriber %r failed", callback)
+    if changes:
+        for callback in _change_subscribers:
+            try:
+                callback(changes)
+            except Exception:
+                logger.exception("Change subscriber %r failed", callback)
+
+
+def _after_rollback(session):
+    session.info.pop(PENDING_KEY, None)
+    session.info.pop(WRITTEN_TABLES_KEY, None)
+    session.info.pop(CHANGES_KEY, None)
+
+
+def install(session_factory):
+    """Attach the change tracking listeners to a ``sessionmaker``."""
+    event.listen(session_factory, "after_flush", _after_flush)
+    event.listen(session_factory, "do_orm_execute", _do_orm_execute)
+    event.listen(session_factory, "before_commit", _before_commit)
+    event.listen(session_factory, "after_commit", _after_commit)
+    event.listen(session_factory, "after_rollback", _after_rollback)
+    return session_factory
@@ -0,0 +1,82 @@
+from typing import List, Optional
+
+import numpy as np
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from sql_alchemy import Measure, Metric, Model
+
+
+############################################
+#
+#   Model comparison matrix
+#
+############################################
+
+def _matrix(array: np.ndarray) -> list:
+    """Nested lists with NaN (no measure) encoded as ``None``."""
+    return np.where(np.isnan(array), None, array).tolist()
+
+
+def resolve_metrics(session: Session, metrics: Optional[str]) -> Optional[List[int]]:
+    """Metric ids from a comma separated list of ids or names, in the given order."""
+    if not metrics:
+        return None
+    tokens = [token.strip() for token in metrics.split(",") if token.strip()]
+    names = {name.lower(): metric_id for metric_id, name in session.execute(select(Metric.id, Metric.name))}
+    resolved = []
+    for token in tokens:
+        metric_id = int(token) if token.isdigit() else names.get(token.lower())
+        if metric_id is None or metric_id not in names.values():
+            raise KeyError(token)
+        resolved.append(metric_id)
+    return resolved
+
+
+def compare(session: Session, model_ids: List[int], metric_ids: Optional[List[int]] = None) -> dict:
+    """Dense metric x model matrix of mean values and their uncertainties, plus pairwise deltas.
+
+    One grouped query fetches every (model, metric) cell; the matrix, the
+    ``deltas[metric][i][j] = value[i] - value[j]`` cube and the combined delta
+    uncertainties are then built with NumPy broadcasting.
+    """
+    models = dict(session.execute(select(Model.id, Model.name).where(Model.id.in_(model_ids))).all())
+    missing = [model_id for model_id in model_ids if model_id not in models]
+    if missing:
+        raise LookupError(f"Model(s) not found: {', '.join(map(str, missing))}")
+
+    query = select(
+        Measure.metric_id, Measure.measurand_id,
+        func.avg(Measure.value), func.sum(Measure.uncertainty * Measure.uncertainty), func.count(Measure.id),
+    ).where(Measure.measurand_id.in_(model_ids)).group_by(Measure.metric_id, Measure.measurand_id)
+    if metric_ids is not None:
+        query = query.where(Measure.metric_id.in_(metric_ids))
+    cells = session.execute(query).all()
+
+    if metric_ids is None:
+        metric_ids = sorted({metric_id for metric_id, *_ in cells})
+    metric_names = dict(session.execute(select(Metric.id, Metric.name).where(Metric.id.in_(metric_ids))).all())
+
+    row_of = {metric_id: row for row, metric_id in enumerate(metric_ids)}
+    column_of = {model_id: column for column, model_id in enumerate(model_ids)}
+    values = np.full((len(metric_ids), len(model_ids)), np.nan)
+    uncertainties = np.full_like(values, np.nan)
+    if cells:
+        metric_col, model_col, means, squares, counts = (np.asarray(column) for column in zip(*cells))
+        rows = np.array([row_of[metric_id] for metric_id in metric_col])
+        columns = np.array([column_of[model_id] for model_id in model_col])
+        values[rows, columns] = means.astype(float)
+        # Standard uncertainty of the mean of independent measures.
+        uncertainties[rows, columns] = np.sqrt(squares.astype(float)) / counts.astype(float)
+
+    deltas = values[:, :, None] - values[:, None, :]
+    delta_uncertainties = np.sqrt(uncertainties[:, :, None] ** 2 + uncertainties[:, None, :] ** 2)
+
+    return {
+        "models": [{"id": model_id, "name": models[model_id]} for model_id in model_ids],
+        "metrics": [{"id": metric_id, "name": metric_names.get(metric_id)} for metric_id in metric_ids],
+        "values": _matrix(values),
+        "uncertainties": _matrix(uncertainties),
+        "deltas": _matrix(deltas),
+        "delta_uncertainties": _matrix(delta_uncertainties),
+    }
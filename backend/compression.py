@@ -0,0 +1,252 @@
+import threading
+import time
+import zlib
+from typing import Dict, List, Optional, Tuple
+
+try:
+    import brotli
+except ImportError:  # optional dependency
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # optional dependency
+    zstandard = None
+
+
+############################################
+#
+#   Response compression
+#
+############################################
+
+COMPRESSIBLE_TYPES = (
+    "application/json",
+    "application/javascript",
+    "text/csv",
+    "text/plain",
+    "text/html",
+    "text/css",
+)
+
+
+def available_encodings() -> List[str]:
+    """Supported encodings, most preferred first."""
+    encodings = []
+    if brotli is not None:
+        encodings.append("br")
+    if zstandard is not None:
+        encodings.append("zstd")
+    encodings.append("gzip")
+    return encodings
+
+
+def negotiate_encoding(accept_encoding: str, supported: List[str]) -> Optional[str]:
+    """Pick the best of ``supported`` accepted by an ``Accept-Encoding`` header value."""
+    accepted: Dict[str, float] = {}
+    for part in accept_encoding.split(","):
+        coding, _, params = part.strip().partition(";")
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[coding] = quality
+
+    best, best_quality = None, 0.0
+    for coding in supported:
+        quality = accepted.get(coding, accepted.get("*", 0.0))
+        if quality > best_quality:
+            best, best_quality = coding, quality
+    return best
+
+
+def _vary_with_accept_encoding(headers: List[Tuple[bytes, bytes]]) -> List[Tuple[bytes, bytes]]:
+    """``headers`` with ``Accept-Encoding`` added to the existing ``Vary`` tokens
+    (such as CORS's ``Origin``) rather than replacing them."""
+    tokens: List[str] = []
+    others = []
+    for name, value in headers:
+        if name.lower() == b"vary":
+            tokens.extend(token.strip() for token in value.decode("latin-1").split(",") if token.strip())
+        else:
+            others.append((name, value))
+    if "*" not in tokens and "accept-encoding" not in {token.lower() for token in tokens}:
+        tokens.append("Accept-Encoding")
+    return others + [(b"vary", ", ".join(tokens).encode("latin-1"))]
+
+
+class _Compressor:
+    def __init__(self, encoding: str, gzip_level: int):
+        self.encoding = encoding
+        if encoding == "br":
+            self._impl = brotli.Compressor(quality=4)
+        elif encoding == "zstd":
+            self._impl = zstandard.ZstdCompressor(level=3).compressobj()
+        else:
+            self._impl = zlib.compressobj(gzip_level, zlib.DEFLATED, zlib.MAX_WBITS | 16)
+
+    def compress(self, data: bytes) -> bytes:
+        # No per-chunk flush: line-by-line CSV streams would otherwise pay a
+        # block header per row. Output is emitted as the compressor fills up.
+        if self.encoding == "br":
+            return self._impl.process(data)
+        return self._impl.compress(data)
+
+    def finish(self, data: bytes = b"") -> bytes:
+        if self.encoding == "br":
+            return self._impl.process(data) + self._impl.finish()
+        return self._impl.compress(data) + self._impl.flush()
+
+
+class CompressionStats:
+    """Per-endpoint compression ratio and CPU time."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._endpoints: Dict[Tuple[str, str], Dict[str, float]] = {}
+
+    def record(self, endpoint: str, encoding: str, bytes_in: int, bytes_out: int, cpu_seconds: float):
+        with self._lock:
+            entry = self._endpoints.setdefault((endpoint, encoding), {
+                "responses": 0, "bytes_in": 0, "bytes_out": 0, "cpu_seconds": 0.0})
+            entry["responses"] += 1
+            entry["bytes_in"] += bytes_in
+            entry["bytes_out"] += bytes_out
+            entry["cpu_seconds"] += cpu_seconds
+
+    def snapshot(self) -> List[dict]:
+        with self._lock:
+            return [
+                {
+                    "endpoint": endpoint,
+                    "encoding": encoding,
+                    **entry,
+                    "ratio": entry["bytes_out"] / entry["bytes_in"] if entry["bytes_in"] else 1.0,
+                }
+                for (endpoint, encoding), entry in sorted(self._endpoints.items())
+            ]
+
+
+compression_stats = CompressionStats()
+
+
+class CompressionMiddleware:
+    """Pure ASGI middleware compressing JSON and text responses.
+
+    The encoding is negotiated from ``Accept-Encoding`` (brotli and zstd
+    when their packages are installed, gzip otherwise). Single-message
+    responses below ``minimum_size`` are sent as-is; streamed responses such
+    as the CSV/TXT audit downloads are compressed incrementally, while
+    Server-Sent Events are never buffered or compressed.
+    """
+
+    def __init__(self, app, minimum_size: int = 1024, gzip_level: int = 6, stats: CompressionStats = None):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.stats = stats or compression_stats
+        self.encodings = available_encodings()
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        accept_encoding = ""
+        for name, value in scope.get("headers", ()):
+            if name == b"accept-encoding":
+                accept_encoding = value.decode("latin-1")
+                break
+        encoding = negotiate_encoding(accept_encoding, self.encodings) if accept_encoding else None
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        responder = _CompressingResponder(self, scope, send, encoding)
+        await self.app(scope, receive, responder.send)
+
+
+class _CompressingResponder:
+    def __init__(self, middleware: CompressionMiddleware, scope, send, encoding: str):
+        self.middleware = middleware
+        self.scope = scope
+        self.downstream = send
+        self.encoding = encoding
+        self.start_message = None
+        self.compressor: Optional[_Compressor] = None
+        self.passthrough = False
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.cpu_seconds = 0.0
+
+    def _compressible(self, headers) -> bool:
+        content_type = ""
+        for name, value in headers:
+            lowered = name.lower()
+            if lowered == b"content-encoding":
+                return False
+            if lowered == b"content-type":
+                content_type = value.decode("latin-1").lower()
+        return content_type.startswith(COMPRESSIBLE_TYPES)
+
+    def _run(self, fn, data: bytes) -> bytes:
+        started = time.thread_time()
+        output = fn(data)
+        self.cpu_seconds += time.thread_time() - started
+        self.bytes_in += len(data)
+        self.bytes_out += len(output)
+        return output
+
+    async def send(self, message):
+        if self.passthrough:
+            await self.downstream(message)
+            return
+
+        if message["type"] == "http.response.start":
+            if not self._compressible(message.get("headers", ())):
+                self.passthrough = True
+                await self.downstream(message)
+                return
+            # Hold the start message until we know the body size.
+            self.start_message = message
+            return
+
+        if message["type"] != "http.response.body":
+            await self.downstream(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+
+        if self.compressor is None:
+            if not more_body and len(body) < self.middleware.minimum_size:
+                self.passthrough = True
+                await self.downstream(self.start_message)
+                await self.downstream(message)
+                return
+
+            self.compressor = _Compressor(self.encoding, self.middleware.gzip_level)
+            headers = [(name, value) for name, value in self.start_message.get("headers", ())
+                       if name.lower() != b"content-length"]
+            headers = _vary_with_accept_encoding(headers)
+            headers.append((b"content-encoding", self.encoding.encode("latin-1")))
+            compressed = self._run(self.compressor.compress if more_body else self.compressor.finish, body)
+            if not more_body:
+                headers.append((b"content-length", str(len(compressed)).encode("latin-1")))
+            await self.downstream({**self.start_message, "headers": headers})
+            await self.downstream({"type": "http.response.body", "body": compressed, "more_body": more_body})
+        else:
+            compressed = self._run(self.compressor.compress if more_body else self.compressor.finish, body)
+            if compressed or not more_body:
+                await self.downstream({"type": "http.response.body", "body": compressed, "more_body": more_body})
+
+        if not more_body:
+            route = self.scope.get("route")
+            endpoint = getattr(route, "path", None) or self.scope.get("path", "")
+            self.middleware.stats.record(endpoint, self.encoding, self.bytes_in, self.bytes_out, self.cpu_seconds)
@@ -0,0 +1,38 @@
+import os
+import shutil
+import tempfile
+from pathlib import Path
+from typing import Optional
+
+import pytest
+
+# Point the API at a throwaway copy of the bundled database so the test
+# suite never mutates lux_data_2026_map.db.
+if "SQLALCHEMY_DATABASE_URL" not in os.environ:
+    _tmp_dir = Path(tempfile.mkdtemp(prefix="aif_dashboard_tests_"))
+    _db_path = _tmp_dir / "lux_data_2026_map.db"
+    shutil.copy(Path(__file__).resolve().parent / "lux_data_2026_map.db", _db_path)
+    os.environ["SQLALCHEMY_DATABASE_URL"] = f"sqlite:///{_db_path}"
+
+
+@pytest.fixture
+def bump_measure():
+    """Update a measure through the API, returning the payload sent.
+
+    The value is incremented by one unless ``value`` is given.
+    """
+    def bump(client, measure_id: int, value: Optional[float] = None) -> dict:
+        measure = client.get(f"/measure/{measure_id}/").json()["measure"]
+        payload = {
+            "uncertainty": measure["uncertainty"],
+            "value": measure["value"] + 1 if value is None else value,
+            "error": measure["error"],
+            "unit": measure["unit"],
+            "measurand": measure["measurand_id"],
+            "metric": measure["metric_id"],
+            "observation": measure["observation_id"],
+        }
+        assert client.put(f"/measure/{measure_id}/", json=payload).status_code == 200
+        return payload
+
+    return bump
@@ -0,0 +1,119 @@
+import functools
+import itertools
+import os
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional
+
+from sqlalchemy import delete, func, select
+from sqlalchemy.orm import Session, configure_mappers
+
+from batching import chunked
+from change_tracking import Change
+from sql_alchemy import Base, ChangeLog
+
+
+############################################
+#
+#   Delta sync ("changes since version N")
+#
+############################################
+
+# change_log rows older than this are pruned; clients syncing from before the
+# retained window get a full snapshot.
+CHANGE_LOG_RETENTION_DAYS = float(os.getenv("CHANGE_LOG_RETENTION_DAYS", "30"))
+# Pruning runs inside every Nth transaction writing to the change log.
+CHANGE_LOG_PRUNE_EVERY = int(os.getenv("CHANGE_LOG_PRUNE_EVERY", "1000"))
+# Incremental deltas rely on versions being committed in order, which holds on
+# SQLite (one writer at a time). Elsewhere a transaction can commit a lower
+# version after a client synced past it, so other backends always get snapshots.
+INCREMENTAL_DIALECTS = {"sqlite"}
+
+_writes = itertools.count(1)
+
+
+def write_change_log(session: Session, changes: List[Change]):
+    """Append one change_log row per (table, row) written by the transaction, in one
+    executemany just before it commits.
+
+    The autoincrement ``version`` is the global row version. Deletes are
+    kept as tombstones so clients learn about rows they must drop.
+    """
+    now = datetime.now(timezone.utc)
+    rows = [
+        {"entity": table, "row_id": change.id, "action": change.action, "changed_at": now}
+        for change in changes
+        if change.id is not None
+        for table in change.tables
+    ]
+    if rows:
+        session.connection().execute(ChangeLog.__table__.insert(), rows)
+        if CHANGE_LOG_PRUNE_EVERY and next(_writes) % CHANGE_LOG_PRUNE_EVERY == 0:
+            prune_change_log(session, now - timedelta(days=CHANGE_LOG_RETENTION_DAYS))
+
+
+def prune_change_log(session: Session, older_than: datetime) -> int:
+    """Delete change_log rows written before ``older_than``, returning how many.
+
+    The newest row is always kept, so versions are never handed out again.
+    """
+    connection = session.connection()
+    newest = connection.execute(select(func.max(ChangeLog.version))).scalar()
+    if newest is None:
+        return 0
+    return connection.execute(delete(ChangeLog.__table__).where(
+        ChangeLog.changed_at < older_than, ChangeLog.version < newest)).rowcount
+
+
+@functools.lru_cache(maxsize=None)
+def syncable_entities() -> Dict[str, type]:
+    """Map each table name to the mapped class serving it (e.g. ``"measure" -> Measure``)."""
+    entities = {}
+    # AbstractConcreteBase classes only become mapped once mappers are configured.
+    configure_mappers()
+    for mapper in Base.registry.mappers:
+        table = mapper.class_.__dict__.get("__tablename__")
+        if table and mapper.class_ is not ChangeLog:
+            entities[table] = mapper.class_
+    return entities
+
+
+def current_version(session: Session) -> int:
+    return session.execute(select(func.max(ChangeLog.version))).scalar() or 0
+
+
+def changes_since(session: Session, entity: str, since: Optional[int]) -> dict:
+    """Rows of ``entity`` inserted or updated after ``since``, plus ids deleted since then.
+
+    A full snapshot is returned without ``since`` (rows written before change
+    tracking existed have no log entries), when ``since`` precedes the
+    retained change log window, and on backends outside INCREMENTAL_DIALECTS.
+    """
+    cls = syncable_entities()[entity]
+    version, oldest = session.execute(select(func.max(ChangeLog.version), func.min(ChangeLog.version))).one()
+    version = version or 0
+    incremental = session.get_bind().dialect.name in INCREMENTAL_DIALECTS
+    # A client at ``oldest - 1`` has seen everything pruned since; one further back has not.
+    retained = since is not None and (oldest or 1) - 1 <= since <= version
+    if not (incremental and retained):
+        return {"entity": entity, "since": since, "version": version, "full": True,
+                "upserted": session.query(cls).all(), "deleted": []}
+
+    changed_ids = list(session.execute(
+        select(ChangeLog.row_id)
+        .where(ChangeLog.entity == entity, ChangeLog.version > since, ChangeLog.version <= version)
+        .distinct()
+    ).scalars())
+
+    upserted = []
+    for chunk in chunked(changed_ids):
+        upserted.extend(session.query(cls).filter(cls.id.in_(chunk)).all())
+    present = {row.id for row in upserted}
+
+    return {
+        "entity": entity,
+        "since": since,
+        "version": version,
+        "full": False,
+        "upserted": upserted,
+        "deleted": [row_id for row_id in changed_ids if row_id not in present],
+    }
@@ -0,0 +1,243 @@
+import ast
+import re
+import threading
+from typing import TYPE_CHECKING, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from sql_alchemy import Derived, Measure, Metric, derived_metric
+
+if TYPE_CHECKING:
+    # pandas is imported where it is used, keeping it off the API's import path.
+    import pandas as pd
+
+
+############################################
+#
+#   Derived metric expression engine
+#
+############################################
+
+class ExpressionError(ValueError):
+    """Raised when a ``Derived.expression`` cannot be compiled or evaluated."""
+
+
+_BINARY_OPS = {
+    ast.Add: np.add,
+    ast.Sub: np.subtract,
+    ast.Mult: np.multiply,
+    ast.Div: np.true_divide,
+    ast.Pow: np.power,
+    ast.Mod: np.mod,
+}
+_UNARY_OPS = {
+    ast.USub: np.negative,
+    ast.UAdd: np.positive,
+}
+_FUNCTIONS = {
+    "abs": np.abs,
+    "sqrt": np.sqrt,
+    "log": np.log,
+    "log10": np.log10,
+    "exp": np.exp,
+    "min": np.minimum,
+    "max": np.maximum,
+}
+
+Plan = Callable[[Dict[int, np.ndarray]], np.ndarray]
+
+
+def variable_name(metric_name: str) -> str:
+    """Identifier form of a metric name, e.g. ``"A1 Grammar" -> "a1_grammar"``."""
+    return re.sub(r"\W+", "_", metric_name).strip("_").lower()
+
+
+class CompiledExpression:
+    """An expression parsed once into a tree of vectorised NumPy operations.
+
+    Variables are base metrics, referenced either as ``m<id>`` or by their
+    name in identifier form. Only arithmetic, unary signs, numeric literals
+    and the functions in ``_FUNCTIONS`` are accepted; anything else (attribute
+    access, subscripts, arbitrary calls...) is rejected at compile time.
+    """
+
+    def __init__(self, expression: str, variables: Dict[str, int]):
+        self.expression = expression
+        self._variables = {name.lower(): metric_id for name, metric_id in variables.items()}
+        self.metric_ids: Set[int] = set()
+        try:
+            tree = ast.parse(expression, mode="eval")
+        except SyntaxError as exc:
+            raise ExpressionError(f"Invalid expression {expression!r}: {exc.msg}") from exc
+        self._plan = self._compile(tree.body)
+
+    def _compile(self, node) -> Plan:
+        if isinstance(node, ast.Constant) and isinstance(node.value, (int, float)) \
+                and not isinstance(node.value, bool):
+            value = float(node.value)
+            return lambda columns: value
+        if isinstance(node, ast.Name):
+            metric_id = self._variables.get(node.id.lower())
+            if metric_id is None:
+                raise ExpressionError(f"Unknown variable '{node.id}': not a base metric of this derived metric")
+            self.metric_ids.add(metric_id)
+            return lambda columns: columns[metric_id]
+        if isinstance(node, ast.BinOp) and type(node.op) in _BINARY_OPS:
+            op, left, right = _BINARY_OPS[type(node.op)], self._compile(node.left), self._compile(node.right)
+            return lambda columns: op(left(columns), right(columns))
+        if isinstance(node, ast.UnaryOp) and type(node.op) in _UNARY_OPS:
+            op, operand = _UNARY_OPS[type(node.op)], self._compile(node.operand)
+            return lambda columns: op(operand(columns))
+        if isinstance(node, ast.Call) and isinstance(node.func, ast.Name) and node.func.id in _FUNCTIONS \
+                and not node.keywords:
+            fn = _FUNCTIONS[node.func.id]
+            args = [self._compile(arg) for arg in node.args]
+            if fn in (np.minimum, np.maximum):
+                if len(args) < 2:
+                    raise ExpressionError(f"{node.func.id}() takes at least 2 arguments")
+                return lambda columns: fn.reduce(np.broadcast_arrays(*(arg(columns) for arg in args)))
+            if len(args) != 1:
+                raise ExpressionError(f"{node.func.id}() takes exactly 1 argument")
+            arg = args[0]
+            return lambda columns: fn(arg(columns))
+        raise ExpressionError(f"Unsupported syntax in expression: {ast.dump(node)[:60]}")
+
+    def __call__(self, columns: Dict[int, np.ndarray], size: int) -> np.ndarray:
+        with np.errstate(divide="ignore", invalid="ignore", over="ignore"):
+            result = np.broadcast_to(np.asarray(self._plan(columns), dtype=float), (size,)).copy()
+        result[~np.isfinite(result)] = np.nan
+        return result
+
+
+class PlanCache:
+    """Compiled expressions per ``Derived.id``, recompiled only when the
+    expression or its base metrics change."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._plans: Dict[int, Tuple[tuple, CompiledExpression]] = {}
+
+    def get(self, derived_id: int, expression: str, variables: Dict[str, int]) -> CompiledExpression:
+        signature = (expression, tuple(sorted(variables.items())))
+        with self._lock:
+            cached = self._plans.get(derived_id)
+            if cached is not None and cached[0] == signature:
+                return cached[1]
+        compiled = CompiledExpression(expression, variables)
+        with self._lock:
+            self._plans[derived_id] = (signature, compiled)
+        return compiled
+
+    def discard(self, derived_id: int):
+        with self._lock:
+            self._plans.pop(derived_id, None)
+
+
+plan_cache = PlanCache()
+
+
+def base_metrics(session: Session, derived_id: int) -> List[Tuple[int, str]]:
+    return session.execute(
+        select(Metric.id, Metric.name)
+        .join(derived_metric, derived_metric.c.baseMetric == Metric.id)
+        .where(derived_metric.c.derivedBy == derived_id)
+    ).all()
+
+
+def compile_derived(session: Session, derived: Derived) -> CompiledExpression:
+    variables = {}
+    for metric_id, name in base_metrics(session, derived.id):
+        variables[variable_name(name)] = metric_id
+        variables[f"m{metric_id}"] = metric_id
+    return plan_cache.get(derived.id, derived.expression, variables)
+
+
+def _load_values(session: Session, metric_ids: Iterable[int],
+                 measurand_ids: Optional[Iterable[int]] = None) -> "pd.DataFrame":
+    """Pivot stored measures into a (measurand_id, observation_id) x metric_id frame.
+
+    When a cell holds several measures for the same metric the most recent
+    (highest id) wins.
+    """
+    import pandas as pd
+
+    query = select(Measure.measurand_id, Measure.observation_id, Measure.metric_id, Measure.value) \
+        .where(Measure.metric_id.in_(list(metric_ids))).order_by(Measure.id)
+    if measurand_ids is not None:
+        query = query.where(Measure.measurand_id.in_(list(measurand_ids)))
+    frame = pd.DataFrame(session.execute(query).all(),
+                         columns=["measurand_id", "observation_id", "metric_id", "value"])
+    if frame.empty:
+        return pd.DataFrame(index=pd.MultiIndex.from_arrays([[], []], names=["measurand_id", "observation_id"]))
+    return frame.pivot_table(index=["measurand_id", "observation_id"], columns="metric_id", values="value",
+                             aggfunc="last")
+
+
+def evaluate(session: Session, derived_id: int, measurand_ids: Optional[Iterable[int]] = None,
+             _stack: Tuple[int, ...] = ()) -> "pd.Series":
+    """Evaluate a derived metric for every (measurand, observation) cell in one vectorised pass.
+
+    Base metrics that are themselves derived are evaluated recursively. Cells
+    missing any input are left out of the result.
+    """
+    import pandas as pd
+
+    if derived_id in _stack:
+        raise ExpressionError(f"Derived metric cycle: {' -> '.join(map(str, _stack + (derived_id,)))}")
+    derived = session.get(Derived, derived_id)
+    if derived is None:
+        raise LookupError(f"Derived metric {derived_id} not found")
+    if measurand_ids is not None:
+        measurand_ids = list(measurand_ids)
+
+    compiled = compile_derived(session, derived)
+    derived_bases = set(session.execute(
+        select(Derived.id).where(Derived.id.in_(compiled.metric_ids))).scalars())
+    frame = _load_values(session, compiled.metric_ids - derived_bases, measurand_ids)
+    for base_id in derived_bases:
+        values = evaluate(session, base_id, measurand_ids, _stack + (derived_id,))
+        frame = frame.join(values.rename(base_id), how="outer")
+
+    columns = {}
+    for metric_id in compiled.metric_ids:
+        columns[metric_id] = frame[metric_id].to_numpy(dtype=float) if metric_id in frame else \
+            np.full(len(frame), np.nan)
+    result = pd.Series(compiled(columns, len(frame)), index=frame.index, name=derived_id)
+    return result.dropna()
+
+
+def materialize(session: Session, derived_id: int, values: "pd.Series", unit: str = "",
+                measurand_ids: Optional[Iterable[int]] = None) -> Dict[str, int]:
+    """Store evaluated values as Measure rows of the derived metric, updating existing cells in place.
+
+    When ``measurand_ids`` is given the values are taken as the complete result
+    for those measurands, and stored cells that are no longer produced are deleted.
+    """
+    prune = measurand_ids is not None
+    scope = sorted(set(measurand_ids) if prune else {measurand_id for measurand_id, _ in values.index})
+    if not scope:
+        return {"created": 0, "updated": 0, "deleted": 0}
+    existing = {
+        (measure.measurand_id, measure.observation_id): measure
+        for measure in session.query(Measure).filter(
+            Measure.metric_id == derived_id, Measure.measurand_id.in_(scope))
+    }
+    created = updated = deleted = 0
+    for (measurand_id, observation_id), value in values.items():
+        measure = existing.pop((measurand_id, observation_id), None)
+        if measure is None:
+            session.add(Measure(value=float(value), error="Not Available", uncertainty=0.0, unit=unit,
+                                measurand_id=int(measurand_id), metric_id=derived_id,
+                                observation_id=int(observation_id)))
+            created += 1
+        elif measure.value != float(value):
+            measure.value = float(value)
+            updated += 1
+    if prune:
+        for measure in existing.values():
+            session.delete(measure)
+            deleted += 1
+    session.commit()
+    return {"created": created, "updated": updated, "deleted": deleted}
@@ -0,0 +1,194 @@
+import logging
+import queue
+import threading
+import time
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy import select
+
+import derived_engine
+from batching import chunked
+from change_tracking import Change
+from sql_alchemy import Derived, Measure, derived_metric
+
+logger = logging.getLogger(__name__)
+
+
+############################################
+#
+#   Incremental recomputation of derived metrics
+#
+############################################
+
+# Tables whose writes change the shape of the dependency graph.
+GRAPH_TABLES = {"derived", "derived_metric"}
+
+
+class DependencyGraph:
+    """Base metric -> derived metric edges taken from ``derived_metric``."""
+
+    def __init__(self, edges: Iterable[Tuple[int, int]]):
+        self.dependants: Dict[int, Set[int]] = defaultdict(set)
+        self.bases: Dict[int, Set[int]] = defaultdict(set)
+        for base_id, derived_id in edges:
+            self.dependants[base_id].add(derived_id)
+            self.bases[derived_id].add(base_id)
+        self.derived_ids = set(self.bases)
+
+    @classmethod
+    def load(cls, session) -> "DependencyGraph":
+        derived_ids = set(session.execute(select(Derived.id)).scalars())
+        edges = session.execute(select(derived_metric.c.baseMetric, derived_metric.c.derivedBy)).all()
+        graph = cls(edges)
+        graph.derived_ids |= derived_ids
+        return graph
+
+    def affected(self, metric_ids: Iterable[int]) -> List[int]:
+        """Derived metrics depending, directly or through other derived metrics,
+        on ``metric_ids``, ordered so every derived metric follows its bases."""
+        reached: Set[int] = set()
+        pending = list(metric_ids)
+        while pending:
+            for derived_id in self.dependants.get(pending.pop(), ()):
+                if derived_id not in reached:
+                    reached.add(derived_id)
+                    pending.append(derived_id)
+
+        ordered: List[int] = []
+        visiting: Set[int] = set()
+
+        def visit(derived_id: int):
+            if derived_id in ordered or derived_id in visiting:
+                return  # cycles are reported by the evaluator
+            visiting.add(derived_id)
+            for base_id in self.bases.get(derived_id, ()):
+                if base_id in reached:
+                    visit(base_id)
+            visiting.discard(derived_id)
+            ordered.append(derived_id)
+
+        for derived_id in sorted(reached):
+            visit(derived_id)
+        return ordered
+
+
+class DerivedRecomputer:
+    """Recompute the (derived metric, measurand) cells made stale by committed measure writes.
+
+    Commit subscribers only enqueue the changed cells; a background worker
+    drains the queue, coalesces everything written meanwhile, walks the
+    dependency graph and re-evaluates each affected derived metric for the
+    touched measurands only.
+    """
+
+    def __init__(self, session_factory):
+        self.session_factory = session_factory
+        self._queue: "queue.Queue[List[Change]]" = queue.Queue()
+        self._graph: Optional[DependencyGraph] = None
+        self._lock = threading.Lock()
+        self._worker: Optional[threading.Thread] = None
+        self.stats = {"runs": 0, "cells": 0, "created": 0, "updated": 0, "deleted": 0, "errors": 0,
+                      "last_run_seconds": 0.0}
+
+    def invalidate_graph(self, tables: Set[str]):
+        if tables & GRAPH_TABLES:
+            self._graph = None
+
+    def submit(self, changes: List[Change]):
+        measure_changes = [change for change in changes if "measure" in change.tables]
+        if not measure_changes:
+            return
+        self._ensure_worker()
+        self._queue.put(measure_changes)
+
+    def join(self):
+        """Block until every submitted change has been processed."""
+        self._queue.join()
+
+    def _ensure_worker(self):
+        with self._lock:
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(target=self._run, name="derived-recompute", daemon=True)
+                self._worker.start()
+
+    def _run(self):
+        while True:
+            batches = [self._queue.get()]
+            while True:
+                try:
+                    batches.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                self.process([change for batch in batches for change in batch])
+            except Exception:
+                self.stats["errors"] += 1
+                logger.exception("Derived metric recomputation failed")
+            finally:
+                for _ in batches:
+                    self._queue.task_done()
+
+    def _graph_for(self, session) -> DependencyGraph:
+        graph = self._graph
+        if graph is None:
+            graph = self._graph = DependencyGraph.load(session)
+        return graph
+
+    def process(self, changes: List[Change]):
+        started = time.perf_counter()
+        with self.session_factory() as session:
+            graph = self._graph_for(session)
+            stale = self._stale_cells(session, graph, changes)
+            if not stale:
+                return
+
+            # Propagate touched measurands down the graph, bases first.
+            for derived_id in graph.affected(stale):
+                measurand_ids = set()
+                for base_id in graph.bases[derived_id]:
+                    measurand_ids |= stale.get(base_id, set())
+                if not measurand_ids:
+                    continue
+                stale[derived_id] = measurand_ids
+                values = derived_engine.evaluate(session, derived_id, measurand_ids)
+                counts = derived_engine.materialize(session, derived_id, values, measurand_ids=measurand_ids)
+                self.stats["cells"] += len(measurand_ids)
+                for key, count in counts.items():
+                    self.stats[key] += count
+        self.stats["runs"] += 1
+        self.stats["last_run_seconds"] = time.perf_counter() - started
+
+    @staticmethod
+    def _stale_cells(session, graph: DependencyGraph, changes: List[Change]) -> Dict[int, Set[int]]:
+        """Measurands touched per base metric. Writes to derived metrics' own
+        measures are ignored: evaluation always starts from direct measures."""
+        stale: Dict[int, Set[int]] = defaultdict(set)
+        unresolved = []
+        recompute_all = False
+
+        def add(metric_id, measurand_id):
+            if metric_id in graph.dependants and metric_id not in graph.derived_ids:
+                stale[metric_id].add(measurand_id)
+
+        for change in changes:
+            if "metric_id" in change.row and "measurand_id" in change.row:
+                add(change.row["metric_id"], change.row["measurand_id"])
+                add(change.previous.get("metric_id", change.row["metric_id"]),
+                    change.previous.get("measurand_id", change.row["measurand_id"]))
+            elif change.action == "delete" or change.id is None:
+                # A delete without its keys or a statement on the whole table:
+                # the touched cells are unknown, so recompute everything.
+                recompute_all = True
+            elif change.id is not None:
+                unresolved.append(change.id)
+        if recompute_all:
+            measurand_ids = set(session.execute(select(Measure.measurand_id).distinct()).scalars())
+            return {metric_id: set(measurand_ids) for metric_id in graph.dependants
+                    if metric_id not in graph.derived_ids}
+        # Bulk statements only report ids, so look the cells up.
+        for chunk in chunked(unresolved):
+            for metric_id, measurand_id in session.execute(
+                    select(Measure.metric_id, Measure.measurand_id).where(Measure.id.in_(chunk))):
+                add(metric_id, measurand_id)
+        return stale
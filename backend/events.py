@@ -0,0 +1,123 @@
+import asyncio
+import itertools
+import json
+import threading
+from collections import deque
+from typing import AsyncIterator, Deque, Dict, List, Optional, Set
+
+from fastapi.encoders import jsonable_encoder
+
+from change_tracking import Change
+
+
+############################################
+#
+#   Live change events (Server-Sent Events)
+#
+############################################
+
+class _Subscriber:
+    __slots__ = ("queue", "loop", "entities")
+
+    def __init__(self, queue: asyncio.Queue, loop: asyncio.AbstractEventLoop, entities: Optional[Set[str]]):
+        self.queue = queue
+        self.loop = loop
+        self.entities = entities
+
+    def wants(self, event: dict) -> bool:
+        return self.entities is None or event["entity"].lower() in self.entities
+
+
+class EventBroker:
+    """Fan committed row changes out to connected SSE clients.
+
+    Publishing happens from whatever thread committed the session; each
+    subscriber owns a bounded asyncio queue fed through its event loop. A
+    short history is kept so reconnecting clients can resume from
+    ``Last-Event-ID`` instead of re-downloading their datasets.
+    """
+
+    def __init__(self, history_size: int = 1000, queue_size: int = 1000):
+        self.queue_size = queue_size
+        self._history: Deque[dict] = deque(maxlen=history_size)
+        self._subscribers: List[_Subscriber] = []
+        self._seq = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def publish(self, changes: List[Change]):
+        events = []
+        with self._lock:
+            for change in changes:
+                event = {
+                    "seq": next(self._seq),
+                    "entity": change.entity,
+                    "id": change.id,
+                    "action": change.action,
+                    "row": jsonable_encoder(change.row) if change.row else None,
+                }
+                self._history.append(event)
+                events.append(event)
+            subscribers = list(self._subscribers)
+        for subscriber in subscribers:
+            selected = [event for event in events if subscriber.wants(event)]
+            if selected:
+                subscriber.loop.call_soon_threadsafe(self._deliver, subscriber, selected)
+
+    def _deliver(self, subscriber: _Subscriber, events: List[dict]):
+        for event in events:
+            try:
+                subscriber.queue.put_nowait(event)
+            except asyncio.QueueFull:
+                # The client fell too far behind: drop its backlog and ask it
+                # to refetch rather than buffering without bound.
+                while not subscriber.queue.empty():
+                    subscriber.queue.get_nowait()
+                subscriber.queue.put_nowait({"seq": event["seq"], "action": "resync"})
+                return
+
+    def subscribe(self, entities: Optional[Set[str]] = None, last_event_id: Optional[int] = None) -> _Subscriber:
+        subscriber = _Subscriber(asyncio.Queue(self.queue_size), asyncio.get_running_loop(), entities)
+        with self._lock:
+            if last_event_id is not None:
+                backlog = [event for event in self._history if event["seq"] > last_event_id]
+                if self._history and self._history[0]["seq"] > last_event_id + 1:
+                    backlog = [{"seq": self._history[-1]["seq"], "action": "resync"}]
+                for event in backlog:
+                    if event["action"] == "resync" or subscriber.wants(event):
+                        subscriber.queue.put_nowait(event)
+            self._subscribers.append(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber: _Subscriber):
+        with self._lock:
+            if subscriber in self._subscribers:
+                self._subscribers.remove(subscriber)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"subscribers": len(self._subscribers), "history": len(self._history)}
+
+
+def format_sse(event: dict, include_row: bool = True) -> str:
+    if not include_row and "row" in event:
+        event = {key: value for key, value in event.items() if key != "row"}
+    name = "resync" if event["action"] == "resync" else "change"
+    return f"id: {event['seq']}\nevent: {name}\ndata: {json.dumps(event)}\n\n"
+
+
+async def event_stream(request, subscriber: _Subscriber, include_rows: bool = True,
+                       keepalive: float = 15.0) -> AsyncIterator[str]:
+    try:
+        yield f"retry: {int(keepalive * 1000)}\n\n"
+        while not await request.is_disconnected():
+            try:
+                event = await asyncio.wait_for(subscriber.queue.get(), timeout=keepalive)
+            except asyncio.TimeoutError:
+                yield ": keep-alive\n\n"
+                continue
+            yield format_sse(event, include_rows)
+    finally:
+        event_broker.unsubscribe(subscriber)
+
+
+event_broker = EventBroker()
@@ -0,0 +1,134 @@
+from collections import defaultdict
+from typing import Dict, Set, Tuple
+
+from sqlalchemy import inspect, literal, select
+from sqlalchemy.orm import Mapper, Session, aliased
+
+from batching import chunked
+from delta_sync import syncable_entities
+
+
+############################################
+#
+#   Relationship graph traversal (lineage)
+#
+############################################
+
+MAX_DEPTH = 6
+
+
+def _node_mapper(mapper: Mapper) -> Mapper:
+    """The mapper whose table owns the ids: joined subclasses (Model) resolve to
+    their base (Element), concrete classes (Observation, Metric) to themselves."""
+    while mapper.inherits is not None and not mapper.concrete:
+        mapper = mapper.inherits
+    return mapper
+
+
+def _relationships(mapper: Mapper):
+    """Relationships declared on ``mapper`` or any joined subclass of it."""
+    for candidate in mapper.self_and_descendants:
+        if _node_mapper(candidate) is not mapper:
+            continue
+        for relationship in candidate.relationships:
+            if relationship.parent is candidate:
+                yield candidate, relationship
+
+
+def _label_column(mapper: Mapper):
+    for attribute in ("name", "Name", "legal_ref", "accepted_target_values"):
+        if attribute in mapper.columns:
+            return getattr(mapper.class_, attribute)
+    return literal(None)
+
+
+def _type_column(mapper: Mapper):
+    # Only the discriminator is read: loading whole rows would coerce enum
+    # columns and fail on stored values outside the declared enums.
+    if mapper.polymorphic_on is not None and mapper.polymorphic_map and not mapper.concrete:
+        return mapper.polymorphic_on
+    return literal(None)
+
+
+def walk(session: Session, entity: str, entity_id: int, depth: int = 2, max_nodes: int = 5000) -> dict:
+    """Breadth-first walk of the relationships in ``sql_alchemy.py`` starting at one row.
+
+    Each level issues one batched ``IN`` query per (class, relationship) on
+    the frontier, so the query count depends on depth and schema size, not on
+    the number of rows reached. Nodes and edges are deduplicated.
+    """
+    entities = syncable_entities()
+    if entity not in entities:
+        raise KeyError(entity)
+    start_mapper = _node_mapper(inspect(entities[entity]))
+    start_cls = start_mapper.class_
+    if session.execute(select(start_cls.id).where(start_cls.id == entity_id)).first() is None:
+        raise LookupError(f"{start_cls.__name__} {entity_id} not found")
+
+    seen: Dict[Mapper, Set[int]] = defaultdict(set)
+    seen[start_mapper].add(entity_id)
+    levels = {(start_mapper, entity_id): 0}
+    edges: Dict[Tuple[str, str], Tuple[str, str, str]] = {}
+    frontier: Dict[Mapper, Set[int]] = {start_mapper: {entity_id}}
+    truncated = False
+    node_count = 1
+
+    for level in range(1, depth + 1):
+        next_frontier: Dict[Mapper, Set[int]] = defaultdict(set)
+        for mapper, ids in frontier.items():
+            for owner, relationship in _relationships(mapper):
+                target_mapper = _node_mapper(relationship.mapper)
+                target = aliased(relationship.mapper.class_)
+                source_cls = owner.class_
+                for chunk in chunked(sorted(ids)):
+                    pairs = session.execute(
+                        select(source_cls.id, target.id)
+                        .join(getattr(source_cls, relationship.key).of_type(target))
+                        .where(source_cls.id.in_(chunk))
+                    ).all()
+                    for source_id, target_id in pairs:
+                        source_key = f"{mapper.class_.__name__}:{source_id}"
+                        target_key = f"{target_mapper.class_.__name__}:{target_id}"
+                        # Back-populated relationships yield each edge twice; keep the first direction seen.
+                        edges.setdefault(tuple(sorted((source_key, target_key))),
+                                         (source_key, target_key, relationship.key))
+                        if target_id not in seen[target_mapper]:
+                            if node_count >= max_nodes:
+                                truncated = True
+                                continue
+                            node_count += 1
+                            seen[target_mapper].add(target_id)
+                            levels[(target_mapper, target_id)] = level
+                            next_frontier[target_mapper].add(target_id)
+        frontier = next_frontier
+        if not frontier:
+            break
+
+    nodes = []
+    for mapper, ids in seen.items():
+        cls = mapper.class_
+        query = select(cls.id, _label_column(mapper), _type_column(mapper))
+        for chunk in chunked(sorted(ids)):
+            for row_id, label, discriminator in session.execute(query.where(cls.id.in_(chunk))):
+                subclass = mapper.polymorphic_map.get(discriminator) if discriminator is not None else None
+                nodes.append({
+                    "id": f"{cls.__name__}:{row_id}",
+                    "entity": cls.__name__,
+                    "type": subclass.class_.__name__ if subclass is not None else cls.__name__,
+                    "key": row_id,
+                    "label": label,
+                    "level": levels[(mapper, row_id)],
+                })
+    nodes.sort(key=lambda node: (node["level"], node["entity"], node["key"]))
+    known = {node["id"] for node in nodes}
+    return {
+        "root": f"{start_cls.__name__}:{entity_id}",
+        "depth": depth,
+        "truncated": truncated,
+        "nodes": nodes,
+        "edges": [
+            {"source": source, "target": target, "relation": relation}
+            for source, target, relation in edges.values()
+            if source in known and target in known
+        ],
+    }
@@ -0,0 +1,106 @@
+import json
+import logging
+import os
+import sys
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, Optional
+
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
+# "json" (one object per line) or "text".
+LOG_FORMAT = os.getenv("LOG_FORMAT", "json")
+# Per-logger overrides, e.g. "access=WARNING,query_budget=ERROR,sqlalchemy.engine=INFO".
+LOG_LEVELS = os.getenv("LOG_LEVELS", "")
+# SQL_ECHO=1 logs every statement through sqlalchemy.engine, replacing create_engine(echo=True).
+SQL_ECHO = os.getenv("SQL_ECHO", "0") == "1"
+LOG_REDACT_KEYS = {key.strip().lower() for key in
+                   os.getenv("LOG_REDACT_KEYS", "password,token,secret,authorization,api_key").split(",")
+                   if key.strip()}
+# Strings longer than this are truncated in logged payloads.
+LOG_PAYLOAD_MAX = int(os.getenv("LOG_PAYLOAD_MAX", "200"))
+
+# Attributes every LogRecord has; anything else came in through ``extra``.
+_RECORD_ATTRIBUTES = set(vars(logging.makeLogRecord({}))) | {"message", "asctime"}
+
+
+############################################
+#
+#   Structured logging
+#
+############################################
+
+def redact(payload: Any, max_length: int = LOG_PAYLOAD_MAX, keys: Iterable[str] = LOG_REDACT_KEYS) -> Any:
+    """Copy of ``payload`` safe to log: values under sensitive keys masked, long strings truncated."""
+    keys = set(keys)
+    if isinstance(payload, dict):
+        return {key: "[redacted]" if str(key).lower() in keys else redact(value, max_length, keys)
+                for key, value in payload.items()}
+    if isinstance(payload, (list, tuple)):
+        return [redact(value, max_length, keys) for value in payload]
+    if isinstance(payload, str) and len(payload) > max_length:
+        return f"{payload[:max_length]}...[{len(payload) - max_length} more]"
+    if isinstance(payload, (int, float, bool)) or payload is None:
+        return payload
+    return redact(str(payload), max_length, keys)
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per record; fields passed with ``extra=`` become top-level keys."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry: Dict[str, Any] = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRIBUTES and not key.startswith("_"):
+                entry[key] = value
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+def parse_levels(spec: str) -> Dict[str, int]:
+    levels = {}
+    for item in spec.split(","):
+        if not item.strip():
+            continue
+        name, _, level = item.partition("=")
+        if not level or not isinstance(logging.getLevelName(level.strip().upper()), int):
+            raise ValueError(f"Invalid LOG_LEVELS entry {item!r}; expected logger=LEVEL")
+        levels[name.strip()] = logging.getLevelName(level.strip().upper())
+    return levels
+
+
+_handler: Optional[logging.Handler] = None
+
+
+def configure(level: str = LOG_LEVEL, fmt: str = LOG_FORMAT, levels: str = LOG_LEVELS, sql_echo: bool = SQL_ECHO,
+              replace_handlers: bool = False):
+    """Install a stderr handler on the root logger and apply per-module levels.
+
+    Logs go to stderr so tools printing results on stdout (benchmarks, load
+    generator) stay machine readable. Calling it again swaps only the handler
+    installed here; handlers set up by the host process are kept unless
+    ``replace_handlers`` is true.
+    """
+    global _handler
+    handler = logging.StreamHandler(sys.stderr)
+    if fmt == "json":
+        handler.setFormatter(JsonFormatter())
+    else:
+        handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(name)s %(message)s"))
+    root = logging.getLogger()
+    for existing in list(root.handlers):
+        if replace_handlers or existing is _handler:
+            root.removeHandler(existing)
+    root.addHandler(handler)
+    _handler = handler
+    root.setLevel(level.upper())
+
+    logging.getLogger("sqlalchemy.engine").setLevel(logging.INFO if sql_echo else logging.WARNING)
+    # request_context.RequestMiddleware writes the access log.
+    logging.getLogger("uvicorn.access").setLevel(logging.WARNING)
+    for name, module_level in parse_levels(levels).items():
+        logging.getLogger(name).setLevel(module_level)
@@ -2,12 +2,12 @@ from contextlib import asynccontextmanager
 from fastapi import FastAPI
 import uvicorn
 import os, json
-import time as time_module
 import logging
+import threading
 from fastapi import Depends, FastAPI, HTTPException, Request, status, Body
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
-from sqlalchemy import create_engine
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
+from sqlalchemy import create_engine, inspect, text
 from sqlalchemy.orm import Session, sessionmaker
 from sqlalchemy.exc import SQLAlchemyError, IntegrityError
 from pydantic_classes import *
@@ -19,10 +19,33 @@ from immudb.client import ImmudbClient
 import os
 from immudb import constants
 from sql_alchemy import Base
-
-# Configure logging
-logging.basicConfig(level=logging.INFO)
+import change_tracking
+from query_cache import query_cache
+from singleflight import single_flight
+from events import event_broker, event_stream
+from compression import CompressionMiddleware, compression_stats
+import delta_sync
+import derived_engine
+from derived_recompute import DerivedRecomputer
+from measure_index import AGGREGATES, measure_index
+import measure_aggregate
+import timeseries
+import compare
+from project_summary import project_summaries
+import lineage
+from metric_coverage import coverage_index
+import prometheus
+import query_budget
+from request_context import RequestMiddleware
+from slow_queries import slow_query_log
+from profiler import ProfilingMiddleware, profiler
+import log_config
+import readiness
+
+# Configure logging (LOG_LEVEL, LOG_FORMAT, LOG_LEVELS, SQL_ECHO)
+log_config.configure()
 logger = logging.getLogger(__name__)
+audit_logger = logging.getLogger("audit")
 
 import os
 from pathlib import Path
@@ -91,16 +114,31 @@ from pathlib import Path
 #     Base.metadata.create_all(bind=engine)
 #     return SessionLocal
 
+def ensure_schema(engine) -> list:
+    """Create the tables missing from the database, found with a single catalog query
+    instead of one existence check per table. Returns the names of the created tables."""
+    existing = set(inspect(engine).get_table_names())
+    missing = [table for table in Base.metadata.sorted_tables if table.name not in existing]
+    if missing:
+        Base.metadata.create_all(bind=engine, tables=missing, checkfirst=False)
+    return [table.name for table in missing]
+
+
 def init_db():
     db_url = os.getenv("SQLALCHEMY_DATABASE_URL", "sqlite:///./lux_data_2026_map.db")
-    print("Using database:", db_url)
+    logger.info("Using database: %s", db_url)
 
+    in_memory = db_url in ("sqlite://", "sqlite:///:memory:")
     engine = create_engine(
         db_url,
-        connect_args={"check_same_thread": False} if db_url.startswith("sqlite") else {}
+        connect_args={"check_same_thread": False} if db_url.startswith("sqlite") else {},
+        # Times checkout waits for db_pool_checkout_wait_seconds.
+        **({} if in_memory else {"poolclass": prometheus.TimedQueuePool}),
     )
     SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
-    Base.metadata.create_all(bind=engine)
+    created = ensure_schema(engine)
+    if created:
+        logger.info("Created tables: %s", ", ".join(created))
     return SessionLocal
 
 
@@ -166,22 +204,23 @@ from typing import Optional, Dict
 
 
 def immudb_exec(sql: str, params: Optional[Dict] = None):
-    client = ImmudbClient(f"{IMMUDB_HOST}:{IMMUDB_PORT}")
+    with prometheus.immudb_call("query" if params is None else "exec"):
+        client = ImmudbClient(f"{IMMUDB_HOST}:{IMMUDB_PORT}")
 
-    client.login(
-        os.getenv("IMMUDB_USER", "immudb"),
-        os.getenv("IMMUDB_PASSWORD", "immudb"),
-    )
+        client.login(
+            os.getenv("IMMUDB_USER", "immudb"),
+            os.getenv("IMMUDB_PASSWORD", "immudb"),
+        )
 
-    client.useDatabase(b"auditdb")
+        client.useDatabase(b"auditdb")
 
-    try:
-        if params is None:
-            return client.sqlQuery(sql)
-        else:
-            return client.sqlExec(sql, params)
-    finally:
-        client.logout()
+        try:
+            if params is None:
+                return client.sqlQuery(sql)
+            else:
+                return client.sqlExec(sql, params)
+        finally:
+            client.logout()
 
 
 def immudb_log(
@@ -201,36 +240,38 @@ def immudb_log(
 
     safe_payload = {k: serialize(v) for k, v in payload.items()}
 
-    logger.info(
-        "====================== RAW DATA RECEIVED FROM FRONT END: =================================================================================================================================================================="
-        f"action :{action}, type:f'{type(action)} , entity:{entity}, type :f'{type(entity)} , entity_id:{entity_id} type : f'{type(entity_id)} safe_payload:{safe_payload} type of safe_payload: f'{type(safe_payload)}"
-    )
+    # The payload is only redacted and attached when DEBUG is enabled for "audit".
+    if audit_logger.isEnabledFor(logging.DEBUG):
+        audit_logger.debug("audit %s %s %s", action, entity, entity_id,
+                           extra={"action": action, "entity": entity, "entity_id": entity_id,
+                                  "payload": log_config.redact(safe_payload)})
 
     client = ImmudbClient(f"{IMMUDB_HOST}:{IMMUDB_PORT}")
 
     try:
-        client.login(
-            os.getenv("IMMUDB_USER", "immudb"),
-            os.getenv("IMMUDB_PASSWORD", "immudb"),
-        )
-
-        client.useDatabase(b"auditdb")
+        with prometheus.immudb_call("audit_log"):
+            client.login(
+                os.getenv("IMMUDB_USER", "immudb"),
+                os.getenv("IMMUDB_PASSWORD", "immudb"),
+            )
 
-        client.sqlExec(
-            """
-            INSERT INTO comments_audit_v2
-                (tx_id, action, entity, entity_id, payload, created_at)
-            VALUES (@tx_id, @action, @entity, @entity_id, @payload, @created_at)
-            """,
-            {
-                "tx_id": time.time_ns(),
-                "action": action,
-                "entity": entity,
-                "entity_id": entity_id,
-                "payload": json.dumps(safe_payload),
-                "created_at": int(time.time()),
-            },
-        )
+            client.useDatabase(b"auditdb")
+
+            client.sqlExec(
+                """
+                INSERT INTO comments_audit_v2
+                    (tx_id, action, entity, entity_id, payload, created_at)
+                VALUES (@tx_id, @action, @entity, @entity_id, @payload, @created_at)
+                """,
+                {
+                    "tx_id": time.time_ns(),
+                    "action": action,
+                    "entity": entity,
+                    "entity_id": entity_id,
+                    "payload": json.dumps(safe_payload),
+                    "created_at": int(time.time()),
+                },
+            )
 
     except Exception:
         logger.exception("immudb audit insert failed")
@@ -311,43 +352,75 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Compress JSON and CSV/TXT responses above the size threshold
+app.add_middleware(
+    CompressionMiddleware,
+    minimum_size=int(os.getenv("COMPRESSION_MIN_SIZE", "1024")),
+    gzip_level=int(os.getenv("COMPRESSION_GZIP_LEVEL", "6")),
+)
 
-@app.on_event("startup")
-def startup_event():
-    client = ImmudbClient(f"{IMMUDB_HOST}:{IMMUDB_PORT}")
-    client.login(
-        os.getenv("IMMUDB_USER", "immudb"),
-        os.getenv("IMMUDB_PASSWORD", "immudb"),
-    )
-    init_immudb(client)
-    client.logout()
+app.add_middleware(ProfilingMiddleware)
 
+# Outermost: request id, timing, access log, metrics and query budget in one pure ASGI layer
+app.add_middleware(
+    RequestMiddleware,
+    on_start=[prometheus.request_started],
+    on_headers=[query_budget.add_headers],
+    on_finish=[prometheus.request_finished, query_budget.request_finished],
+)
 
-############################################
-#
-#   Middleware
-#
-############################################
 
-# Request logging middleware
-@app.middleware("http")
-async def log_requests(request: Request, call_next):
-    """Log all incoming requests and responses."""
-    logger.info(f"Incoming request: {request.method} {request.url.path}")
-    response = await call_next(request)
-    logger.info(f"Response status: {response.status_code}")
-    return response
+def connect_and_init_immudb():
+    with prometheus.immudb_call("init"):
+        client = ImmudbClient(f"{IMMUDB_HOST}:{IMMUDB_PORT}")
+        client.login(
+            os.getenv("IMMUDB_USER", "immudb"),
+            os.getenv("IMMUDB_PASSWORD", "immudb"),
+        )
+        init_immudb(client)
+        client.logout()
+
+
+# The ledger is initialised in the background (with retry and backoff) so a slow
+# or unreachable immudb never delays the HTTP server; /health/ready reports it.
+immudb_init = readiness.BackgroundInit("immudb", connect_and_init_immudb)
+
+
+def _ping_immudb():
+    with prometheus.immudb_call("probe"):
+        client = ImmudbClient(f"{IMMUDB_HOST}:{IMMUDB_PORT}")
+        client.login(
+            os.getenv("IMMUDB_USER", "immudb"),
+            os.getenv("IMMUDB_PASSWORD", "immudb"),
+        )
+        try:
+            client.useDatabase(b"auditdb")
+        finally:
+            client.logout()
+
 
+immudb_probe = readiness.Probe("immudb", _ping_immudb)
 
-# Request timing middleware
-@app.middleware("http")
-async def add_process_time_header(request: Request, call_next):
-    """Add processing time header to all responses."""
-    start_time = time_module.time()
-    response = await call_next(request)
-    process_time = time_module.time() - start_time
-    response.headers["X-Process-Time"] = str(process_time)
-    return response
+
+def immudb_status() -> dict:
+    """Initialisation state, then, once initialised, the cached result of a live login probe."""
+    status = immudb_init.status()
+    if status["ready"]:
+        status.update(immudb_probe.status())
+        if not status["ready"]:
+            status["state"] = "unreachable"
+    return status
+
+
+@app.on_event("startup")
+def startup_event():
+    init()
+    immudb_init.start()
+
+
+@app.on_event("shutdown")
+def shutdown_event():
+    immudb_init.stop()
 
 
 ############################################
@@ -436,13 +509,66 @@ async def http_exception_handler(request: Request, exc: HTTPException):
     )
 
 
-# Initialize database session
-SessionLocal = init_db()
+# Database session factory, created by init() on startup or on first use, so
+# importing this module opens no database and registers no listener.
+_session_factory: Optional[sessionmaker] = None
+_derived_recomputer: Optional[DerivedRecomputer] = None
+_init_lock = threading.Lock()
+
+
+def init() -> sessionmaker:
+    """Create the engine, bootstrap the schema and wire instrumentation and change listeners, once."""
+    global _session_factory, _derived_recomputer
+    if _session_factory is not None:
+        return _session_factory
+    with _init_lock:
+        if _session_factory is not None:
+            return _session_factory
+        SessionLocal = init_db()
+        engine = SessionLocal.kw["bind"]
+        change_tracking.install(SessionLocal)
+        prometheus.instrument_engine(engine)
+        query_budget.instrument_engine(engine)
+        slow_query_log.instrument_engine(engine)
+        profiler.instrument_engine(engine)
+
+        change_tracking.subscribe(query_cache.invalidate_tables)
+        change_tracking.subscribe_changes(event_broker.publish)
+        change_tracking.subscribe_before_commit(delta_sync.write_change_log)
+        change_tracking.subscribe(measure_index.on_tables)
+        change_tracking.subscribe_changes(measure_index.on_changes)
+        change_tracking.subscribe_changes(project_summaries.on_changes)
+        change_tracking.subscribe(coverage_index.on_tables)
+        change_tracking.subscribe_changes(coverage_index.on_changes)
+        _derived_recomputer = DerivedRecomputer(SessionLocal)
+        if os.getenv("DERIVED_RECOMPUTE", "1") == "1":
+            change_tracking.subscribe(_derived_recomputer.invalidate_graph)
+            change_tracking.subscribe_changes(_derived_recomputer.submit)
+        _session_factory = SessionLocal
+    return _session_factory
+
+
+def __getattr__(name: str):
+    # main_api.SessionLocal and main_api.derived_recomputer initialise on first access.
+    if name == "SessionLocal":
+        return init()
+    if name == "derived_recomputer":
+        init()
+        return _derived_recomputer
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def _ping_database():
+    with init().kw["bind"].connect() as connection:
+        connection.execute(text("SELECT 1"))
+
+
+database_probe = readiness.Probe("database", _ping_database)
 
 
 # Dependency to get DB session
 def get_db():
-    db = SessionLocal()
+    db = init()()
     try:
         yield db
     except Exception:
@@ -473,13 +599,32 @@ def root():
 def health_check():
     """Health check endpoint for monitoring"""
     from datetime import datetime
+    database = database_probe.status()
     return {
-        "status": "healthy",
+        "status": "healthy" if database["ready"] else "degraded",
         "timestamp": datetime.now().isoformat(),
-        "database": "connected"
+        "database": "connected" if database["ready"] else "disconnected",
+        "immudb": immudb_status()["state"],
     }
 
 
+@app.get("/health/live", tags=["System"])
+def liveness():
+    """Liveness probe: the process is up and serving requests; no dependency is checked."""
+    return {"status": "alive"}
+
+
+@app.get("/health/ready", tags=["System"])
+def readiness_check():
+    """Readiness probe from cached results: 200 once the database answers and
+    the immudb ledger is initialised, 503 otherwise."""
+    result = readiness.report(
+        {"database": database_probe.status(), "immudb": immudb_status()},
+        {"database": True, "immudb": readiness.IMMUDB_REQUIRED},
+    )
+    return JSONResponse(result, status_code=200 if result["status"] == "ready" else 503)
+
+
 @app.get("/statistics", tags=["System"])
 def get_statistics(database: Session = Depends(get_db)):
     """Get database statistics for all entities"""
@@ -507,6 +652,105 @@ def get_statistics(database: Session = Depends(get_db)):
     return stats
 
 
+@app.get("/cache/stats", tags=["System"])
+def get_cache_stats():
+    """Hit/miss, eviction and memory statistics of the query result cache"""
+    return {
+        **query_cache.stats(),
+        "single_flight": {**single_flight.stats, "in_flight": single_flight.in_flight()},
+    }
+
+
+@app.get("/metrics", response_class=PlainTextResponse, tags=["System"])
+def get_metrics():
+    """Prometheus text exposition of request, database and immudb metrics"""
+    return PlainTextResponse(prometheus.registry.render(), media_type="text/plain; version=0.0.4")
+
+
+@app.get("/debug/slow-queries", tags=["System"])
+def get_slow_queries(limit: Optional[int] = None):
+    """Recent SQL statements slower than SLOW_QUERY_MS with their parameter
+    types, originating route and query plan, most recent first"""
+    return {**slow_query_log.info(), "entries": slow_query_log.entries(limit)}
+
+
+@app.delete("/debug/slow-queries", tags=["System"])
+def clear_slow_queries():
+    """Empty the slow query log"""
+    slow_query_log.clear()
+    return {"message": "Slow query log cleared"}
+
+
+def require_profile_admin(request: Request):
+    if not profiler.is_admin(request.headers.get("x-profile-token")):
+        raise HTTPException(status_code=403, detail="A valid X-Profile-Token header is required")
+
+
+@app.get("/debug/profiles", tags=["System"], dependencies=[Depends(require_profile_admin)])
+def get_profiles():
+    """Recently profiled requests with their time split by SQLAlchemy,
+    serialization, immudb and other code, most recent first"""
+    return profiler.recent()
+
+
+@app.get("/debug/profiles/{profile_id}", tags=["System"], dependencies=[Depends(require_profile_admin)])
+def get_profile(profile_id: int, format: str = "json"):
+    """One profile; ``format=collapsed`` returns folded stacks for flamegraph.pl or speedscope"""
+    profile = profiler.get(profile_id)
+    if profile is None:
+        raise HTTPException(status_code=404, detail=f"Profile {profile_id} not found")
+    if format == "collapsed":
+        return PlainTextResponse(profile.collapsed())
+    return {**profile.summary(), "stacks": profile.stack_counts()}
+
+
+@app.get("/compression/stats", tags=["System"])
+def get_compression_stats():
+    """Compression ratio and CPU time per endpoint and encoding"""
+    return compression_stats.snapshot()
+
+
+@app.delete("/cache/", tags=["System"])
+def clear_cache():
+    """Drop every cached query result"""
+    query_cache.clear()
+    measure_index.clear()
+    project_summaries.clear()
+    coverage_index.clear()
+    return {"message": "Query cache cleared"}
+
+
+@app.get("/events", tags=["System"])
+async def stream_events(request: Request, entities: Optional[str] = None, include_rows: bool = True):
+    """Server-Sent Events stream of committed create/update/delete changes.
+
+    ``entities`` is an optional comma-separated filter (e.g. ``Measure,Comments``).
+    Reconnecting clients resume from the ``Last-Event-ID`` header; a ``resync``
+    event means the backlog was lost and the client should refetch.
+    """
+    entity_filter = {e.strip().lower() for e in entities.split(",") if e.strip()} if entities else None
+    last_event_id = request.headers.get("last-event-id")
+    subscriber = event_broker.subscribe(
+        entity_filter, int(last_event_id) if last_event_id and last_event_id.isdigit() else None)
+    return StreamingResponse(
+        event_stream(request, subscriber, include_rows),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@app.get("/{entity}/changes", response_model=None, tags=["System"])
+def get_entity_changes(entity: str, since: Optional[int] = None, database: Session = Depends(get_db)) -> dict:
+    """Delta sync: rows of ``entity`` created/updated and ids deleted after version ``since``.
+
+    Clients store the returned ``version`` and pass it as ``since`` next time;
+    omitting ``since`` returns a full snapshot.
+    """
+    if entity not in delta_sync.syncable_entities():
+        raise HTTPException(status_code=404, detail=f"Unknown entity '{entity}'")
+    return delta_sync.changes_since(database, entity, since)
+
+
 ############################################
 #
 #   Comments functions
@@ -2352,6 +2596,7 @@ async def get_ref_of_evaluation(evaluation_id: int, database: Session = Depends(
 
 
 @app.get("/measure/", response_model=None, tags=["Measure"])
+@query_cache.cached("measure", "element", "model", "metric", "derived", "direct", "observation")
 def get_all_measure(detailed: bool = False, database: Session = Depends(get_db)) -> list:
     from sqlalchemy.orm import joinedload
 
@@ -2371,7 +2616,7 @@ def get_all_measure(detailed: bool = False, database: Session = Depends(get_db))
             item_dict.pop('_sa_instance_state', None)
 
             # Add model name if available
-            if hasattr(measure_item, 'measurand') and item_dict.measurand:
+            if hasattr(measure_item, 'measurand') and measure_item.measurand:
                 item_dict['name'] = measure_item.measurand.name
 
             # Add many-to-one relationships (foreign keys for lookup columns)
@@ -3528,6 +3773,8 @@ async def get_eval_of_element(element_id: int, database: Session = Depends(get_d
 
 
 @app.get("/metric/", response_model=None, tags=["Metric"])
+@query_cache.cached("metric", "derived", "direct", "metriccategory", "metriccategory_metric", "derived_metric",
+                    "measure", "element", "model")
 def get_all_metric(detailed: bool = False, database: Session = Depends(get_db)) -> list:
     from sqlalchemy.orm import joinedload
 
@@ -7520,6 +7767,8 @@ async def delete_project(project_id: int, database: Session = Depends(get_db)):
 
 
 @app.get("/model/", response_model=None, tags=["Model"])
+@query_cache.cached("model", "element", "dataset", "project", "evaluation", "evaluates_eval", "evaluation_element",
+                    "measure")
 def get_all_model(detailed: bool = False, database: Session = Depends(get_db)) -> list:
     from sqlalchemy.orm import joinedload
 
@@ -7622,6 +7871,7 @@ from typing import Dict, Any, List
 #     return [dict(row)]
 
 @app.get("/model_count_4_card/", tags=["Model"], response_model=List[Dict[str, Any]])
+@query_cache.cached("model", "element", "metric")
 def model_count_4_card(database: Session = Depends(get_db)) -> List[Dict[str, Any]]:
     row = database.execute(
         text("""
@@ -8672,6 +8922,237 @@ async def get_derivedBy_of_derived(derived_id: int, database: Session = Depends(
     }
 
 
+############################################
+#
+#   Measure aggregation
+#
+############################################
+
+@app.get("/measure/aggregate", response_model=None, tags=["Measure"])
+@query_cache.cached("measure", "observation", "element")
+def aggregate_measures(group_by: Optional[str] = "metric", aggregates: Optional[str] = "count,mean,min,max",
+                       metric: Optional[str] = None, measurand: Optional[str] = None,
+                       observation: Optional[str] = None, database: Session = Depends(get_db)) -> dict:
+    """Grouped measure statistics (count, mean, min, max, stddev, p50/p90/p99, weighted_mean) as a compact table"""
+    group_columns = measure_aggregate.parse_list(group_by, list(measure_aggregate.GROUP_COLUMNS), [], "group_by")
+    aggregate_names = measure_aggregate.parse_list(aggregates, measure_aggregate.AGGREGATES, ["count"], "aggregate")
+    filters = {
+        name: ids for name, ids in (
+            ("metric", measure_aggregate.parse_ids(metric, "metric")),
+            ("measurand", measure_aggregate.parse_ids(measurand, "measurand")),
+            ("observation", measure_aggregate.parse_ids(observation, "observation")),
+        ) if ids is not None
+    }
+    return measure_aggregate.aggregate(database, group_columns, aggregate_names, filters)
+
+
+############################################
+#
+#   Observation time series
+#
+############################################
+
+@app.get("/observation/timeseries", response_model=None, tags=["Observation"])
+@query_cache.cached("measure", "observation")
+def observation_timeseries(metric: int, measurand: Optional[int] = None, bucket: Optional[str] = None,
+                           agg: str = "mean", downsample: Optional[str] = None, points: int = 300,
+                           database: Session = Depends(get_db)) -> dict:
+    """A metric's values over Observation.whenObserved, optionally bucketed (1h|1d|1w) and downsampled"""
+    if agg not in timeseries.SERIES_AGGREGATES:
+        raise HTTPException(status_code=400, detail=f"agg must be one of {', '.join(timeseries.SERIES_AGGREGATES)}")
+    if downsample is not None and downsample not in timeseries.DOWNSAMPLERS:
+        raise HTTPException(status_code=400, detail=f"downsample must be one of {', '.join(timeseries.DOWNSAMPLERS)}")
+    t, values, counts = timeseries.load_series(database, metric, measurand, bucket, agg)
+    total = len(t)
+    if downsample:
+        keep = timeseries.downsample(t, values, downsample, points)
+        t, values, counts = t[keep], values[keep], counts[keep]
+    return {
+        "metric": metric,
+        "measurand": measurand,
+        "bucket": bucket,
+        "agg": agg if bucket else None,
+        "downsample": downsample,
+        "total_points": total,
+        "columns": ["t", "value", "count"],
+        "rows": timeseries.series_rows(t, values, counts),
+    }
+
+
+############################################
+#
+#   Project summary
+#
+############################################
+
+@app.get("/project/{project_id}/summary", response_model=None, tags=["Project"])
+def get_project_summary(project_id: int, database: Session = Depends(get_db)) -> dict:
+    """Evaluation, observation, model coverage and legal requirement rollup of a project"""
+    try:
+        return project_summaries.get(database, project_id)
+    except LookupError:
+        raise HTTPException(status_code=404, detail="Project not found")
+
+
+############################################
+#
+#   Metric coverage
+#
+############################################
+
+@app.get("/coverage", response_model=None, tags=["Model"])
+def get_coverage(project: Optional[int] = None, format: str = "sparse", database: Session = Depends(get_db)) -> dict:
+    """Model x metric presence matrix: missing pairs (sparse) or per-model packed bits (bitmap)"""
+    if format not in ("sparse", "bitmap"):
+        raise HTTPException(status_code=400, detail="format must be one of sparse, bitmap")
+    return coverage_index.matrix(database, project, format)
+
+
+@app.get("/coverage/stats", response_model=None, tags=["Model"])
+def get_coverage_stats() -> dict:
+    """Size and refresh counters of the in-memory coverage index"""
+    return coverage_index.info()
+
+
+############################################
+#
+#   Lineage
+#
+############################################
+
+@app.get("/lineage/{entity}/{entity_id}", response_model=None, tags=["System"])
+@query_cache.cached(*delta_sync.syncable_entities())
+def get_lineage(entity: str, entity_id: int, depth: int = 2, max_nodes: int = 5000,
+                database: Session = Depends(get_db)) -> dict:
+    """Deduplicated node/edge graph reachable from one row through the model's relationships"""
+    if not 0 <= depth <= lineage.MAX_DEPTH:
+        raise HTTPException(status_code=400, detail=f"depth must be between 0 and {lineage.MAX_DEPTH}")
+    try:
+        return lineage.walk(database, entity, entity_id, depth, max_nodes)
+    except KeyError:
+        raise HTTPException(status_code=404, detail=f"Unknown entity '{entity}'")
+    except LookupError as exc:
+        raise HTTPException(status_code=404, detail=str(exc))
+
+
+############################################
+#
+#   Model comparison
+#
+############################################
+
+@app.get("/compare", response_model=None, tags=["Model"])
+@query_cache.cached("measure", "metric", "model", "element")
+def compare_models(models: str, metrics: Optional[str] = None, database: Session = Depends(get_db)) -> dict:
+    """Metric x model matrix of values and uncertainties with pairwise model deltas"""
+    model_ids = list(dict.fromkeys(measure_aggregate.parse_ids(models, "models") or []))
+    if not model_ids:
+        raise HTTPException(status_code=400, detail="At least one model id is required")
+    try:
+        metric_ids = compare.resolve_metrics(database, metrics)
+        return compare.compare(database, model_ids, metric_ids)
+    except KeyError as exc:
+        raise HTTPException(status_code=400, detail=f"Unknown metric {exc.args[0]}")
+    except LookupError as exc:
+        raise HTTPException(status_code=404, detail=str(exc))
+
+
+############################################
+#
+#   Leaderboard
+#
+############################################
+
+@app.get("/leaderboard", response_model=None, tags=["Leaderboard"])
+def get_leaderboard(metrics: Optional[str] = None, aggregate: str = "mean", rank_by: Optional[str] = None,
+                    limit: Optional[int] = None, database: Session = Depends(get_db)) -> dict:
+    """Models ranked across metrics (comma separated ids or names), aggregating each model's measures.
+
+    The score is the mean of each metric's min-max normalised value, over
+    models measured on every selected metric; ``rank_by`` ranks by one
+    metric's raw value instead."""
+    if limit is not None and limit < 1:
+        raise HTTPException(status_code=400, detail="limit must be at least 1")
+    if aggregate not in AGGREGATES:
+        raise HTTPException(status_code=400, detail=f"aggregate must be one of {', '.join(AGGREGATES)}")
+    snapshot = measure_index.snapshot(database)
+    try:
+        metric_ids = snapshot.resolve_metrics(metrics)
+        rank_by_id = snapshot.resolve_metrics(rank_by)[0] if rank_by else None
+    except KeyError as exc:
+        raise HTTPException(status_code=400, detail=f"Unknown metric {exc.args[0]}")
+    rows = snapshot.leaderboard(metric_ids, aggregate, rank_by_id)
+    return {
+        "aggregate": aggregate,
+        "metrics": [{"id": metric_id, "name": snapshot.metrics[metric_id]} for metric_id in metric_ids],
+        "rows": rows[:limit] if limit is not None else rows,
+    }
+
+
+@app.get("/radar", response_model=None, tags=["Leaderboard"])
+def get_radar(models: Optional[str] = None, category: Optional[int] = None, scale: str = "metric",
+              database: Session = Depends(get_db)) -> dict:
+    """Per-model metric vectors pre-normalised to [0, 1] for the radar chart"""
+    if scale not in ("metric", "category"):
+        raise HTTPException(status_code=400, detail="scale must be one of metric, category")
+    model_ids = measure_aggregate.parse_ids(models, "models")
+    try:
+        return measure_index.snapshot(database).radar(model_ids, category, scale)
+    except LookupError as exc:
+        raise HTTPException(status_code=404, detail=str(exc))
+
+
+@app.get("/leaderboard/stats", response_model=None, tags=["Leaderboard"])
+def get_leaderboard_stats() -> dict:
+    """Size and refresh counters of the in-memory measure aggregate index"""
+    return measure_index.info()
+
+
+############################################
+#
+#   Derived evaluation
+#
+############################################
+
+def _derived_values(derived_id: int, values) -> dict:
+    return {
+        "derived_id": derived_id,
+        "count": len(values),
+        "values": [
+            {"measurand_id": int(measurand_id), "observation_id": int(observation_id), "value": float(value)}
+            for (measurand_id, observation_id), value in values.items()
+        ],
+    }
+
+
+@app.get("/derived/recompute/stats/", response_model=None, tags=["Derived"])
+def derived_recompute_stats() -> dict:
+    """Counters of the background worker keeping materialized derived measures up to date"""
+    init()
+    return dict(_derived_recomputer.stats)
+
+
+@app.get("/derived/{derived_id}/evaluate/", response_model=None, tags=["Derived"])
+def evaluate_derived(derived_id: int, database: Session = Depends(get_db)) -> dict:
+    """Evaluate the derived expression for every measurand/observation in one vectorised pass"""
+    try:
+        values = derived_engine.evaluate(database, derived_id)
+    except LookupError:
+        raise HTTPException(status_code=404, detail="Derived not found")
+    return _derived_values(derived_id, values)
+
+
+@app.post("/derived/{derived_id}/materialize/", response_model=None, tags=["Derived"])
+def materialize_derived(derived_id: int, unit: str = "", database: Session = Depends(get_db)) -> dict:
+    """Evaluate the derived expression and store the results as Measure rows of the derived metric"""
+    try:
+        values = derived_engine.evaluate(database, derived_id)
+    except LookupError:
+        raise HTTPException(status_code=404, detail="Derived not found")
+    counts = derived_engine.materialize(database, derived_id, values, unit=unit)
+    return {**_derived_values(derived_id, values), **counts}
+
+
 # PSA
 from fastapi.responses import FileResponse
 from pathlib import Path
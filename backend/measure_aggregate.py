@@ -0,0 +1,131 @@
+from typing import Dict, List, Optional, Sequence
+
+from sqlalchemy import case, func, select
+from sqlalchemy.orm import Session
+
+from sql_alchemy import Element, Measure, Observation
+
+
+############################################
+#
+#   Measure aggregation
+#
+############################################
+
+GROUP_COLUMNS = {
+    "metric": Measure.metric_id,
+    "measurand": Measure.measurand_id,
+    "observation": Measure.observation_id,
+    "tool": Observation.tool_id,
+    "dataset": Observation.dataset_id,
+    "project": Element.project_id,
+}
+
+PERCENTILES = {"p50": 0.5, "p90": 0.9, "p99": 0.99}
+
+
+def _sql_aggregates():
+    value, uncertainty = Measure.value, Measure.uncertainty
+    count = func.count(value)
+    inverse_variance = case((uncertainty > 0, 1.0 / (uncertainty * uncertainty)), else_=None)
+    # SQLite has no STDDEV, so the sample standard deviation is derived from
+    # the sum of squares and finished in pandas.
+    return {
+        "count": count,
+        "mean": func.avg(value),
+        "min": func.min(value),
+        "max": func.max(value),
+        "stddev": (func.sum(value * value) - func.sum(value) * func.sum(value) / count),
+        "weighted_mean": func.sum(value * inverse_variance) / func.sum(inverse_variance),
+    }
+
+
+AGGREGATES = tuple(_sql_aggregates()) + tuple(PERCENTILES)
+
+
+def parse_list(value: Optional[str], allowed: Sequence[str], default: Sequence[str], label: str) -> List[str]:
+    if not value:
+        return list(default)
+    items = [item.strip().lower() for item in value.split(",") if item.strip()]
+    unknown = [item for item in items if item not in allowed]
+    if unknown:
+        raise ValueError(f"Unknown {label} {', '.join(unknown)}; expected one of {', '.join(allowed)}")
+    return items
+
+
+def parse_ids(value: Optional[str], label: str) -> Optional[List[int]]:
+    if not value:
+        return None
+    try:
+        return [int(item) for item in value.split(",") if item.strip()]
+    except ValueError:
+        raise ValueError(f"{label} must be a comma separated list of ids")
+
+
+def _with_joins(query, group_by: Sequence[str]):
+    if {"tool", "dataset"} & set(group_by):
+        query = query.join(Observation, Observation.id == Measure.observation_id)
+    if "project" in group_by:
+        query = query.join(Element, Element.id == Measure.measurand_id)
+    return query
+
+
+def aggregate(session: Session, group_by: Sequence[str], aggregates: Sequence[str],
+              filters: Optional[Dict[str, List[int]]] = None) -> dict:
+    """Aggregate measure values per group as a compact ``columns`` + ``rows`` table.
+
+    count/mean/min/max/stddev and the uncertainty-weighted mean run as one
+    grouped SQL query; percentiles need the raw values, which are fetched
+    as two narrow columns and reduced with a vectorised pandas groupby.
+    """
+    import pandas as pd
+
+    keys = [GROUP_COLUMNS[name].label(name) for name in group_by]
+    sql_aggregates = _sql_aggregates()
+    # count is always fetched: stddev needs it and it anchors one row per group.
+    wanted_sql = ["count"] + [name for name in aggregates if name in sql_aggregates and name != "count"]
+    wanted_percentiles = [name for name in aggregates if name in PERCENTILES]
+
+    def filtered(query):
+        query = _with_joins(query, list(group_by) + list(filters or ()))
+        for name, ids in (filters or {}).items():
+            query = query.where(GROUP_COLUMNS[name].in_(ids))
+        return query
+
+    query = filtered(select(*keys, *(sql_aggregates[name].label(name) for name in wanted_sql)))
+    if keys:
+        query = query.group_by(*keys).order_by(*keys)
+    frame = pd.DataFrame(session.execute(query).all(), columns=list(group_by) + wanted_sql)
+    if keys:
+        frame = frame.set_index(list(group_by))
+
+    if "stddev" in wanted_sql:
+        frame["stddev"] = (frame["stddev"].clip(lower=0) / (frame["count"] - 1).where(frame["count"] > 1)) ** 0.5
+
+    if wanted_percentiles:
+        raw = pd.DataFrame(session.execute(filtered(select(*keys, Measure.value))).all(),
+                           columns=list(group_by) + ["value"])
+        quantiles = [PERCENTILES[name] for name in wanted_percentiles]
+        if keys and not raw.empty:
+            table = raw.groupby(list(group_by))["value"].quantile(quantiles).unstack()
+            names = {PERCENTILES[name]: name for name in wanted_percentiles}
+            table.columns = [names[quantile] for quantile in table.columns]
+            frame = frame.join(table)
+        elif keys:
+            for name in wanted_percentiles:
+                frame[name] = None
+        else:
+            values = raw["value"].quantile(quantiles).to_numpy() if len(raw) else [None] * len(quantiles)
+            for name, value in zip(wanted_percentiles, values):
+                frame[name] = value
+
+    frame = frame[list(aggregates)]
+    if keys:
+        frame = frame.reset_index()
+    frame = frame.astype(object).where(frame.notna(), None)
+    return {
+        "group_by": list(group_by),
+        "aggregates": list(aggregates),
+        "columns": list(frame.columns),
+        "rows": frame.values.tolist(),
+    }
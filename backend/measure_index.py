@@ -0,0 +1,311 @@
+import threading
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import aliased
+
+from batching import chunked
+from change_tracking import Change
+from sql_alchemy import Element, Measure, Metric, MetricCategory, metriccategory_metric
+
+AGGREGATES = ("mean", "max", "min", "last")
+
+# Writes to these tables may rename or retype measurands and metrics.
+NAME_TABLES = {"element", "model", "dataset", "feature", "metric", "direct", "derived",
+               "metriccategory", "metriccategory_metric"}
+
+
+############################################
+#
+#   In-memory (measurand, metric) aggregate index
+#
+############################################
+
+@dataclass
+class Cell:
+    """Aggregates of every measure of one metric on one measurand."""
+    count: int
+    total: float
+    minimum: float
+    maximum: float
+    last_id: int
+    last_value: float
+
+    def value(self, aggregate: str) -> float:
+        if aggregate == "mean":
+            return self.total / self.count
+        if aggregate == "max":
+            return self.maximum
+        if aggregate == "min":
+            return self.minimum
+        return self.last_value
+
+
+@dataclass
+class MetricStats:
+    """Spread of one metric's per-model values, used to normalise radar axes and leaderboard scores."""
+    count: int
+    minimum: float
+    maximum: float
+    mean: float
+
+    def normalise(self, value: float) -> float:
+        if self.maximum == self.minimum:
+            return 1.0
+        return (value - self.minimum) / (self.maximum - self.minimum)
+
+
+class MeasureIndex:
+    """Per (measurand, metric) aggregates computed with one grouped SQL query.
+
+    The index is built lazily on first use and afterwards kept current by
+    re-aggregating only the measurands touched by committed measure writes,
+    so dashboards comparing models across metrics read from memory.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._cells: Optional[Dict[Tuple[int, int], Cell]] = None
+        self._elements: Dict[int, Tuple[str, str, Optional[int]]] = {}
+        self._metrics: Dict[int, str] = {}
+        self._categories: Dict[int, Tuple[str, List[int]]] = {}
+        self._metric_stats: Dict[int, MetricStats] = {}
+        self._names_stale = True
+        self._dirty: Set[int] = set()
+        self._rebuild = True
+        self.stats = {"rebuilds": 0, "refreshes": 0, "refreshed_measurands": 0, "metric_stats_refreshes": 0}
+
+    # Change tracking hooks
+
+    def on_tables(self, tables: Set[str]):
+        if tables & NAME_TABLES:
+            self._names_stale = True
+
+    def on_changes(self, changes: List[Change]):
+        with self._lock:
+            for change in changes:
+                # Table-level statements on measure report the table, not the entity.
+                if "measure" not in change.tables:
+                    continue
+                measurand_ids = {change.row.get("measurand_id"), change.previous.get("measurand_id")} - {None}
+                if not measurand_ids:
+                    # Bulk statements only report ids; fall back to a rebuild.
+                    self._rebuild = True
+                self._dirty |= measurand_ids
+
+    def clear(self):
+        with self._lock:
+            self._rebuild = True
+            self._names_stale = True
+
+    # Loading
+
+    @staticmethod
+    def _aggregate_query(measurand_ids: Optional[Iterable[int]] = None):
+        grouped = select(
+            Measure.measurand_id, Measure.metric_id,
+            func.count(Measure.id).label("count"),
+            func.sum(Measure.value).label("total"),
+            func.min(Measure.value).label("minimum"),
+            func.max(Measure.value).label("maximum"),
+            func.max(Measure.id).label("last_id"),
+        ).group_by(Measure.measurand_id, Measure.metric_id)
+        if measurand_ids is not None:
+            grouped = grouped.where(Measure.measurand_id.in_(list(measurand_ids)))
+        grouped = grouped.subquery()
+        last = aliased(Measure)
+        return select(grouped, last.value).join(last, last.id == grouped.c.last_id)
+
+    @staticmethod
+    def _cells_from(rows) -> Dict[Tuple[int, int], Cell]:
+        return {
+            (measurand_id, metric_id): Cell(count, total, minimum, maximum, last_id, last_value)
+            for measurand_id, metric_id, count, total, minimum, maximum, last_id, last_value in rows
+            if count
+        }
+
+    def _sync(self, session):
+        touched: Optional[Set[int]] = set()
+        if self._names_stale:
+            self._names_stale = False
+            self._elements = {row.id: (row.name, row.type_spec, row.project_id) for row in session.execute(
+                select(Element.id, Element.name, Element.type_spec, Element.project_id))}
+            self._metrics = dict(session.execute(select(Metric.id, Metric.name)).all())
+            self._categories = {row.id: (row.name, []) for row in session.execute(
+                select(MetricCategory.id, MetricCategory.name))}
+            for metric_id, category_id in session.execute(
+                    select(metriccategory_metric.c.metrics, metriccategory_metric.c.category)):
+                if category_id in self._categories:
+                    self._categories[category_id][1].append(metric_id)
+            touched = None
+        if self._rebuild or self._cells is None:
+            self._rebuild = False
+            self._dirty = set()
+            self._cells = self._cells_from(session.execute(self._aggregate_query()))
+            self.stats["rebuilds"] += 1
+            touched = None
+        elif self._dirty:
+            dirty, self._dirty = sorted(self._dirty), set()
+            for chunk in chunked(dirty):
+                chunk_set = set(chunk)
+                for key in [key for key in self._cells if key[0] in chunk_set]:
+                    del self._cells[key]
+                    if touched is not None:
+                        touched.add(key[1])
+                fresh = self._cells_from(session.execute(self._aggregate_query(chunk)))
+                self._cells.update(fresh)
+                if touched is not None:
+                    touched.update(metric_id for _, metric_id in fresh)
+            self.stats["refreshes"] += 1
+            self.stats["refreshed_measurands"] += len(dirty)
+        if touched is None or touched:
+            self._refresh_metric_stats(touched)
+
+    def _refresh_metric_stats(self, metric_ids: Optional[Set[int]]):
+        """Recompute the spread of ``metric_ids`` (all metrics when ``None``) over models."""
+        values: Dict[int, List[float]] = {}
+        for (measurand_id, metric_id), cell in self._cells.items():
+            if (metric_ids is None or metric_id in metric_ids) \
+                    and self._elements.get(measurand_id, (None, None))[1] == "model":
+                values.setdefault(metric_id, []).append(cell.value("mean"))
+        if metric_ids is None:
+            self._metric_stats = {}
+        for metric_id in (metric_ids or ()):
+            self._metric_stats.pop(metric_id, None)
+        for metric_id, metric_values in values.items():
+            self._metric_stats[metric_id] = MetricStats(
+                len(metric_values), min(metric_values), max(metric_values), sum(metric_values) / len(metric_values))
+        self.stats["metric_stats_refreshes"] += 1
+
+    def snapshot(self, session) -> "IndexSnapshot":
+        with self._lock:
+            self._sync(session)
+            return IndexSnapshot(dict(self._cells), dict(self._elements), dict(self._metrics),
+                                 dict(self._categories), dict(self._metric_stats))
+
+    def info(self) -> dict:
+        with self._lock:
+            return {"cells": len(self._cells or ()), "dirty_measurands": len(self._dirty), **self.stats}
+
+
+@dataclass
+class IndexSnapshot:
+    cells: Dict[Tuple[int, int], Cell]
+    elements: Dict[int, Tuple[str, str, Optional[int]]]
+    metrics: Dict[int, str]
+    categories: Dict[int, Tuple[str, List[int]]]
+    metric_stats: Dict[int, MetricStats]
+
+    def resolve_metrics(self, metrics: Optional[str]) -> List[int]:
+        """Metric ids from a comma separated list of ids or names (all metrics when empty)."""
+        if not metrics:
+            return sorted(self.metrics)
+        by_name = {name.lower(): metric_id for metric_id, name in self.metrics.items()}
+        resolved = []
+        for token in (part.strip() for part in metrics.split(",")):
+            if not token:
+                continue
+            metric_id = int(token) if token.isdigit() else by_name.get(token.lower())
+            if metric_id not in self.metrics:
+                raise KeyError(token)
+            resolved.append(metric_id)
+        return resolved
+
+    def leaderboard(self, metric_ids: List[int], aggregate: str = "mean", rank_by: Optional[int] = None,
+                    element_type: str = "model") -> List[dict]:
+        """Rank measurands of ``element_type`` over the selected metrics.
+
+        With ``rank_by`` the score is that metric's raw aggregate, and models
+        without it are left out. Otherwise each metric's aggregates are min-max
+        normalised to [0, 1] across the models, so metrics on different scales
+        weigh equally, and the score is the mean of a model's normalised
+        values. Only models measured on every selected metric are ranked, so
+        all scores average the same metrics.
+        """
+        selected = set(metric_ids)
+        rows: Dict[int, Dict[int, float]] = {}
+        for (measurand_id, metric_id), cell in self.cells.items():
+            if metric_id in selected and self.elements.get(measurand_id, (None, None))[1] == element_type:
+                rows.setdefault(measurand_id, {})[metric_id] = cell.value(aggregate)
+
+        if rank_by is None:
+            rows = {measurand_id: values for measurand_id, values in rows.items() if len(values) == len(selected)}
+            scalers = {}
+            for metric_id in selected:
+                column = [values[metric_id] for values in rows.values()]
+                if column:
+                    scalers[metric_id] = MetricStats(len(column), min(column), max(column),
+                                                     sum(column) / len(column))
+
+        ranked = []
+        for measurand_id, values in rows.items():
+            if rank_by is not None:
+                score = values.get(rank_by)
+            else:
+                score = sum(scalers[metric_id].normalise(value) for metric_id, value in values.items()) / len(values)
+            if score is None:
+                continue
+            ranked.append({
+                "model_id": measurand_id,
+                "model": self.elements[measurand_id][0],
+                "score": score,
+                "values": {self.metrics[metric_id]: values[metric_id] for metric_id in metric_ids
+                           if metric_id in values},
+            })
+        ranked.sort(key=lambda row: (-row["score"], row["model"]))
+        for rank, row in enumerate(ranked, start=1):
+            row["rank"] = rank
+        return ranked
+
+    def radar(self, model_ids: Optional[List[int]] = None, category_id: Optional[int] = None,
+              scale: str = "metric") -> dict:
+        """Per-model vectors of mean values normalised to [0, 1] on each axis.
+
+        With ``scale="metric"`` each axis is scaled by its own min/max across
+        models; ``scale="category"`` pools the min/max of all axes so metrics
+        of one category share a scale.
+        """
+        if category_id is not None:
+            if category_id not in self.categories:
+                raise LookupError(f"MetricCategory {category_id} not found")
+            axes = sorted(metric_id for metric_id in self.categories[category_id][1] if metric_id in self.metric_stats)
+        else:
+            axes = sorted(self.metric_stats)
+        if model_ids is None:
+            model_ids = sorted({measurand_id for measurand_id, metric_id in self.cells
+                                if metric_id in self.metric_stats and self.elements.get(measurand_id, ("", ""))[1] == "model"})
+
+        stats = {metric_id: self.metric_stats[metric_id] for metric_id in axes}
+        if scale == "category" and stats:
+            pooled = MetricStats(
+                sum(item.count for item in stats.values()),
+                min(item.minimum for item in stats.values()),
+                max(item.maximum for item in stats.values()),
+                sum(item.mean * item.count for item in stats.values()) / sum(item.count for item in stats.values()),
+            )
+            scalers = {metric_id: pooled for metric_id in axes}
+        else:
+            scalers = stats
+
+        series = []
+        for model_id in model_ids:
+            raw = [self.cells[(model_id, metric_id)].value("mean") if (model_id, metric_id) in self.cells else None
+                   for metric_id in axes]
+            series.append({
+                "model_id": model_id,
+                "model": self.elements.get(model_id, (None,))[0],
+                "values": [scalers[metric_id].normalise(value) if value is not None else None
+                           for metric_id, value in zip(axes, raw)],
+                "raw": raw,
+            })
+        return {
+            "category": {"id": category_id, "name": self.categories[category_id][0]} if category_id is not None else None,
+            "scale": scale,
+            "axes": [{"id": metric_id, "name": self.metrics.get(metric_id), "min": scalers[metric_id].minimum,
+                      "max": scalers[metric_id].maximum, "mean": scalers[metric_id].mean} for metric_id in axes],
+            "series": series,
+        }
+
+
+measure_index = MeasureIndex()
@@ -0,0 +1,128 @@
+import base64
+import threading
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+import numpy as np
+from sqlalchemy import exists, select, true
+from sqlalchemy.orm import Session
+
+from batching import chunked
+from change_tracking import Change
+from sql_alchemy import Measure, Metric, Model
+
+# New or removed models and metrics change the shape of the matrix.
+SHAPE_TABLES = {"element", "model", "metric", "direct", "derived"}
+
+
+############################################
+#
+#   Model x metric coverage
+#
+############################################
+
+def missing_pairs(session: Session, model_ids: Optional[Iterable[int]] = None) -> Set[Tuple[int, int]]:
+    """(model, metric) pairs without any Measure, found with a single anti-join."""
+    query = select(Model.id, Metric.id).join(Metric, true()).where(
+        ~exists().where(Measure.measurand_id == Model.id, Measure.metric_id == Metric.id))
+    if model_ids is not None:
+        query = query.where(Model.id.in_(list(model_ids)))
+    return set(session.execute(query).all())
+
+
+class CoverageIndex:
+    """Missing (model, metric) pairs kept in memory.
+
+    Built once with the anti-join, then refreshed by re-running it only for
+    the models whose measures were written, so schedulers can poll for gaps
+    without scanning the measure table.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._models: Dict[int, Tuple[str, Optional[int]]] = {}
+        self._metrics: Dict[int, str] = {}
+        self._missing: Set[Tuple[int, int]] = set()
+        self._dirty: Set[int] = set()
+        self._rebuild = True
+        self.stats = {"rebuilds": 0, "refreshes": 0, "refreshed_models": 0}
+
+    def on_tables(self, tables: Set[str]):
+        if tables & SHAPE_TABLES:
+            self._rebuild = True
+
+    def on_changes(self, changes: List[Change]):
+        with self._lock:
+            for change in changes:
+                # Table-level statements on measure report the table, not the entity.
+                if "measure" not in change.tables:
+                    continue
+                measurand_ids = {change.row.get("measurand_id"), change.previous.get("measurand_id")} - {None}
+                if not measurand_ids:
+                    self._rebuild = True
+                self._dirty |= measurand_ids
+
+    def clear(self):
+        self._rebuild = True
+
+    def _sync(self, session: Session):
+        if self._rebuild:
+            self._rebuild = False
+            self._dirty = set()
+            self._models = {row.id: (row.name, row.project_id) for row in session.execute(
+                select(Model.id, Model.name, Model.project_id))}
+            self._metrics = dict(session.execute(select(Metric.id, Metric.name)).all())
+            self._missing = missing_pairs(session)
+            self.stats["rebuilds"] += 1
+        elif self._dirty:
+            dirty = sorted(model_id for model_id in self._dirty if model_id in self._models)
+            self._dirty = set()
+            for chunk in chunked(dirty):
+                chunk_set = set(chunk)
+                self._missing = {pair for pair in self._missing if pair[0] not in chunk_set}
+                self._missing |= missing_pairs(session, chunk)
+            self.stats["refreshes"] += 1
+            self.stats["refreshed_models"] += len(dirty)
+
+    def matrix(self, session: Session, project_id: Optional[int] = None, fmt: str = "sparse") -> dict:
+        """Coverage of the models (optionally of one project) over every metric.
+
+        ``fmt="sparse"`` lists the missing ``[model_id, metric_id]`` pairs;
+        ``fmt="bitmap"`` encodes each model's row as base64 packed bits, bit
+        ``j`` (most significant first) set when metric ``j`` has a measure.
+        """
+        with self._lock:
+            self._sync(session)
+            models = sorted(model_id for model_id, (_, project) in self._models.items()
+                            if project_id is None or project == project_id)
+            metrics = sorted(self._metrics)
+            missing = sorted(pair for pair in self._missing if project_id is None or
+                             self._models.get(pair[0], (None, None))[1] == project_id)
+            names = dict(self._models), dict(self._metrics)
+
+        result = {
+            "project": project_id,
+            "format": fmt,
+            "models": [{"id": model_id, "name": names[0][model_id][0]} for model_id in models],
+            "metrics": [{"id": metric_id, "name": names[1][metric_id]} for metric_id in metrics],
+            "cells": len(models) * len(metrics),
+            "missing_count": len(missing),
+        }
+        if fmt == "bitmap":
+            present = np.ones((len(models), len(metrics)), dtype=bool)
+            row_of = {model_id: row for row, model_id in enumerate(models)}
+            column_of = {metric_id: column for column, metric_id in enumerate(metrics)}
+            for model_id, metric_id in missing:
+                if metric_id in column_of:
+                    present[row_of[model_id], column_of[metric_id]] = False
+            result["bitmap"] = [base64.b64encode(np.packbits(row).tobytes()).decode("ascii") for row in present]
+        else:
+            result["missing"] = [list(pair) for pair in missing]
+        return result
+
+    def info(self) -> dict:
+        with self._lock:
+            return {"models": len(self._models), "metrics": len(self._metrics), "missing": len(self._missing),
+                    **self.stats}
+
+
+coverage_index = CoverageIndex()
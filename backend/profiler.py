@@ -0,0 +1,246 @@
+import collections
+import contextvars
+import hmac
+import itertools
+import os
+import random
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Set, Tuple
+from urllib.parse import parse_qs
+
+from sqlalchemy import event
+
+# Requests carrying this token in X-Profile-Token or ?profile= are profiled; unset disables both triggers.
+PROFILE_ADMIN_TOKEN = os.getenv("PROFILE_ADMIN_TOKEN", "")
+# Fraction of all requests profiled without a token.
+PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", "0"))
+PROFILE_INTERVAL_MS = float(os.getenv("PROFILE_INTERVAL_MS", "5"))
+# Number of recent profiles kept.
+PROFILE_STORE = int(os.getenv("PROFILE_STORE", "20"))
+
+# First match walking from the innermost frame outwards decides a sample's category.
+CATEGORIES = (
+    ("immudb", ("immudb/", "grpc/")),
+    ("sqlalchemy", ("sqlalchemy/", "sqlite3/", "psycopg")),
+    ("serialization", ("json/", "pydantic/", "pydantic_core/", "fastapi/encoders.py",
+                       "starlette/responses.py", "compression.py", "gzip.py")),
+)
+_IDLE_FILES = ("selectors.py", "threading.py", "queue.py")
+
+
+############################################
+#
+#   Sampling profiler
+#
+############################################
+
+def _frame_name(code) -> str:
+    filename = code.co_filename.replace("\\", "/")
+    marker = "site-packages/"
+    if marker in filename:
+        filename = filename.split(marker, 1)[1]
+    elif "/lib/python" in filename:
+        filename = filename.rsplit("/lib/python", 1)[1].split("/", 1)[-1]
+    else:
+        filename = filename.rsplit("/", 1)[-1]
+    return f"{filename}:{code.co_name}"
+
+
+def classify(stack: List[str]) -> str:
+    """Category of a sample given its frames, outermost first."""
+    for frame in reversed(stack):
+        for category, markers in CATEGORIES:
+            if any(marker in frame for marker in markers):
+                return category
+    return "other"
+
+
+class Profile:
+    """Stack samples of the threads serving one request."""
+
+    _ids = itertools.count(1)
+
+    def __init__(self, scope, interval: float, reason: str):
+        self.id = next(self._ids)
+        self.scope = scope
+        self.interval = interval
+        self.reason = reason
+        self.started = time.perf_counter()
+        self.at = datetime.now(timezone.utc).isoformat()
+        self.duration = 0.0
+        self.status: Optional[int] = None
+        self.threads: Set[int] = {threading.get_ident()}
+        self.stacks: Dict[str, int] = collections.Counter()
+        self._lock = threading.Lock()
+        self._done = threading.Event()
+        self._sampler = threading.Thread(target=self._run, name=f"profiler-{self.id}", daemon=True)
+
+    def join(self):
+        """Add the calling thread (e.g. a threadpool worker running the handler) to the sampled set."""
+        self.threads.add(threading.get_ident())
+
+    def start(self):
+        self._sampler.start()
+
+    def stop(self, status: Optional[int]):
+        """Signal the sampler to stop without waiting for its thread, so the event loop
+        never blocks; no sample is added after this returns."""
+        with self._lock:
+            self.status = status
+            self.duration = time.perf_counter() - self.started
+            self._done.set()
+
+    def _run(self):
+        while not self._done.wait(self.interval):
+            frames = sys._current_frames()
+            samples = []
+            for thread_id in list(self.threads):
+                frame = frames.get(thread_id)
+                if frame is None or frame.f_code.co_filename.endswith(_IDLE_FILES):
+                    continue
+                stack = []
+                while frame is not None:
+                    stack.append(_frame_name(frame.f_code))
+                    frame = frame.f_back
+                samples.append(";".join(reversed(stack)))
+            del frames
+            with self._lock:
+                if self._done.is_set():
+                    break
+                for stack in samples:
+                    self.stacks[stack] += 1
+
+    def stack_counts(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self.stacks)
+
+    @property
+    def route(self) -> str:
+        return getattr(self.scope.get("route"), "path", None) or self.scope.get("path", "")
+
+    def collapsed(self) -> str:
+        """Folded stacks (``frame;frame;frame count``) as read by flamegraph.pl and speedscope."""
+        return "".join(f"{stack} {count}\n" for stack, count in sorted(self.stack_counts().items()))
+
+    def summary(self) -> dict:
+        samples: Dict[str, int] = collections.Counter()
+        for stack, count in self.stack_counts().items():
+            samples[classify(stack.split(";"))] += count
+        return {
+            "id": self.id,
+            "at": self.at,
+            "method": self.scope.get("method"),
+            "route": self.route,
+            "status": self.status,
+            "reason": self.reason,
+            "duration_ms": round(self.duration * 1000, 3),
+            "interval_ms": self.interval * 1000,
+            "samples": sum(samples.values()),
+            "seconds": {category: round(samples.get(category, 0) * self.interval, 6)
+                        for category in [name for name, _ in CATEGORIES] + ["other"]},
+        }
+
+
+class Profiler:
+    def __init__(self, admin_token: str = PROFILE_ADMIN_TOKEN, sample_rate: float = PROFILE_SAMPLE_RATE,
+                 interval_ms: float = PROFILE_INTERVAL_MS, capacity: int = PROFILE_STORE):
+        self.admin_token = admin_token
+        self.sample_rate = sample_rate
+        self.interval_ms = interval_ms
+        self._lock = threading.Lock()
+        self._profiles: collections.OrderedDict = collections.OrderedDict()
+        self._capacity = capacity
+        self._current: contextvars.ContextVar[Optional[Profile]] = contextvars.ContextVar("profile", default=None)
+
+    def is_admin(self, token: Optional[str]) -> bool:
+        return bool(self.admin_token) and token is not None and hmac.compare_digest(token, self.admin_token)
+
+    def reason(self, scope) -> Optional[str]:
+        """Why the request in ``scope`` is profiled (``header``, ``query``, ``sampled``), or None."""
+        headers = dict(scope.get("headers", ()))
+        token = headers.get(b"x-profile-token")
+        if token is not None and self.is_admin(token.decode("latin-1")):
+            return "header"
+        query = parse_qs(scope.get("query_string", b"").decode("latin-1")).get("profile")
+        if query and self.is_admin(query[0]):
+            return "query"
+        if self.sample_rate and random.random() < self.sample_rate:
+            return "sampled"
+        return None
+
+    def current(self) -> Optional[Profile]:
+        """Profile of the request being served, if it is profiled."""
+        return self._current.get()
+
+    def join(self):
+        profile = self._current.get()
+        if profile is not None:
+            profile.join()
+
+    def start(self, scope, reason: str) -> Tuple[Profile, contextvars.Token]:
+        profile = Profile(scope, self.interval_ms / 1000, reason)
+        token = self._current.set(profile)
+        profile.start()
+        return profile, token
+
+    def finish(self, profile: Profile, token: contextvars.Token, status: Optional[int]):
+        profile.stop(status)
+        self._current.reset(token)
+        self._store(profile)
+
+    def instrument_engine(self, engine):
+        # Handlers run in threadpool workers; each joins the profile on its first statement.
+        event.listen(engine, "before_cursor_execute", lambda *args: self.join())
+        return engine
+
+    def _store(self, profile: Profile):
+        with self._lock:
+            self._profiles[profile.id] = profile
+            while len(self._profiles) > self._capacity:
+                self._profiles.popitem(last=False)
+
+    def get(self, profile_id: int) -> Optional[Profile]:
+        with self._lock:
+            return self._profiles.get(profile_id)
+
+    def recent(self) -> List[dict]:
+        with self._lock:
+            profiles = list(self._profiles.values())
+        return [profile.summary() for profile in reversed(profiles)]
+
+
+profiler = Profiler()
+
+
+class ProfilingMiddleware:
+    """Pure ASGI middleware sampling the stacks of requests selected by ``profiler``.
+
+    The id of the stored profile is returned in the ``X-Profile-Id`` header.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        reason = profiler.reason(scope) if scope["type"] == "http" else None
+        if reason is None:
+            await self.app(scope, receive, send)
+            return
+
+        profile, token = profiler.start(scope, reason)
+        status = {"code": None}
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+                message = {**message, "headers": list(message.get("headers", ())) +
+                           [(b"x-profile-id", str(profile.id).encode())]}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            profiler.finish(profile, token, status["code"])
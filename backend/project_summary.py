@@ -0,0 +1,177 @@
+import threading
+from collections import defaultdict
+from typing import Dict, List, Optional, Set, Tuple
+
+from sqlalchemy import String, cast, distinct, func, select
+from sqlalchemy.orm import Session, aliased
+
+from change_tracking import Change
+from sql_alchemy import Element, Evaluation, LegalRequirement, Measure, Metric, Model, Observation, Project, Tool
+
+
+############################################
+#
+#   Project summary rollup
+#
+############################################
+
+SUBTREE_TABLES = {"evaluation", "legalrequirement", "element", "observation", "measure", "tool"}
+# Any write to these tables may change some project's summary.
+SUMMARY_TABLES = SUBTREE_TABLES | {"project", "metric"}
+
+
+def build_summary(session: Session, project_id: int) -> Tuple[dict, Dict[str, Set[int]]]:
+    """Roll up a project's evaluations, observations, model coverage and legal requirements.
+
+    Runs a fixed number of queries whatever the size of the project, and
+    returns the ids the summary depends on so it can be invalidated precisely.
+    """
+    # Statuses are read as plain strings: stored values such as "Done" are not
+    # all members of ProjectStatus and would fail enum coercion.
+    project = session.execute(select(Project.id, Project.name, cast(Project.status, String))
+                              .where(Project.id == project_id)).first()
+    if project is None:
+        raise LookupError(f"Project {project_id} not found")
+
+    evaluations = session.execute(select(Evaluation.id, cast(Evaluation.status, String))
+                                  .where(Evaluation.project_id == project_id)).all()
+    by_status: Dict[str, int] = defaultdict(int)
+    for _, status in evaluations:
+        by_status[status] += 1
+    evaluation_ids = {evaluation_id for evaluation_id, _ in evaluations}
+
+    dataset = aliased(Element)
+    observations = session.execute(
+        select(Observation.tool_id, Tool.name, Observation.dataset_id, dataset.name,
+               func.count(Observation.id), func.max(Observation.whenObserved))
+        .join(Evaluation, Evaluation.id == Observation.eval_id)
+        .outerjoin(Tool, Tool.id == Observation.tool_id)
+        .outerjoin(dataset, dataset.id == Observation.dataset_id)
+        .where(Evaluation.project_id == project_id)
+        .group_by(Observation.tool_id, Tool.name, Observation.dataset_id, dataset.name)
+    ).all()
+    by_tool: Dict[int, dict] = {}
+    by_dataset: Dict[int, dict] = {}
+    latest = None
+    for tool_id, tool_name, dataset_id, dataset_name, count, when in observations:
+        by_tool.setdefault(tool_id, {"tool_id": tool_id, "name": tool_name, "count": 0})["count"] += count
+        by_dataset.setdefault(dataset_id, {"dataset_id": dataset_id, "name": dataset_name, "count": 0})["count"] += count
+        if when is not None and (latest is None or when > latest):
+            latest = when
+
+    metric_total = select(func.count(Metric.id)).scalar_subquery()
+    coverage = session.execute(
+        select(Model.id, Model.name, func.count(distinct(Measure.metric_id)), metric_total)
+        .outerjoin(Measure, Measure.measurand_id == Model.id)
+        .where(Model.project_id == project_id)
+        .group_by(Model.id, Model.name)
+        .order_by(Model.id)
+    ).all()
+
+    legal_requirements = session.execute(
+        select(func.count(LegalRequirement.id)).where(LegalRequirement.project_1_id == project_id)).scalar()
+
+    summary = {
+        "project": {"id": project.id, "name": project.name, "status": project[2]},
+        "evaluations": {"total": len(evaluations), "by_status": dict(by_status)},
+        "observations": {
+            "total": sum(item["count"] for item in by_tool.values()),
+            "by_tool": sorted(by_tool.values(), key=lambda item: item["tool_id"]),
+            "by_dataset": sorted(by_dataset.values(), key=lambda item: item["dataset_id"]),
+            "latest": latest,
+        },
+        "coverage": [
+            {"model_id": model_id, "model": name, "metrics_measured": measured, "metrics_total": total,
+             "ratio": measured / total if total else 0.0}
+            for model_id, name, measured, total in coverage
+        ],
+        "legal_requirements": legal_requirements,
+    }
+    dependencies = {
+        "evaluation": evaluation_ids,
+        "element": {model_id for model_id, *_ in coverage} | set(by_dataset),
+        "tool": set(by_tool),
+    }
+    return summary, dependencies
+
+
+class ProjectSummaryCache:
+    """Summaries cached per project, dropped only when a write touches that project's subtree.
+
+    Rows carrying a foreign key to the project (evaluations, elements, legal
+    requirements) are matched on it; deeper rows (observations, measures) are
+    matched against the ids the cached summary was built from.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries: Dict[int, Tuple[dict, Dict[str, Set[int]]]] = {}
+        # Bumped on every invalidation so a summary built from data read
+        # before a concurrent commit is not stored.
+        self._generation = 0
+        self.stats = {"hits": 0, "misses": 0, "invalidations": 0}
+
+    def get(self, session: Session, project_id: int) -> dict:
+        with self._lock:
+            entry = self._entries.get(project_id)
+            generation = self._generation
+        if entry is not None:
+            self.stats["hits"] += 1
+            return entry[0]
+        self.stats["misses"] += 1
+        summary, dependencies = build_summary(session, project_id)
+        with self._lock:
+            if generation == self._generation:
+                self._entries[project_id] = (summary, dependencies)
+        return summary
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._generation += 1
+
+    @staticmethod
+    def _values(change: Change, key: str) -> Set[Optional[int]]:
+        return {change.row.get(key), change.previous.get(key)} - {None}
+
+    def _affected(self, change: Change, project_id: int, dependencies: Dict[str, Set[int]]) -> bool:
+        tables = set(change.tables)
+        if "project" in tables:
+            return change.id == project_id or change.id is None
+        if "metric" in tables:
+            return True  # metrics_total of every coverage row
+        if not tables & SUBTREE_TABLES:
+            return False
+        if not change.row:
+            return True  # bulk statement: nothing to match on
+        if "evaluation" in tables:
+            return project_id in self._values(change, "project_id") or change.id in dependencies["evaluation"]
+        if "legalrequirement" in tables:
+            return project_id in self._values(change, "project_1_id")
+        if "element" in tables:
+            return project_id in self._values(change, "project_id") or change.id in dependencies["element"]
+        if "observation" in tables:
+            return bool(self._values(change, "eval_id") & dependencies["evaluation"])
+        if "measure" in tables:
+            return bool(self._values(change, "measurand_id") & dependencies["element"])
+        if "tool" in tables:
+            return change.id in dependencies["tool"]
+        return False
+
+    def on_changes(self, changes: List[Change]):
+        with self._lock:
+            stale = {
+                project_id for project_id, (_, dependencies) in self._entries.items()
+                if any(self._affected(change, project_id, dependencies) for change in changes)
+            }
+            for project_id in stale:
+                del self._entries[project_id]
+            # Bumped for every relevant write, not only when a cached entry went
+            # stale, so a summary of an uncached project being built concurrently
+            # is not stored either.
+            if any(SUMMARY_TABLES.intersection(change.tables) for change in changes):
+                self._generation += 1
+            self.stats["invalidations"] += len(stale)
+
+
+project_summaries = ProjectSummaryCache()
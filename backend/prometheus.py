@@ -0,0 +1,227 @@
+import contextlib
+import threading
+import time
+from typing import Dict, Iterator, List, Sequence, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.pool import QueuePool
+
+import request_context
+
+
+############################################
+#
+#   Prometheus metrics
+#
+############################################
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+COUNT_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000)
+
+LabelValues = Tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Sequence[str], values: LabelValues, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value: float) -> str:
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1.0, *labels: str):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def value(self, *labels: str) -> float:
+        return self._values.get(labels, 0.0)
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return self.header() + [f"{self.name}{_labels(self.labelnames, labels)} {_number(value)}"
+                                for labels, value in items]
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def dec(self, amount: float = 1.0, *labels: str):
+        self.inc(-amount, *labels)
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._series: Dict[LabelValues, List[float]] = {}
+
+    def observe(self, value: float, *labels: str):
+        with self._lock:
+            # Per-bucket (non-cumulative) counts, then sum and count.
+            series = self._series.setdefault(labels, [0.0] * (len(self.buckets) + 2))
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[index] += 1
+                    break
+            series[-2] += value
+            series[-1] += 1
+
+    def count(self, *labels: str) -> int:
+        series = self._series.get(labels)
+        return int(series[-1]) if series else 0
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = sorted((labels, list(series)) for labels, series in self._series.items())
+        lines = self.header()
+        for labels, series in items:
+            cumulative = 0.0
+            for bound, count in zip(self.buckets, series):
+                cumulative += count
+                bucket_labels = _labels(self.labelnames, labels, 'le="%s"' % bound)
+                lines.append(f"{self.name}_bucket{bucket_labels} {_number(cumulative)}")
+            inf_labels = _labels(self.labelnames, labels, 'le="+Inf"')
+            lines.append(f"{self.name}_bucket{inf_labels} {_number(series[-1])}")
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, labels)} {_number(series[-2])}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, labels)} {_number(series[-1])}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: List[_Metric] = []
+
+    def register(self, metric: _Metric) -> _Metric:
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        return "\n".join(line for metric in self._metrics for line in metric.render()) + "\n"
+
+
+registry = Registry()
+
+http_request_duration = registry.register(Histogram(
+    "http_request_duration_seconds", "HTTP request latency by route template, method and status.",
+    ("method", "route", "status")))
+http_requests_in_flight = registry.register(Gauge(
+    "http_requests_in_flight", "HTTP requests currently being served.", ("method",)))
+db_statements = registry.register(Counter(
+    "db_statements_total", "SQL statements executed, by originating route.", ("route",)))
+db_statement_seconds = registry.register(Counter(
+    "db_statement_seconds_total", "Time spent executing SQL statements, by originating route.", ("route",)))
+db_statements_per_request = registry.register(Histogram(
+    "db_statements_per_request", "SQL statements executed per HTTP request.", ("route",), COUNT_BUCKETS))
+db_seconds_per_request = registry.register(Histogram(
+    "db_seconds_per_request", "Time spent in SQL per HTTP request.", ("route",)))
+db_pool_checkout_wait = registry.register(Histogram(
+    "db_pool_checkout_wait_seconds", "Time waited to check a connection out of the pool."))
+db_pool_checkouts = registry.register(Counter(
+    "db_pool_checkouts_total", "Connections checked out of the pool."))
+db_pool_connections_opened = registry.register(Counter(
+    "db_pool_connections_opened_total", "DBAPI connections opened by the pool."))
+db_pool_checked_out = registry.register(Gauge(
+    "db_pool_checked_out_connections", "Connections currently checked out of the pool."))
+immudb_call_duration = registry.register(Histogram(
+    "immudb_call_duration_seconds", "Latency of immudb calls by operation.", ("operation",)))
+immudb_call_failures = registry.register(Counter(
+    "immudb_call_failures_total", "Failed immudb calls by operation.", ("operation",)))
+
+
+############################################
+#
+#   Instrumentation hooks
+#
+############################################
+
+def _statement_executed(conn, statement, parameters, executemany, elapsed):
+    stats = request_context.current()
+    route = stats.route if stats is not None else "<background>"
+    db_statements.inc(1, route)
+    db_statement_seconds.inc(elapsed, route)
+    if stats is not None:
+        stats.statements += 1
+        stats.db_seconds += elapsed
+
+
+class TimedQueuePool(QueuePool):
+    """QueuePool observing how long each checkout waited for a connection
+    (including opening a new one), so a saturated pool shows in /metrics."""
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            db_pool_checkout_wait.observe(time.perf_counter() - started)
+
+
+def _pool_checkout(*args):
+    db_pool_checkouts.inc(1)
+    db_pool_checked_out.inc(1)
+
+
+def instrument_engine(engine):
+    """Count and time every statement of ``engine`` and track its pool."""
+    request_context.on_statement(engine, _statement_executed)
+    event.listen(engine.pool, "connect", lambda *args: db_pool_connections_opened.inc(1))
+    event.listen(engine.pool, "checkout", _pool_checkout)
+    event.listen(engine.pool, "checkin", lambda *args: db_pool_checked_out.dec(1))
+    return engine
+
+
+@contextlib.contextmanager
+def immudb_call(operation: str) -> Iterator[None]:
+    """Time an immudb call and count it as failed if it raises."""
+    started = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        immudb_call_failures.inc(1, operation)
+        raise
+    finally:
+        immudb_call_duration.observe(time.perf_counter() - started, operation)
+
+
+def request_started(stats: request_context.RequestStats):
+    http_requests_in_flight.inc(1, stats.method)
+
+
+def request_finished(stats: request_context.RequestStats, status: int, seconds: float):
+    """Observe a finished request; hooked into ``request_context.RequestMiddleware``."""
+    http_requests_in_flight.dec(1, stats.method)
+    route = stats.route
+    http_request_duration.observe(seconds, stats.method, route, str(status))
+    db_statements_per_request.observe(stats.statements, route)
+    db_seconds_per_request.observe(stats.db_seconds, route)
@@ -0,0 +1,152 @@
+import contextlib
+import logging
+import os
+import re
+import threading
+import time
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import request_context
+from request_context import RequestStats
+
+logger = logging.getLogger("query_budget")
+
+# A statement fingerprint executed at least this many times in one request is reported as N+1.
+N_PLUS_ONE_THRESHOLD = int(os.getenv("N_PLUS_ONE_THRESHOLD", "5"))
+# Log suspected N+1 patterns (off by default: list endpoints repeat statements by design),
+# at most once per route and fingerprint every N_PLUS_ONE_LOG_INTERVAL seconds.
+N_PLUS_ONE_LOG = os.getenv("N_PLUS_ONE_LOG", "0") == "1"
+N_PLUS_ONE_LOG_INTERVAL = float(os.getenv("N_PLUS_ONE_LOG_INTERVAL", "300"))
+# Requests running more statements than this are logged; 0 disables the check.
+QUERY_BUDGET = int(os.getenv("QUERY_BUDGET", "0"))
+# Add X-Query-Count / X-DB-Time-Ms to every response, not only to requests sending X-Query-Stats: 1.
+QUERY_STATS_HEADER = os.getenv("QUERY_STATS_HEADER", "0") == "1"
+
+
+############################################
+#
+#   Statement fingerprints
+#
+############################################
+
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r"(?<![\w.])-?\d+(?:\.\d+)?(?![\w.])")
+_NAMED_PARAMETER = re.compile(r"(?:%\(\w+\)s|:\w+|\$\d+|@\w+)")
+_PLACEHOLDER_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def fingerprint(statement: str) -> str:
+    """``statement`` with literals and parameters replaced by ``?`` and ``IN`` lists
+    collapsed, so executions differing only in their parameters compare equal."""
+    normalised = _STRING_LITERAL.sub("?", statement)
+    normalised = _NAMED_PARAMETER.sub("?", normalised)
+    normalised = _NUMBER_LITERAL.sub("?", normalised)
+    normalised = _PLACEHOLDER_LIST.sub("(?)", normalised)
+    return _WHITESPACE.sub(" ", normalised).strip()
+
+
+def repeated(stats: RequestStats, threshold: int = N_PLUS_ONE_THRESHOLD) -> List[dict]:
+    """Fingerprints of ``stats`` executed at least ``threshold`` times, most frequent first."""
+    return [
+        {"fingerprint": statement, "count": count}
+        for statement, count in sorted(stats.fingerprints.items(), key=lambda item: -item[1])
+        if count >= threshold
+    ]
+
+
+def _statement_executed(conn, statement, parameters, executemany, elapsed):
+    stats = request_context.current()
+    if stats is not None:
+        key = fingerprint(statement)
+        stats.fingerprints[key] = stats.fingerprints.get(key, 0) + 1
+
+
+def instrument_engine(engine):
+    """Fingerprint every statement ``engine`` runs on behalf of a request."""
+    request_context.on_statement(engine, _statement_executed)
+    return engine
+
+
+############################################
+#
+#   Budget checks
+#
+############################################
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+_recorders_lock = threading.Lock()
+_recorders: List[List[RequestStats]] = []
+# (route, fingerprint) -> monotonic time it was last logged.
+_last_logged: Dict[Tuple[str, str], float] = {}
+
+
+def request_finished(stats: RequestStats, status: int = 0, seconds: float = 0.0):
+    """Hand a finished request to recorders and log budget overruns and N+1 patterns."""
+    with _recorders_lock:
+        for recorder in _recorders:
+            recorder.append(stats)
+
+    if QUERY_BUDGET and stats.statements > QUERY_BUDGET:
+        logger.warning("%s %s ran %d SQL statements (budget %d)",
+                       stats.method, stats.route, stats.statements, QUERY_BUDGET)
+    if not N_PLUS_ONE_LOG:
+        return
+    now = time.monotonic()
+    for item in repeated(stats):
+        key = (stats.route, item["fingerprint"])
+        if now - _last_logged.get(key, float("-inf")) < N_PLUS_ONE_LOG_INTERVAL:
+            continue
+        _last_logged[key] = now
+        logger.warning("Possible N+1 in %s %s: %d x %s",
+                       stats.method, stats.route, item["count"], item["fingerprint"])
+
+
+@contextlib.contextmanager
+def record() -> Iterator[List[RequestStats]]:
+    """Collect the stats of every request finishing inside the block."""
+    recorder: List[RequestStats] = []
+    with _recorders_lock:
+        _recorders.append(recorder)
+    try:
+        yield recorder
+    finally:
+        with _recorders_lock:
+            _recorders.remove(recorder)
+
+
+@contextlib.contextmanager
+def max_queries(limit: int, n_plus_one: Optional[int] = None) -> Iterator[List[RequestStats]]:
+    """Test helper: fail if any request made inside the block runs more than
+    ``limit`` statements, or repeats one fingerprint ``n_plus_one`` times.
+
+        with max_queries(3):
+            client.get("/model/1/")
+    """
+    with record() as requests:
+        yield requests
+    for stats in requests:
+        if stats.statements > limit:
+            details = "\n".join(f"  {item['count']} x {item['fingerprint']}" for item in repeated(stats, 1))
+            raise QueryBudgetExceeded(
+                f"{stats.method} {stats.route} ran {stats.statements} SQL statements, expected at most {limit}:\n"
+                f"{details}")
+        if n_plus_one is not None and repeated(stats, n_plus_one):
+            item = repeated(stats, n_plus_one)[0]
+            raise QueryBudgetExceeded(
+                f"{stats.method} {stats.route} repeated {item['count']} x {item['fingerprint']}")
+
+
+def add_headers(stats: RequestStats, headers: List[Tuple[bytes, bytes]]):
+    """Report the request's SQL activity in response headers when asked to."""
+    if not (QUERY_STATS_HEADER or any(name == b"x-query-stats" and value.strip() == b"1"
+                                      for name, value in stats.scope.get("headers", ()))):
+        return
+    headers.append((b"x-query-count", str(stats.statements).encode()))
+    headers.append((b"x-db-time-ms", f"{stats.db_seconds * 1000:.2f}".encode()))
+    n_plus_one = repeated(stats)
+    if n_plus_one:
+        headers.append((b"x-n-plus-one", str(len(n_plus_one)).encode()))
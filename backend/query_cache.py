@@ -0,0 +1,209 @@
+import asyncio
+import functools
+import os
+import threading
+import time
+from collections import OrderedDict
+from enum import Enum
+from typing import Dict, Iterable, Optional, Set
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, Response
+from sqlalchemy.orm import Session
+
+from singleflight import single_flight
+
+
+############################################
+#
+#   In-process query result cache
+#
+############################################
+
+class _CacheEntry:
+    __slots__ = ("body", "tables", "expires_at")
+
+    def __init__(self, body: bytes, tables: frozenset, expires_at: float):
+        self.body = body
+        self.tables = tables
+        self.expires_at = expires_at
+
+
+class QueryCache:
+    """LRU + TTL cache of serialized endpoint responses.
+
+    Entries are bounded both by count and by total body size, and each entry
+    records the tables it was built from so that a commit touching any of
+    them evicts only the affected results.
+    """
+
+    def __init__(self, max_entries: int = 256, max_bytes: int = 64 * 1024 * 1024, ttl: float = 300.0):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, _CacheEntry]" = OrderedDict()
+        self._keys_by_table: Dict[str, Set[str]] = {}
+        self._size = 0
+        # Bumped by every invalidation; results computed under an older
+        # generation may predate the write and are not stored.
+        self.generation = 0
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "evictions": 0, "expirations": 0, "invalidations": 0}
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl > 0 and self.max_entries > 0
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._stats["misses"] += 1
+                return None
+            if entry.expires_at <= time.monotonic():
+                self._remove(key)
+                self._stats["expirations"] += 1
+                self._stats["misses"] += 1
+                return None
+            self._entries.move_to_end(key)
+            self._stats["hits"] += 1
+            return entry.body
+
+    def put(self, key: str, body: bytes, tables: Iterable[str], generation: Optional[int] = None):
+        if not self.enabled or len(body) > self.max_bytes:
+            return
+        with self._lock:
+            if generation is not None and generation != self.generation:
+                return
+            if key in self._entries:
+                self._remove(key)
+            entry = _CacheEntry(body, frozenset(tables), time.monotonic() + self.ttl)
+            self._entries[key] = entry
+            self._size += len(body)
+            for table in entry.tables:
+                self._keys_by_table.setdefault(table, set()).add(key)
+            while len(self._entries) > self.max_entries or self._size > self.max_bytes:
+                oldest_key = next(iter(self._entries))
+                self._remove(oldest_key)
+                self._stats["evictions"] += 1
+
+    def invalidate_tables(self, tables: Iterable[str]) -> int:
+        """Drop every entry depending on one of ``tables``; returns the number removed."""
+        removed = 0
+        with self._lock:
+            self.generation += 1
+            for table in tables:
+                for key in list(self._keys_by_table.get(table, ())):
+                    if key in self._entries:
+                        self._remove(key)
+                        removed += 1
+            self._stats["invalidations"] += removed
+        return removed
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._keys_by_table.clear()
+            self._size = 0
+            self.generation += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self._stats["hits"] + self._stats["misses"]
+            return {
+                **self._stats,
+                "entries": len(self._entries),
+                "size_bytes": self._size,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                "ttl_seconds": self.ttl,
+                "hit_ratio": self._stats["hits"] / lookups if lookups else 0.0,
+            }
+
+    def _remove(self, key: str):
+        entry = self._entries.pop(key)
+        self._size -= len(entry.body)
+        for table in entry.tables:
+            keys = self._keys_by_table.get(table)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._keys_by_table[table]
+
+    def cached(self, *tables: str):
+        """Cache a GET endpoint's JSON response, keyed by endpoint and query parameters.
+
+        ``tables`` is the endpoint's dependency set: a commit writing to any of
+        them invalidates the cached response. Concurrent misses for the same
+        key are coalesced so only one of them reaches the database.
+        """
+
+        def decorator(func):
+            endpoint = func.__name__
+
+            def lookup(kwargs):
+                key = make_key(endpoint, kwargs)
+                return key, self.get(key) if self.enabled else None
+
+            def encode(key, generation, result):
+                body = JSONResponse(jsonable_encoder(result)).body
+                self.put(key, body, tables, generation=generation)
+                return body
+
+            if asyncio.iscoroutinefunction(func):
+                @functools.wraps(func)
+                async def async_wrapper(*args, **kwargs):
+                    key, body = lookup(kwargs)
+                    if body is not None:
+                        return _json_response(body, "HIT")
+
+                    generation = self.generation
+
+                    async def compute():
+                        return encode(key, generation, await func(*args, **kwargs))
+
+                    body, shared = await single_flight.do_async(f"{key}#{generation}", compute)
+                    return _json_response(body, "COALESCED" if shared else "MISS")
+
+                return async_wrapper
+
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                key, body = lookup(kwargs)
+                if body is not None:
+                    return _json_response(body, "HIT")
+
+                generation = self.generation
+                body, shared = single_flight.do(
+                    f"{key}#{generation}", lambda: encode(key, generation, func(*args, **kwargs)))
+                return _json_response(body, "COALESCED" if shared else "MISS")
+
+            return wrapper
+
+        return decorator
+
+
+def make_key(endpoint: str, params: dict) -> str:
+    """Build a cache key from an endpoint name and its (already parsed) parameters."""
+    parts = []
+    for name in sorted(params):
+        value = params[name]
+        if isinstance(value, Session):
+            continue
+        if isinstance(value, Enum):
+            value = value.value
+        elif isinstance(value, (list, tuple)):
+            value = ",".join(str(v) for v in value)
+        parts.append(f"{name}={value}")
+    return f"{endpoint}?{'&'.join(parts)}"
+
+
+def _json_response(body: bytes, cache_status: str) -> Response:
+    return Response(content=body, media_type="application/json", headers={"X-Cache": cache_status})
+
+
+query_cache = QueryCache(
+    max_entries=int(os.getenv("QUERY_CACHE_MAX_ENTRIES", "256")),
+    max_bytes=int(os.getenv("QUERY_CACHE_MAX_BYTES", str(64 * 1024 * 1024))),
+    ttl=float(os.getenv("QUERY_CACHE_TTL", "300")),
+)
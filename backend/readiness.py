@@ -0,0 +1,157 @@
+import logging
+import os
+import random
+import threading
+import time
+from typing import Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# Probe results are reused for this long, so health checks never hammer the database.
+READINESS_CACHE_SECONDS = float(os.getenv("READINESS_CACHE_SECONDS", "5"))
+# Background immudb initialisation: attempts (0 = until it succeeds) and exponential backoff bounds.
+IMMUDB_INIT_ATTEMPTS = int(os.getenv("IMMUDB_INIT_ATTEMPTS", "0"))
+IMMUDB_INIT_BACKOFF = float(os.getenv("IMMUDB_INIT_BACKOFF", "1.0"))
+IMMUDB_INIT_BACKOFF_MAX = float(os.getenv("IMMUDB_INIT_BACKOFF_MAX", "60"))
+# When off, /health/ready only requires the database and immudb is reported but not awaited.
+IMMUDB_REQUIRED = os.getenv("IMMUDB_REQUIRED", "1") == "1"
+
+
+############################################
+#
+#   Cached probes
+#
+############################################
+
+class Probe:
+    """A readiness check whose last result is cached for ``ttl`` seconds.
+
+    ``check`` returns nothing on success and raises on failure. Only one
+    caller refreshes an expired result; concurrent callers get the previous
+    one instead of queueing behind a slow check.
+    """
+
+    def __init__(self, name: str, check: Callable[[], None], ttl: float = READINESS_CACHE_SECONDS):
+        self.name = name
+        self.check = check
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._result: Optional[dict] = None
+        self._checked_at = 0.0
+
+    def _run(self) -> dict:
+        started = time.perf_counter()
+        try:
+            self.check()
+            result = {"ready": True}
+        except Exception as error:
+            result = {"ready": False, "error": f"{type(error).__name__}: {error}"}
+        result["latency_ms"] = round((time.perf_counter() - started) * 1000, 3)
+        result["checked_at"] = time.time()
+        return result
+
+    def status(self) -> dict:
+        now = time.monotonic()
+        if self._result is not None and now - self._checked_at < self.ttl:
+            return self._result
+        if not self._lock.acquire(blocking=self._result is None):
+            return self._result
+        try:
+            if self._result is None or time.monotonic() - self._checked_at >= self.ttl:
+                self._result = self._run()
+                self._checked_at = time.monotonic()
+            return self._result
+        finally:
+            self._lock.release()
+
+
+############################################
+#
+#   Background initialisation
+#
+############################################
+
+class BackgroundInit:
+    """Runs ``target`` in a daemon thread until it succeeds, with exponential backoff and jitter.
+
+    The server starts serving at once; ``status()`` reports ``pending``,
+    ``ready`` or ``failed`` (attempts exhausted) with the last error.
+    """
+
+    def __init__(self, name: str, target: Callable[[], None], attempts: int = IMMUDB_INIT_ATTEMPTS,
+                 backoff: float = IMMUDB_INIT_BACKOFF, backoff_max: float = IMMUDB_INIT_BACKOFF_MAX):
+        self.name = name
+        self.target = target
+        self.attempts = attempts
+        self.backoff = backoff
+        self.backoff_max = backoff_max
+        self._stop = threading.Event()
+        self._done = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.state = "pending"
+        self.tries = 0
+        self.last_error: Optional[str] = None
+
+    @property
+    def ready(self) -> bool:
+        return self.state == "ready"
+
+    def delay(self, attempt: int) -> float:
+        """Backoff before retry ``attempt`` (1-based): doubled each time, capped, with +-20% jitter."""
+        delay = min(self.backoff * 2 ** (attempt - 1), self.backoff_max)
+        return delay * random.uniform(0.8, 1.2)
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.tries += 1
+            try:
+                self.target()
+            except Exception as error:
+                self.last_error = f"{type(error).__name__}: {error}"
+                if self.attempts and self.tries >= self.attempts:
+                    self.state = "failed"
+                    logger.error("%s initialisation failed after %d attempts: %s",
+                                 self.name, self.tries, self.last_error)
+                    break
+                delay = self.delay(self.tries)
+                logger.warning("%s initialisation attempt %d failed (%s); retrying in %.1fs",
+                               self.name, self.tries, self.last_error, delay)
+                self._stop.wait(delay)
+            else:
+                self.state = "ready"
+                self.last_error = None
+                logger.info("%s initialised after %d attempt(s)", self.name, self.tries)
+                break
+        self._done.set()
+
+    def start(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._done.clear()
+        self.state, self.tries, self.last_error = "pending", 0, None
+        self._thread = threading.Thread(target=self._run, name=f"{self.name}-init", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Block until the initialisation finished (or gave up); True if it succeeded."""
+        self._done.wait(timeout)
+        return self.ready
+
+    def status(self) -> dict:
+        status = {"ready": self.ready, "state": self.state, "attempts": self.tries}
+        if self.last_error:
+            status["error"] = self.last_error
+        return status
+
+
+def report(checks: Dict[str, dict], required: Dict[str, bool]) -> dict:
+    """Overall readiness: ready when every required check is."""
+    return {
+        "status": "ready" if all(checks[name]["ready"] for name, needed in required.items() if needed)
+        else "not_ready",
+        "checks": checks,
+    }
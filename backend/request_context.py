@@ -0,0 +1,206 @@
+import contextvars
+import logging
+import os
+import random
+import re
+import time
+import uuid
+import weakref
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import event
+
+access_logger = logging.getLogger("access")
+
+# Fraction of successful requests written to the access log; errors and slow requests are always logged.
+ACCESS_LOG_SAMPLE_RATE = float(os.getenv("ACCESS_LOG_SAMPLE_RATE", "1.0"))
+ACCESS_LOG_SLOW_MS = float(os.getenv("ACCESS_LOG_SLOW_MS", "1000"))
+
+_REQUEST_ID = re.compile(r"^[A-Za-z0-9._:-]{1,128}$")
+
+
+############################################
+#
+#   Per-request context
+#
+############################################
+
+UNMATCHED_ROUTE = "<unmatched>"
+
+
+@dataclass
+class RequestStats:
+    """Database activity of the request being served.
+
+    The object is created by the ASGI middleware and shared by reference with
+    the threadpool running sync handlers, so engine event listeners can add
+    to it from any thread serving the request.
+    """
+    scope: Dict[str, Any] = field(repr=False)
+    statements: int = 0
+    db_seconds: float = 0.0
+    # Normalised statement -> times executed, filled by query_budget.
+    fingerprints: Dict[str, int] = field(default_factory=dict, repr=False)
+    request_id: str = ""
+
+    @property
+    def method(self) -> str:
+        return self.scope.get("method", "")
+
+    @property
+    def route(self) -> str:
+        """Route template (``/measure/{measure_id}/``) once the router has matched it."""
+        return getattr(self.scope.get("route"), "path", None) or UNMATCHED_ROUTE
+
+
+_current: contextvars.ContextVar[Optional[RequestStats]] = contextvars.ContextVar("request_stats", default=None)
+
+
+def current() -> Optional[RequestStats]:
+    return _current.get()
+
+
+############################################
+#
+#   Statement timing
+#
+############################################
+
+# One timer per statement, shared by every consumer (metrics, slow query log, ...).
+_STATEMENT_START = "statement_start"
+
+StatementCallback = Callable[[Any, str, Any, bool, float], None]
+_statement_callbacks: "weakref.WeakKeyDictionary[Any, List[StatementCallback]]" = weakref.WeakKeyDictionary()
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault(_STATEMENT_START, []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    starts = conn.info.get(_STATEMENT_START)
+    if not starts:
+        return
+    elapsed = time.perf_counter() - starts.pop()
+    for callback in _statement_callbacks.get(conn.engine, ()):
+        callback(conn, statement, parameters, executemany, elapsed)
+
+
+def _handle_error(exception_context):
+    connection = exception_context.connection
+    starts = connection.info.get(_STATEMENT_START) if connection is not None else None
+    if starts:
+        starts.pop()
+
+
+def on_statement(engine, callback: StatementCallback) -> StatementCallback:
+    """Call ``callback(conn, statement, parameters, executemany, seconds)`` after every
+    statement ``engine`` runs, from the one set of cursor listeners installed here."""
+    callbacks = _statement_callbacks.get(engine)
+    if callbacks is None:
+        callbacks = _statement_callbacks[engine] = []
+        event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+        event.listen(engine, "handle_error", _handle_error)
+    callbacks.append(callback)
+    return callback
+
+
+############################################
+#
+#   Request middleware
+#
+############################################
+
+Headers = List[Tuple[bytes, bytes]]
+
+
+def _request_id(scope: Dict[str, Any]) -> str:
+    for name, value in scope.get("headers", ()):
+        if name == b"x-request-id":
+            candidate = value.decode("latin-1")
+            if _REQUEST_ID.match(candidate):
+                return candidate
+            break
+    return uuid.uuid4().hex
+
+
+class RequestMiddleware:
+    """The one pure ASGI middleware wrapping every HTTP request.
+
+    Opens the request context, assigns a request id (kept from an incoming
+    ``X-Request-ID`` when well formed), sets ``X-Request-ID`` and
+    ``X-Process-Time`` on the response, writes a sampled access log line and
+    calls the hooks:
+
+    * ``on_start(stats)`` before the app runs,
+    * ``on_headers(stats, headers)`` when the response starts, to append headers,
+    * ``on_finish(stats, status, seconds)`` once the body has been sent.
+
+    Messages are passed through unbuffered, so streaming responses keep streaming.
+    """
+
+    def __init__(self, app, on_start: Sequence[Callable] = (), on_headers: Sequence[Callable] = (),
+                 on_finish: Sequence[Callable] = ()):
+        self.app = app
+        self.on_start = tuple(on_start)
+        self.on_headers = tuple(on_headers)
+        self.on_finish = tuple(on_finish)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request_id = _request_id(scope)
+        token = _current.set(RequestStats(scope=scope, request_id=request_id))
+        stats = _current.get()
+        started = time.perf_counter()
+        status = 500
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                headers = list(message.get("headers", ()))
+                headers.append((b"x-request-id", request_id.encode("latin-1")))
+                headers.append((b"x-process-time", str(time.perf_counter() - started).encode("latin-1")))
+                for hook in self.on_headers:
+                    hook(stats, headers)
+                message = {**message, "headers": headers}
+            await send(message)
+
+        for hook in self.on_start:
+            hook(stats)
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - started
+            for hook in self.on_finish:
+                hook(stats, status, elapsed)
+            _log_access(stats, status, elapsed)
+            _current.reset(token)
+
+
+def _log_access(stats: RequestStats, status: int, elapsed: float):
+    if not access_logger.isEnabledFor(logging.INFO):
+        return
+    if status < 500 and elapsed * 1000 < ACCESS_LOG_SLOW_MS and \
+            ACCESS_LOG_SAMPLE_RATE < 1.0 and random.random() >= ACCESS_LOG_SAMPLE_RATE:
+        return
+    scope = stats.scope
+    access_logger.info(
+        "%s %s %d %.1fms", stats.method, scope.get("path", ""), status, elapsed * 1000,
+        extra={
+            "request_id": stats.request_id,
+            "method": stats.method,
+            "path": scope.get("path", ""),
+            "route": stats.route,
+            "status": status,
+            "duration_ms": round(elapsed * 1000, 3),
+            "db_statements": stats.statements,
+            "db_ms": round(stats.db_seconds * 1000, 3),
+            "client": (scope.get("client") or ("",))[0],
+        },
+    )
@@ -0,0 +1,96 @@
+import asyncio
+import threading
+from typing import Any, Awaitable, Callable, Dict, Tuple
+
+
+############################################
+#
+#   Request coalescing (single-flight)
+#
+############################################
+
+class _Call:
+    __slots__ = ("done", "result", "error", "waiters")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    """Collapse concurrent calls sharing a key into one execution.
+
+    The first caller for a key runs the computation; callers arriving while it
+    is in flight wait for it and receive the same result (or exception).
+    Nothing is remembered once the call completes - caching is a separate
+    concern.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[str, _Call] = {}
+        self._futures: Dict[str, asyncio.Future] = {}
+        self.stats = {"executions": 0, "shared": 0}
+
+    def do(self, key: str, fn: Callable[[], Any]) -> Tuple[Any, bool]:
+        """Run ``fn`` once per in-flight ``key`` from worker threads; returns ``(result, shared)``."""
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self.stats["executions"] += 1
+            else:
+                call.waiters += 1
+                self.stats["shared"] += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+
+        try:
+            call.result = fn()
+        except BaseException as exc:
+            call.error = exc
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result, False
+
+    async def do_async(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Tuple[Any, bool]:
+        """Coroutine counterpart of :meth:`do` for handlers running on the event loop."""
+        future = self._futures.get(key)
+        if future is not None:
+            self.stats["shared"] += 1
+            return await asyncio.shield(future), True
+
+        future = self._futures[key] = asyncio.get_running_loop().create_future()
+        self.stats["executions"] += 1
+        try:
+            result = await fn()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as exc:
+            future.set_exception(exc)
+            # Retrieve the exception so an unawaited future does not log a warning.
+            future.exception()
+            raise
+        else:
+            future.set_result(result)
+            return result, False
+        finally:
+            del self._futures[key]
+
+    def in_flight(self) -> int:
+        with self._lock:
+            return len(self._calls) + len(self._futures)
+
+
+single_flight = SingleFlight()
@@ -0,0 +1,145 @@
+import collections
+import os
+import queue
+import threading
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+import request_context
+
+# Statements running at least this long are recorded.
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", "200"))
+# Number of recent slow statements kept.
+SLOW_QUERY_BUFFER = int(os.getenv("SLOW_QUERY_BUFFER", "100"))
+# Set to 0 to skip EXPLAIN of slow statements (run in the background on a separate connection).
+SLOW_QUERY_EXPLAIN = os.getenv("SLOW_QUERY_EXPLAIN", "1") == "1"
+
+_EXPLAIN_PREFIX = {"sqlite": "EXPLAIN QUERY PLAN ", "postgresql": "EXPLAIN "}
+
+
+############################################
+#
+#   Slow query log
+#
+############################################
+
+def parameter_shape(parameters: Any, executemany: bool = False) -> Any:
+    """Types of the bound parameters, never their values."""
+    if executemany:
+        batch = list(parameters or ())
+        return {"executemany": len(batch), "row": parameter_shape(batch[0]) if batch else None}
+    if isinstance(parameters, dict):
+        return {key: type(value).__name__ for key, value in parameters.items()}
+    if isinstance(parameters, (list, tuple)):
+        return [type(value).__name__ for value in parameters]
+    return type(parameters).__name__ if parameters is not None else None
+
+
+def _explainable(dialect: str, statement: str) -> bool:
+    return dialect in _EXPLAIN_PREFIX and statement.lstrip().upper().startswith(("SELECT", "WITH"))
+
+
+def _explain(engine, statement: str, parameters: Any) -> List[str]:
+    # A separate pooled connection, so a failing EXPLAIN can never abort the
+    # transaction of the request that ran the statement. Its raw DBAPI cursor
+    # bypasses the engine events, so EXPLAIN is neither timed nor recorded.
+    connection = engine.raw_connection()
+    try:
+        cursor = connection.cursor()
+        try:
+            cursor.execute(_EXPLAIN_PREFIX[engine.dialect.name] + statement, parameters or ())
+            return [" ".join(str(column) for column in row) for row in cursor.fetchall()]
+        finally:
+            cursor.close()
+    finally:
+        connection.rollback()
+        connection.close()
+
+
+class SlowQueryLog:
+    """Ring buffer of recent statements slower than ``threshold_ms``, with their plan."""
+
+    def __init__(self, threshold_ms: float = SLOW_QUERY_MS, capacity: int = SLOW_QUERY_BUFFER,
+                 explain: bool = SLOW_QUERY_EXPLAIN):
+        self.threshold_ms = threshold_ms
+        self.explain = explain
+        self._lock = threading.Lock()
+        self._entries: collections.deque = collections.deque(maxlen=capacity)
+        # Plans are fetched by a background worker, off the request path.
+        self._explain_queue: queue.Queue = queue.Queue(maxsize=capacity)
+        self._worker: Optional[threading.Thread] = None
+        self.stats = {"recorded": 0, "explain_failures": 0, "explain_skipped": 0}
+
+    def _statement_executed(self, conn, statement, parameters, executemany, elapsed):
+        duration_ms = elapsed * 1000
+        if duration_ms >= self.threshold_ms:
+            self.record(conn, statement, parameters, executemany, duration_ms)
+
+    def instrument_engine(self, engine):
+        request_context.on_statement(engine, self._statement_executed)
+        return engine
+
+    def record(self, conn, statement: str, parameters: Any, executemany: bool, duration_ms: float):
+        stats = request_context.current()
+        entry: Dict[str, Any] = {
+            "at": datetime.now(timezone.utc).isoformat(),
+            "duration_ms": round(duration_ms, 3),
+            "method": stats.method if stats is not None else None,
+            "route": stats.route if stats is not None else None,
+            "statement": statement,
+            "parameters": parameter_shape(parameters, executemany),
+            "plan": None,
+        }
+        if self.explain and not executemany and _explainable(conn.dialect.name, statement):
+            self._queue_explain(entry, conn.engine, statement, parameters)
+        with self._lock:
+            self._entries.append(entry)
+            self.stats["recorded"] += 1
+
+    def _queue_explain(self, entry: dict, engine, statement: str, parameters: Any):
+        try:
+            self._explain_queue.put_nowait((entry, engine, statement, parameters))
+        except queue.Full:
+            entry["explain_error"] = "explain queue full"
+            self.stats["explain_skipped"] += 1
+            return
+        if self._worker is None or not self._worker.is_alive():
+            with self._lock:
+                if self._worker is None or not self._worker.is_alive():
+                    self._worker = threading.Thread(target=self._explain_worker, name="slow-query-explain",
+                                                    daemon=True)
+                    self._worker.start()
+
+    def _explain_worker(self):
+        while True:
+            entry, engine, statement, parameters = self._explain_queue.get()
+            try:
+                plan = _explain(engine, statement, parameters)
+                with self._lock:
+                    entry["plan"] = plan
+            except Exception as exc:
+                with self._lock:
+                    entry["explain_error"] = str(exc)
+                self.stats["explain_failures"] += 1
+            finally:
+                self._explain_queue.task_done()
+
+    def join(self):
+        """Wait until the queued plans have been fetched."""
+        self._explain_queue.join()
+
+    def entries(self, limit: Optional[int] = None) -> List[dict]:
+        """Most recent first."""
+        with self._lock:
+            entries = [dict(entry) for entry in reversed(self._entries)]
+        return entries[:limit] if limit is not None else entries
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def info(self) -> dict:
+        return {"threshold_ms": self.threshold_ms, "capacity": self._entries.maxlen, **self.stats}
+
+
+slow_query_log = SlowQueryLog()
@@ -1,7 +1,7 @@
 import enum
 from typing import List, Optional
 from sqlalchemy import (
-    create_engine, Column, ForeignKey, Table, Text, Boolean, String, Date, 
+    Column, ForeignKey, Table, Text, Boolean, String, Date, 
     Time, DateTime, Float, Integer, Enum
 )
 from sqlalchemy.ext.declarative import AbstractConcreteBase
@@ -233,6 +233,14 @@ class Dataset(Element):
         "polymorphic_identity": "dataset",
     }
 
+class ChangeLog(Base):
+    __tablename__ = "change_log"
+    version: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
+    entity: Mapped[str] = mapped_column(String(100), index=True)
+    row_id: Mapped[int] = mapped_column(Integer)
+    action: Mapped[str] = mapped_column(String(10))
+    changed_at: Mapped[dt_datetime] = mapped_column(DateTime)
+
 
 #--- Relationships of the project table
 Project.legal_requirements: Mapped[List["LegalRequirement"]] = relationship("LegalRequirement", back_populates="project_1", foreign_keys=[LegalRequirement.project_1_id])
@@ -304,9 +312,4 @@ Dataset.models: Mapped[List["Model"]] = relationship("Model", back_populates="da
 Dataset.observation_2: Mapped[List["Observation"]] = relationship("Observation", back_populates="dataset", foreign_keys=[Observation.dataset_id])
 Dataset.datashape: Mapped["Datashape"] = relationship("Datashape", back_populates="dataset_1", foreign_keys=[Dataset.datashape_id])
 
-# Database connection
-DATABASE_URL = "sqlite:///ai_sandbox_PSA_13_Jan_2026.db"  # SQLite connection
-engine = create_engine(DATABASE_URL, echo=True)
-
-# Create tables in the database
-Base.metadata.create_all(engine, checkfirst=True)
\ No newline at end of file
+# Declarations only: the engine and schema bootstrap live in main_api.init_db().
\ No newline at end of file
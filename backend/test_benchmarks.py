@@ -0,0 +1,38 @@
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, func, select
+from sqlalchemy.orm import Session
+
+import main_api
+from benchmarks.datagen import Sizes, generate
+from benchmarks.scenarios import SCENARIOS, context_for, run_scenarios
+from sql_alchemy import Derived, Measure, Model, Observation
+
+
+def test_generator_is_deterministic_and_sized(tmp_path):
+    sizes = Sizes(measures=1500, models=12, metrics=6, derived=2, evaluations=5)
+    for name in ("a.db", "b.db"):
+        generate(f"sqlite:///{tmp_path / name}", sizes, seed=3)
+
+    values = []
+    for name in ("a.db", "b.db"):
+        engine = create_engine(f"sqlite:///{tmp_path / name}")
+        with Session(engine) as session:
+            assert session.execute(select(func.count(Measure.id))).scalar() == 1500
+            assert session.execute(select(func.count(Model.id))).scalar() == 12
+            assert session.execute(select(func.count(Observation.id))).scalar() == 20
+            assert all(len(derived.baseMetric) == 2 for derived in session.query(Derived))
+            values.append(session.execute(select(Measure.value).order_by(Measure.id).limit(20)).scalars().all())
+        engine.dispose()
+    assert values[0] == values[1]
+
+
+def test_scenarios_report_timings_and_statements():
+    with main_api.SessionLocal() as session:
+        context = context_for(session)
+    scenarios = [scenario for scenario in SCENARIOS if scenario.name in ("paginate_measures_first", "measure_detail")]
+    results = run_scenarios(TestClient(app=main_api.app), context, scenarios, repeat=2, warmup=0)
+    assert [result["name"] for result in results] == ["paginate_measures_first", "measure_detail"]
+    for result in results:
+        assert result["status"] == 200
+        assert 0 < result["ms"]["min"] <= result["ms"]["median"] <= result["ms"]["max"]
+        assert result["statements"] >= 1
@@ -0,0 +1,35 @@
+import pytest
+from fastapi.testclient import TestClient
+
+import main_api
+from main_api import app
+from sql_alchemy import Measure, Model
+
+
+def test_compare_returns_dense_matrix_and_pairwise_deltas():
+    with main_api.SessionLocal() as session:
+        model_ids = [model.id for model in session.query(Model).order_by(Model.id).limit(3)]
+        expected = {}
+        for measure in session.query(Measure).filter(Measure.measurand_id.in_(model_ids), Measure.metric_id.in_([1, 4])):
+            expected.setdefault((measure.metric_id, measure.measurand_id), []).append(measure.value)
+
+    response = TestClient(app).get("/compare", params={
+        "models": ",".join(map(str, model_ids)), "metrics": "1,A1 vocab"})
+    matrix = response.json()
+    assert [metric["id"] for metric in matrix["metrics"]] == [1, 4]
+    assert [model["id"] for model in matrix["models"]] == model_ids
+
+    for row, metric_id in enumerate([1, 4]):
+        for column, model_id in enumerate(model_ids):
+            values = expected.get((metric_id, model_id))
+            cell = matrix["values"][row][column]
+            assert cell == (pytest.approx(sum(values) / len(values)) if values else None)
+        if all(matrix["values"][row]):
+            assert matrix["deltas"][row][0][1] == pytest.approx(matrix["values"][row][0] - matrix["values"][row][1])
+            assert matrix["deltas"][row][1][1] == 0
+
+
+def test_compare_rejects_unknown_models_and_metrics():
+    client = TestClient(app)
+    assert client.get("/compare", params={"models": "999999"}).status_code == 404
+    assert client.get("/compare", params={"models": "1", "metrics": "nope"}).status_code == 400
@@ -0,0 +1,50 @@
+from fastapi.testclient import TestClient
+
+from compression import compression_stats, negotiate_encoding
+from main_api import app
+
+
+def test_negotiation_honours_quality_values():
+    assert negotiate_encoding("gzip, br;q=0.5", ["br", "gzip"]) == "gzip"
+    assert negotiate_encoding("br;q=0, *;q=0.1", ["br", "gzip"]) == "gzip"
+    assert negotiate_encoding("identity", ["br", "gzip"]) is None
+
+
+def test_large_json_is_gzipped_and_small_json_is_not():
+    client = TestClient(app)
+
+    large = client.get("/metric/", params={"detailed": "true"}, headers={"Accept-Encoding": "gzip"})
+    assert large.headers["content-encoding"] == "gzip"
+    assert int(large.headers["content-length"]) < len(large.content)
+    assert large.json()[0]["measures"]
+
+    small = client.get("/", headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in small.headers
+
+    stats = {(row["endpoint"], row["encoding"]): row for row in compression_stats.snapshot()}
+    assert stats[("/metric/", "gzip")]["ratio"] < 0.5
+
+
+def test_streamed_text_download_is_compressed():
+    from fastapi.responses import StreamingResponse
+    from starlette.applications import Starlette
+    from starlette.routing import Route
+
+    from compression import CompressionMiddleware
+
+    lines = [f"{i},ADD,Comments,{i}\n" for i in range(500)]
+    stream_app = Starlette(routes=[Route("/logs", lambda request: StreamingResponse(iter(lines), media_type="text/csv"))])
+    stream_app.add_middleware(CompressionMiddleware, minimum_size=10)
+
+    response = TestClient(stream_app).get("/logs", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.text == "".join(lines)
+
+
+def test_compressed_response_keeps_existing_vary_tokens():
+    client = TestClient(app)
+    headers = {"Accept-Encoding": "gzip", "Origin": "http://localhost:3000"}
+    response = client.get("/metric/", params={"detailed": "true"}, headers=headers)
+    assert response.headers["content-encoding"] == "gzip"
+    vary = [token.strip().lower() for token in response.headers["vary"].split(",")]
+    assert "origin" in vary and vary.count("accept-encoding") == 1
@@ -0,0 +1,84 @@
+from datetime import datetime, timedelta, timezone
+
+from fastapi.testclient import TestClient
+from sqlalchemy import event, func, select
+
+import delta_sync
+from main_api import SessionLocal, app
+from sql_alchemy import ChangeLog, Measure
+
+
+def test_changes_since_returns_only_rows_touched_after_the_version(bump_measure):
+    client = TestClient(app)
+    snapshot = client.get("/measure/changes").json()
+    assert snapshot["full"] is True
+    assert len(snapshot["upserted"]) >= 1590
+
+    bump_measure(client, 3, value=99.5)
+    client.delete("/measure/4/")
+
+    delta = client.get("/measure/changes", params={"since": snapshot["version"]}).json()
+    assert delta["full"] is False
+    assert delta["version"] > snapshot["version"]
+    assert [row["id"] for row in delta["upserted"]] == [3]
+    assert delta["upserted"][0]["value"] == 99.5
+    assert delta["deleted"] == [4]
+
+    assert client.get("/measure/changes", params={"since": delta["version"]}).json()["upserted"] == []
+
+
+def test_unknown_entity_is_rejected():
+    assert TestClient(app).get("/nope/changes").status_code == 404
+
+
+def test_change_log_is_written_once_per_commit_and_dropped_on_rollback():
+    engine = SessionLocal.kw["bind"]
+    statements = []
+    listener = lambda conn, cursor, statement, *args: statements.append(statement)
+    event.listen(engine, "before_cursor_execute", listener)
+    try:
+        with SessionLocal() as session:
+            template = session.get(Measure, 3)
+            before = session.execute(select(func.count(ChangeLog.version))).scalar()
+            added = [Measure(value=value, error="", uncertainty=0.0, unit="", metric_id=template.metric_id,
+                             measurand_id=template.measurand_id, observation_id=template.observation_id)
+                     for value in range(20)]
+            for measure in added:
+                session.add(measure)
+                session.flush()
+            session.commit()
+            assert sum(statement.startswith("INSERT INTO change_log") for statement in statements) == 1
+            assert session.execute(select(func.count(ChangeLog.version))).scalar() == before + 20
+
+            session.add(Measure(value=1.0, error="", uncertainty=0.0, unit="", metric_id=template.metric_id,
+                                measurand_id=template.measurand_id, observation_id=template.observation_id))
+            session.flush()
+            session.rollback()
+            session.commit()
+            assert session.execute(select(func.count(ChangeLog.version))).scalar() == before + 20
+
+            for measure in added:
+                session.delete(measure)
+            session.commit()
+    finally:
+        event.remove(engine, "before_cursor_execute", listener)
+
+
+def test_pruned_change_log_keeps_the_newest_row_and_snapshots_older_clients(bump_measure, monkeypatch):
+    client = TestClient(app)
+    bump_measure(client, 3)
+    since = client.get("/measure/changes").json()["version"]
+    bump_measure(client, 3)
+    with SessionLocal() as session:
+        assert delta_sync.prune_change_log(session, datetime.now(timezone.utc) + timedelta(days=1)) > 0
+        session.commit()
+        assert session.execute(select(func.count(ChangeLog.version))).scalar() == 1
+        newest = delta_sync.current_version(session)
+
+    assert client.get("/measure/changes", params={"since": since - 1}).json()["full"] is True
+    assert client.get("/measure/changes", params={"since": newest - 1}).json()["full"] is False
+    bump_measure(client, 3)
+    assert client.get("/measure/changes", params={"since": newest}).json()["version"] == newest + 1
+
+    monkeypatch.setattr(delta_sync, "INCREMENTAL_DIALECTS", set())
+    assert client.get("/measure/changes", params={"since": newest}).json()["full"] is True
@@ -0,0 +1,92 @@
+import pytest
+from fastapi.testclient import TestClient
+
+import main_api
+from derived_engine import CompiledExpression, ExpressionError
+from main_api import app
+from sql_alchemy import Derived, Measure, Metric
+
+
+def _create_derived(expression: str, base_metric_ids) -> int:
+    with main_api.SessionLocal() as session:
+        derived = Derived(name=f"derived {expression}", description="test", expression=expression)
+        derived.baseMetric = [session.get(Metric, metric_id) for metric_id in base_metric_ids]
+        session.add(derived)
+        session.commit()
+        return derived.id
+
+
+@pytest.mark.parametrize("expression", ["__import__('os')", "m1.real", "m1[0]", "m2 + 1", "m1 if m1 else 0"])
+def test_compile_rejects_anything_but_arithmetic(expression):
+    with pytest.raises(ExpressionError):
+        CompiledExpression(expression, {"m1": 1})
+
+
+def test_evaluate_and_materialize_derived_metric():
+    derived_id = _create_derived("(a1_grammar + m2) / 2", [1, 2])
+    client = TestClient(app)
+
+    evaluated = client.get(f"/derived/{derived_id}/evaluate/").json()
+    assert evaluated["count"] == 53
+    with main_api.SessionLocal() as session:
+        measures = {(m.measurand_id, m.metric_id): m.value
+                    for m in session.query(Measure).filter(Measure.metric_id.in_([1, 2]))}
+    for row in evaluated["values"]:
+        expected = (measures[(row["measurand_id"], 1)] + measures[(row["measurand_id"], 2)]) / 2
+        assert row["value"] == pytest.approx(expected)
+
+    assert client.post(f"/derived/{derived_id}/materialize/").json()["created"] == 53
+    assert client.post(f"/derived/{derived_id}/materialize/").json()["created"] == 0
+
+    assert client.get("/derived/999999/evaluate/").status_code == 404
+
+
+def test_measure_writes_recompute_only_affected_cells():
+    first = _create_derived("m3 * 2", [3])
+    chained = _create_derived(f"m{first} + 1", [first])
+    client = TestClient(app)
+    client.post(f"/derived/{first}/materialize/")
+    client.post(f"/derived/{chained}/materialize/")
+    main_api.derived_recomputer.join()
+
+    with main_api.SessionLocal() as session:
+        measure = session.query(Measure).filter(Measure.metric_id == 3).first()
+        measurand_id = measure.measurand_id
+        payload = {"uncertainty": measure.uncertainty, "value": 10.0, "error": measure.error,
+                   "unit": measure.unit, "measurand": measurand_id, "metric": 3,
+                   "observation": measure.observation_id}
+        measure_id = measure.id
+    cells_before = main_api.derived_recomputer.stats["cells"]
+    client.put(f"/measure/{measure_id}/", json=payload)
+    main_api.derived_recomputer.join()
+
+    assert main_api.derived_recomputer.stats["cells"] - cells_before == 2
+    with main_api.SessionLocal() as session:
+        values = {m.metric_id: m.value for m in session.query(Measure).filter(
+            Measure.measurand_id == measurand_id, Measure.metric_id.in_([first, chained]))}
+    assert values == {first: 20.0, chained: 21.0}
+
+
+@pytest.mark.parametrize("bulk", [True, False])
+def test_deleting_a_base_measure_recomputes_its_derived_cell(bulk):
+    derived_id = _create_derived("m3 * 2", [3])
+    client = TestClient(app)
+    client.post(f"/derived/{derived_id}/materialize/")
+    main_api.derived_recomputer.join()
+
+    with main_api.SessionLocal() as session:
+        measure = session.query(Measure).filter(Measure.metric_id == 3).order_by(Measure.id.desc()).first()
+        cell = (measure.measurand_id, measure.observation_id)
+        if bulk:
+            session.query(Measure).filter(Measure.id == measure.id).delete()
+        else:
+            session.delete(measure)
+        session.commit()
+    main_api.derived_recomputer.join()
+
+    with main_api.SessionLocal() as session:
+        cells, bases = [{(m.measurand_id, m.observation_id) for m in
+                         session.query(Measure).filter(Measure.metric_id == metric_id)}
+                        for metric_id in (derived_id, 3)]
+    assert cell not in cells
+    assert cells == bases
@@ -0,0 +1,65 @@
+import asyncio
+import threading
+
+from fastapi.testclient import TestClient
+
+from change_tracking import Change
+from events import EventBroker, event_broker, format_sse
+from main_api import app
+
+
+# -------------------------
+# Broker behaviour
+# -------------------------
+def test_publish_from_worker_thread_reaches_filtered_subscribers():
+    broker = EventBroker()
+
+    async def scenario():
+        measures = broker.subscribe({"measure"})
+        comments = broker.subscribe({"comments"})
+        thread = threading.Thread(target=broker.publish, args=([
+            Change(entity="Measure", tables=("measure",), id=7, action="update", row={"id": 7, "value": 1.5}),
+        ],))
+        thread.start()
+        thread.join()
+        event = await asyncio.wait_for(measures.queue.get(), timeout=1)
+        return event, comments.queue.qsize()
+
+    event, unrelated = asyncio.run(scenario())
+    assert event["entity"] == "Measure"
+    assert event["id"] == 7
+    assert event["row"] == {"id": 7, "value": 1.5}
+    assert unrelated == 0
+    assert format_sse(event).startswith(f"id: {event['seq']}\nevent: change\n")
+
+
+def test_reconnect_replays_missed_events_or_requests_resync():
+    broker = EventBroker(history_size=2)
+    broker.publish([Change(entity="Model", tables=("element", "model"), id=i, action="create") for i in (1, 2, 3)])
+
+    async def scenario(last_event_id):
+        subscriber = broker.subscribe(last_event_id=last_event_id)
+        return [subscriber.queue.get_nowait() for _ in range(subscriber.queue.qsize())]
+
+    assert [event["id"] for event in asyncio.run(scenario(1))] == [2, 3]
+    assert [event["action"] for event in asyncio.run(scenario(0))] == ["resync"]
+
+
+# -------------------------
+# CRUD integration
+# -------------------------
+def test_committed_measure_update_is_published(bump_measure):
+    client = TestClient(app)
+
+    async def scenario():
+        subscriber = event_broker.subscribe({"measure"})
+        try:
+            payload = await asyncio.get_running_loop().run_in_executor(None, bump_measure, client, 1)
+            event = await asyncio.wait_for(subscriber.queue.get(), timeout=5)
+        finally:
+            event_broker.unsubscribe(subscriber)
+        return payload, event
+
+    payload, event = asyncio.run(scenario())
+    assert (event["entity"], event["id"], event["action"]) == ("Measure", 1, "update")
+    assert event["row"]["value"] == payload["value"]
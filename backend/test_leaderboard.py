@@ -0,0 +1,95 @@
+import statistics
+
+from fastapi.testclient import TestClient
+
+import main_api
+from change_tracking import Change
+from main_api import app
+from measure_index import MeasureIndex, measure_index
+from sql_alchemy import Measure, Metric, MetricCategory, Model
+
+
+def _expected_scores(metric_ids):
+    """Mean of each metric's min-max normalised per-model mean, over models measured on every metric."""
+    with main_api.SessionLocal() as session:
+        model_ids = {model.id for model in session.query(Model)}
+        per_model = {}
+        for measure in session.query(Measure).filter(Measure.metric_id.in_(metric_ids)):
+            if measure.measurand_id in model_ids:
+                per_model.setdefault(measure.measurand_id, {}).setdefault(measure.metric_id, []).append(measure.value)
+    means = {model_id: {metric_id: statistics.mean(values) for metric_id, values in metrics.items()}
+             for model_id, metrics in per_model.items() if len(metrics) == len(metric_ids)}
+    bounds = {metric_id: (min(row[metric_id] for row in means.values()), max(row[metric_id] for row in means.values()))
+              for metric_id in metric_ids}
+    return {
+        model_id: statistics.mean((row[metric_id] - low) / (high - low) if high > low else 1.0
+                                  for metric_id, (low, high) in bounds.items())
+        for model_id, row in means.items()
+    }
+
+
+def test_leaderboard_ranks_models_by_mean_of_normalised_metrics():
+    client = TestClient(app)
+    board = client.get("/leaderboard", params={"metrics": "1,A1_LC"}).json()
+
+    assert [metric["id"] for metric in board["metrics"]] == [1, 2]
+    expected = _expected_scores([1, 2])
+    assert len(board["rows"]) == len(expected)
+    scores = [row["score"] for row in board["rows"]]
+    assert scores == sorted(scores, reverse=True)
+    assert all(0.0 <= score <= 1.0 for score in scores)
+    assert [row["rank"] for row in board["rows"]] == list(range(1, len(expected) + 1))
+    for row in board["rows"]:
+        assert abs(row["score"] - expected[row["model_id"]]) < 1e-9
+
+
+def test_leaderboard_refreshes_only_touched_measurands():
+    client = TestClient(app)
+    client.get("/leaderboard", params={"metrics": "1"})
+    refreshed = measure_index.stats["refreshed_measurands"]
+
+    with main_api.SessionLocal() as session:
+        measure = session.query(Measure).filter(Measure.metric_id == 1).first()
+        model_id = measure.measurand_id
+        measure.value = 1e6
+        session.commit()
+
+    top = client.get("/leaderboard", params={"metrics": "1", "aggregate": "max", "limit": 1}).json()["rows"]
+    assert top[0]["model_id"] == model_id and top[0]["values"]["A1 Grammar"] == 1e6
+    assert measure_index.stats["refreshed_measurands"] == refreshed + 1
+
+
+def test_leaderboard_rejects_unknown_metric_aggregate_and_limit():
+    client = TestClient(app)
+    assert client.get("/leaderboard", params={"metrics": "nope"}).status_code == 400
+    assert client.get("/leaderboard", params={"aggregate": "median"}).status_code == 400
+    assert client.get("/leaderboard", params={"limit": -1}).status_code == 400
+    assert client.get("/leaderboard", params={"limit": 0}).status_code == 400
+
+
+def test_radar_normalises_each_axis_and_scopes_by_category():
+    with main_api.SessionLocal() as session:
+        category = MetricCategory(name="Reading", description="test")
+        category.metrics = [session.get(Metric, 2), session.get(Metric, 3)]
+        session.add(category)
+        session.commit()
+        category_id = category.id
+
+    radar = TestClient(app).get("/radar", params={"category": category_id}).json()
+    assert [axis["id"] for axis in radar["axes"]] == [2, 3]
+    for position, axis in enumerate(radar["axes"]):
+        normalised = [series["values"][position] for series in radar["series"] if series["values"][position] is not None]
+        raw = [series["raw"][position] for series in radar["series"] if series["raw"][position] is not None]
+        assert min(normalised) == 0.0 and max(normalised) == 1.0
+        assert axis["min"] == min(raw) and axis["max"] == max(raw)
+
+    pooled = TestClient(app).get("/radar", params={"category": category_id, "scale": "category"}).json()
+    assert pooled["axes"][0]["min"] == pooled["axes"][1]["min"]
+    assert TestClient(app).get("/radar", params={"category": 999999}).status_code == 404
+
+
+def test_table_level_measure_write_triggers_rebuild():
+    index = MeasureIndex()
+    index._rebuild = False
+    index.on_changes([Change(entity="measure", tables=("measure",), id=None, action="delete")])
+    assert index._rebuild
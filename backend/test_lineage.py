@@ -0,0 +1,44 @@
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+
+import main_api
+from main_api import app
+
+
+def test_lineage_walks_evaluation_subtree_level_by_level():
+    client = TestClient(app)
+    graph = client.get("/lineage/evaluation/1", params={"depth": 2}).json()
+
+    nodes = {node["id"]: node for node in graph["nodes"]}
+    assert graph["root"] == "Evaluation:1" and nodes["Evaluation:1"]["level"] == 0
+    assert nodes["Observation:1"]["level"] == 1
+    assert nodes["Configuration:1"]["level"] == 1
+    assert nodes["Tool:1"]["level"] == 2
+    assert sum(node["entity"] == "Measure" for node in graph["nodes"]) >= 1590
+    assert len(nodes) == len(graph["nodes"])
+
+    edges = {tuple(sorted((edge["source"], edge["target"]))) for edge in graph["edges"]}
+    assert len(edges) == len(graph["edges"])
+    assert ("Evaluation:1", "Observation:1") in edges
+    assert all(edge["source"] in nodes and edge["target"] in nodes for edge in graph["edges"])
+
+
+def test_lineage_query_count_does_not_grow_with_rows():
+    statements = []
+    engine = main_api.SessionLocal.kw["bind"]
+    listener = lambda *args: statements.append(1)
+    event.listen(engine, "before_cursor_execute", listener)
+    try:
+        main_api.query_cache.clear()
+        TestClient(app).get("/lineage/observation/1", params={"depth": 1})
+    finally:
+        event.remove(engine, "before_cursor_execute", listener)
+    # 1590 measures reached, but only one query per relationship plus one per node class.
+    assert len(statements) < 30
+
+
+def test_lineage_rejects_unknown_entities_and_rows():
+    client = TestClient(app)
+    assert client.get("/lineage/nope/1").status_code == 404
+    assert client.get("/lineage/evaluation/999999").status_code == 404
+    assert client.get("/lineage/evaluation/1", params={"depth": 99}).status_code == 400
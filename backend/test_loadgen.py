@@ -0,0 +1,36 @@
+import asyncio
+
+import httpx
+from fastapi.testclient import TestClient
+
+from benchmarks.immudb_standin import InMemoryImmudb, installed
+from benchmarks.loadgen import component_requests, dashboard_requests, replay
+from main_api import app
+
+
+def test_request_mix_follows_the_renderer():
+    pages = dashboard_requests()
+    home = [request.url for request in pages["Home"]]
+    assert "/metric/?detailed=true" in home  # series plotting measures.value
+    assert "/model_count_4_card/" in home
+    assert [request.url for request in pages["Logs"]] == ["/audit/logs?limit=25&offset=0"]
+
+    table = {"type": "table", "id": "t", "data_binding": {"endpoint": "/measure/"},
+             "chart": {"columns": [{"column_type": "lookup", "entity": "Metric"}]}}
+    assert [request.url for request in component_requests(table)] == ["/measure/?detailed=true", "/metric/"]
+
+
+def test_replay_against_app_with_immudb_standin():
+    InMemoryImmudb.reset()
+    with installed():
+        client = TestClient(app)
+        payload = {"Name": "load", "Comments": "replayed", "TimeStamp": "2026-01-01T00:00:00"}
+        assert client.post("/comments/", json=payload).status_code == 200
+        assert client.get("/audit/logs").json()[0]["action"] == "ADD"
+
+        pages = dashboard_requests()
+        results = asyncio.run(replay("http://dashboard", {"Logs": pages["Logs"]}, concurrency=2, duration=None,
+                                     visits=4, transport=httpx.ASGITransport(app=app)))
+    assert results["requests"] == 4
+    assert results["error_rate"] == 0.0
+    assert results["endpoints"]["/audit/logs?limit=25&offset=0"]["statuses"] == {"200": 4}
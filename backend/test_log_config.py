@@ -0,0 +1,66 @@
+import json
+import logging
+
+import pytest
+
+import log_config
+from benchmarks.immudb_standin import installed
+import main_api
+from log_config import JsonFormatter, parse_levels, redact
+
+
+def test_json_formatter_lifts_extra_fields():
+    record = logging.LogRecord("access", logging.INFO, __file__, 1, "%s %d", ("GET", 200), None)
+    record.request_id = "abc"
+    entry = json.loads(JsonFormatter().format(record))
+    assert entry["message"] == "GET 200"
+    assert (entry["logger"], entry["level"], entry["request_id"]) == ("access", "INFO", "abc")
+
+
+def test_redact_masks_keys_and_truncates():
+    payload = {"Name": "x" * 300, "Password": "hunter2", "nested": [{"token": "t"}, 3]}
+    safe = redact(payload, max_length=10, keys={"password", "token"})
+    assert safe["Password"] == "[redacted]"
+    assert safe["nested"] == [{"token": "[redacted]"}, 3]
+    assert safe["Name"] == "x" * 10 + "...[290 more]"
+
+
+def test_parse_levels():
+    assert parse_levels("access=warning, sqlalchemy.engine=INFO") == {
+        "access": logging.WARNING, "sqlalchemy.engine": logging.INFO}
+    with pytest.raises(ValueError):
+        parse_levels("access=LOUD")
+
+
+def test_audit_payload_is_not_built_unless_debug_enabled(monkeypatch):
+    calls = []
+    monkeypatch.setattr(log_config, "redact", lambda payload, *args: calls.append(payload) or payload)
+    audit = logging.getLogger("audit")
+
+    level = audit.level
+    try:
+        with installed():
+            audit.setLevel(logging.INFO)
+            main_api.immudb_log("ADD", "Comments", 1, {"Comments": "hi"})
+            assert calls == []
+            audit.setLevel(logging.DEBUG)
+            main_api.immudb_log("ADD", "Comments", 1, {"Comments": "hi"})
+            assert calls == [{"Comments": "hi"}]
+    finally:
+        audit.setLevel(level)
+
+
+def test_configure_logs_to_stderr_and_keeps_host_handlers(capsys):
+    root = logging.getLogger()
+    host = logging.NullHandler()
+    root.addHandler(host)
+    try:
+        log_config.configure(level="INFO")
+        log_config.configure(level="INFO")
+        ours = [handler for handler in root.handlers if handler is log_config._handler]
+        assert host in root.handlers and len(ours) == 1
+        logging.getLogger("test_log_config").info("to stderr")
+        captured = capsys.readouterr()
+        assert captured.out == ""
+    finally:
+        root.removeHandler(host)
@@ -0,0 +1,35 @@
+import statistics
+
+import pytest
+from fastapi.testclient import TestClient
+
+import main_api
+from main_api import app
+from sql_alchemy import Measure
+
+
+def test_aggregate_by_metric_matches_raw_measures():
+    response = TestClient(app).get("/measure/aggregate", params={
+        "group_by": "metric", "aggregates": "count,mean,stddev,p90,max", "metric": "1,2"})
+    table = response.json()
+    assert table["columns"] == ["metric", "count", "mean", "stddev", "p90", "max"]
+
+    with main_api.SessionLocal() as session:
+        values = {metric_id: [m.value for m in session.query(Measure).filter(Measure.metric_id == metric_id)]
+                  for metric_id in (1, 2)}
+    assert [row[0] for row in table["rows"]] == [1, 2]
+    for metric_id, count, mean, stddev, p90, maximum in table["rows"]:
+        raw = values[metric_id]
+        assert count == len(raw)
+        assert mean == pytest.approx(statistics.mean(raw))
+        assert stddev == pytest.approx(statistics.stdev(raw))
+        assert p90 == pytest.approx(statistics.quantiles(raw, n=10, method="inclusive")[-1])
+        assert maximum == max(raw)
+
+
+def test_aggregate_without_groups_and_invalid_parameters():
+    client = TestClient(app)
+    total = client.get("/measure/aggregate", params={"group_by": "", "aggregates": "count"}).json()
+    assert total["rows"][0][0] >= 1590
+    assert client.get("/measure/aggregate", params={"group_by": "colour"}).status_code == 400
+    assert client.get("/measure/aggregate", params={"aggregates": "median"}).status_code == 400
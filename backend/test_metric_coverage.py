@@ -0,0 +1,47 @@
+import base64
+
+import numpy as np
+from fastapi.testclient import TestClient
+
+import main_api
+from change_tracking import Change
+from main_api import app
+from metric_coverage import CoverageIndex, coverage_index, missing_pairs
+from sql_alchemy import Direct, Measure, Model
+
+
+def test_new_metric_shows_as_gap_until_measured():
+    client = TestClient(app)
+    with main_api.SessionLocal() as session:
+        metric = Direct(name="Fresh metric", description="test")
+        session.add(metric)
+        session.commit()
+        metric_id = metric.id
+        model_id = session.query(Model.id).order_by(Model.id).first()[0]
+        observation_id = session.query(Measure.observation_id).first()[0]
+
+    sparse = client.get("/coverage", params={"project": 1}).json()
+    assert [model_id, metric_id] in sparse["missing"]
+    with main_api.SessionLocal() as session:
+        assert {tuple(pair) for pair in sparse["missing"]} == missing_pairs(session)
+
+    refreshed = coverage_index.stats["refreshed_models"]
+    with main_api.SessionLocal() as session:
+        session.add(Measure(value=1.0, error="", uncertainty=0.0, unit="", measurand_id=model_id,
+                            metric_id=metric_id, observation_id=observation_id))
+        session.commit()
+
+    bitmap = client.get("/coverage", params={"project": 1, "format": "bitmap"}).json()
+    assert coverage_index.stats["refreshed_models"] == refreshed + 1
+    columns = [metric["id"] for metric in bitmap["metrics"]]
+    rows = [model["id"] for model in bitmap["models"]]
+    bits = np.unpackbits(np.frombuffer(base64.b64decode(bitmap["bitmap"][rows.index(model_id)]), dtype=np.uint8))
+    assert bits[columns.index(metric_id)] == 1
+    assert bitmap["missing_count"] == sparse["missing_count"] - 1
+
+
+def test_table_level_measure_write_triggers_rebuild():
+    index = CoverageIndex()
+    index._rebuild = False
+    index.on_changes([Change(entity="measure", tables=("measure",), id=None, action="delete")])
+    assert index._rebuild
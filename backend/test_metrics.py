@@ -0,0 +1,40 @@
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+
+import prometheus
+import main_api
+from main_api import app
+
+
+def test_metrics_report_route_latency_and_db_statements():
+    client = TestClient(app)
+    before = prometheus.db_statements_per_request.count("/model/")
+    assert client.get("/model/").status_code == 200
+    assert prometheus.db_statements_per_request.count("/model/") == before + 1
+    assert prometheus.db_statements.value("/model/") > 0
+
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    body = response.text
+    assert '# TYPE http_request_duration_seconds histogram' in body
+    assert 'http_request_duration_seconds_count{method="GET",route="/model/",status="200"}' in body
+    assert 'db_statements_total{route="/model/"}' in body
+    assert "db_pool_checkouts_total" in body and "db_pool_checked_out_connections" in body
+
+
+def test_unmatched_routes_share_one_series():
+    client = TestClient(app)
+    client.get("/no/such/path/1")
+    client.get("/no/such/path/2")
+    body = client.get("/metrics").text
+    assert 'route="<unmatched>",status="404"' in body
+    assert "/no/such/path" not in body
+
+
+def test_pool_checkout_wait_is_observed():
+    before = prometheus.db_pool_checkout_wait.count()
+    with main_api.SessionLocal() as session:
+        session.execute(text("SELECT 1"))
+    assert prometheus.db_pool_checkout_wait.count() > before
+    assert "db_pool_checkout_wait_seconds_count" in TestClient(app).get("/metrics").text
@@ -0,0 +1,47 @@
+import time
+
+from fastapi.testclient import TestClient
+
+from main_api import app
+from profiler import classify, profiler
+
+
+def test_classify_uses_innermost_known_frame():
+    assert classify(["main_api.py:get_all_measure", "sqlalchemy/orm/query.py:all"]) == "sqlalchemy"
+    assert classify(["main_api.py:get_all_measure", "fastapi/encoders.py:jsonable_encoder"]) == "serialization"
+    assert classify(["main_api.py:immudb_exec", "immudb/client.py:sqlQuery", "grpc/_channel.py:__call__"]) == "immudb"
+    assert classify(["main_api.py:root"]) == "other"
+
+
+def test_admin_token_triggers_and_reads_profiles():
+    client = TestClient(app)
+    token, interval = profiler.admin_token, profiler.interval_ms
+    profiler.admin_token, profiler.interval_ms = "secret", 0.5
+    try:
+        assert "x-profile-id" not in client.get("/measure/", headers={"X-Profile-Token": "wrong"}).headers
+        response = client.get("/measure/", params={"profile": "secret"})
+        profile_id = int(response.headers["x-profile-id"])
+
+        assert client.get("/debug/profiles").status_code == 403
+        headers = {"X-Profile-Token": "secret"}
+        summary = client.get(f"/debug/profiles/{profile_id}", headers=headers).json()
+        assert summary["route"] == "/measure/" and summary["reason"] == "query"
+        assert set(summary["seconds"]) == {"immudb", "sqlalchemy", "serialization", "other"}
+        assert summary["samples"] == sum(summary["stacks"].values())
+        assert profile_id in [item["id"] for item in client.get("/debug/profiles", headers=headers).json()]
+
+        collapsed = client.get(f"/debug/profiles/{profile_id}", params={"format": "collapsed"}, headers=headers).text
+        assert all(line.rsplit(" ", 1)[1].isdigit() for line in collapsed.splitlines())
+    finally:
+        profiler.admin_token, profiler.interval_ms = token, interval
+
+
+def test_no_samples_are_added_after_finish():
+    profile, token = profiler.start({"type": "http", "method": "GET", "path": "/"}, "sampled")
+    assert profiler.current() is profile
+    time.sleep(0.05)
+    profiler.finish(profile, token, 200)
+    counts = profile.stack_counts()
+    time.sleep(0.05)
+    assert profile.stack_counts() == counts
+    assert profiler.current() is None and profiler.get(profile.id) is profile
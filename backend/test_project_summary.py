@@ -0,0 +1,55 @@
+from fastapi.testclient import TestClient
+
+import main_api
+import project_summary
+from change_tracking import Change
+from main_api import app
+from project_summary import ProjectSummaryCache, project_summaries
+from sql_alchemy import Measure, Project, ProjectStatus
+
+
+def test_summary_rolls_up_the_project_subtree():
+    summary = TestClient(app).get("/project/1/summary").json()
+    assert summary["project"]["name"]
+    assert summary["evaluations"]["total"] == sum(summary["evaluations"]["by_status"].values()) >= 1
+    assert summary["observations"]["total"] >= 1
+    assert summary["observations"]["latest"] is not None
+    assert len(summary["coverage"]) >= 53
+    assert all(0 <= row["ratio"] <= 1 for row in summary["coverage"])
+    assert TestClient(app).get("/project/999999/summary").status_code == 404
+
+
+def test_summary_is_invalidated_only_for_the_written_project():
+    client = TestClient(app)
+    with main_api.SessionLocal() as session:
+        other = Project(name="Other", status=ProjectStatus.Created)
+        session.add(other)
+        session.commit()
+        other_id = other.id
+
+    client.get("/project/1/summary")
+    client.get(f"/project/{other_id}/summary")
+    misses = project_summaries.stats["misses"]
+
+    with main_api.SessionLocal() as session:
+        measure = session.query(Measure).first()
+        measure.value += 1
+        session.commit()
+
+    client.get("/project/1/summary")
+    client.get(f"/project/{other_id}/summary")
+    assert project_summaries.stats["misses"] == misses + 1
+
+
+def test_summary_built_across_a_commit_is_not_stored(monkeypatch):
+    cache = ProjectSummaryCache()
+    change = Change(entity="Measure", tables=("measure",), id=1, action="update", row={"measurand_id": 1})
+
+    def build_during_commit(session, project_id):
+        cache.on_changes([change])
+        return {"project": {"id": project_id}}, {"evaluation": set(), "element": set(), "tool": set()}
+
+    monkeypatch.setattr(project_summary, "build_summary", build_during_commit)
+    cache.get(None, 1)
+    cache.get(None, 1)
+    assert cache.stats["misses"] == 2 and cache.stats["hits"] == 0
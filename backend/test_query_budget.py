@@ -0,0 +1,48 @@
+import logging
+
+import pytest
+from fastapi.testclient import TestClient
+
+import query_budget
+from main_api import app
+from query_budget import QueryBudgetExceeded, fingerprint, max_queries
+from request_context import RequestStats
+
+
+def test_fingerprint_ignores_parameters_and_in_list_length():
+    assert fingerprint("SELECT * FROM measure WHERE id = 1") == fingerprint("SELECT *  FROM measure\nWHERE id = 42")
+    assert fingerprint("SELECT name FROM tool WHERE name = 'a'") == "SELECT name FROM tool WHERE name = ?"
+    assert fingerprint("SELECT * FROM metric WHERE id IN (?, ?, ?)") == fingerprint("SELECT * FROM metric WHERE id IN (?)")
+    assert fingerprint("SELECT m2.id FROM metric AS m2") == "SELECT m2.id FROM metric AS m2"
+
+    stats = RequestStats(scope={"method": "GET"})
+    stats.fingerprints = {"SELECT ? FROM measure WHERE id = ?": 12, "SELECT ? FROM model": 1}
+    assert query_budget.repeated(stats, 5) == [{"fingerprint": "SELECT ? FROM measure WHERE id = ?", "count": 12}]
+
+
+def test_max_queries_and_opt_in_header():
+    client = TestClient(app)
+    with max_queries(10) as requests:
+        response = client.get("/model/1/", headers={"X-Query-Stats": "1"})
+    assert [stats.route for stats in requests] == ["/model/{model_id}/"]
+    assert int(response.headers["x-query-count"]) == requests[0].statements > 0
+    assert float(response.headers["x-db-time-ms"]) >= 0
+    assert "x-query-count" not in client.get("/model/1/").headers
+
+    with pytest.raises(QueryBudgetExceeded, match="/model/{model_id}/ ran"):
+        with max_queries(0):
+            client.get("/model/1/")
+
+
+def test_n_plus_one_log_is_opt_in_and_rate_limited(monkeypatch, caplog):
+    stats = RequestStats(scope={"method": "GET"}, fingerprints={"SELECT ? FROM measure": 10})
+    caplog.set_level(logging.WARNING, logger="query_budget")
+
+    query_budget.request_finished(stats)
+    assert not caplog.records
+
+    monkeypatch.setattr(query_budget, "N_PLUS_ONE_LOG", True)
+    monkeypatch.setattr(query_budget, "_last_logged", {})
+    query_budget.request_finished(stats)
+    query_budget.request_finished(stats)
+    assert len(caplog.records) == 1
@@ -0,0 +1,80 @@
+import threading
+import time
+
+from fastapi.testclient import TestClient
+
+from main_api import app
+from query_cache import QueryCache, query_cache
+from singleflight import SingleFlight
+
+
+# -------------------------
+# QueryCache unit behaviour
+# -------------------------
+def test_lru_eviction_respects_entry_bound():
+    cache = QueryCache(max_entries=2, ttl=60)
+    cache.put("a", b"1", ["measure"])
+    cache.put("b", b"2", ["measure"])
+    assert cache.get("a") == b"1"  # "a" becomes most recently used
+    cache.put("c", b"3", ["metric"])
+
+    assert cache.get("b") is None
+    assert cache.get("a") == b"1"
+    assert cache.stats()["evictions"] == 1
+
+
+def test_memory_bound_and_selective_invalidation():
+    cache = QueryCache(max_entries=10, max_bytes=8, ttl=60)
+    cache.put("metric", b"1234", ["metric", "measure"])
+    cache.put("model", b"5678", ["model"])
+    assert cache.stats()["size_bytes"] == 8
+
+    assert cache.invalidate_tables({"measure"}) == 1
+    assert cache.get("metric") is None
+    assert cache.get("model") == b"5678"
+
+
+def test_concurrent_identical_calls_share_one_execution():
+    flight = SingleFlight()
+    calls = []
+    results = []
+
+    def slow_query():
+        calls.append(1)
+        time.sleep(0.2)
+        return {"count": 53}
+
+    def worker():
+        results.append(flight.do("model_count_4_card?", slow_query))
+
+    threads = [threading.Thread(target=worker) for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(calls) == 1
+    assert [result for result, _ in results] == [{"count": 53}] * 5
+    assert sorted(shared for _, shared in results) == [False, True, True, True, True]
+
+
+# -------------------------
+# Endpoint integration
+# -------------------------
+def test_metric_listing_is_served_from_cache_until_a_measure_write(bump_measure):
+    query_cache.clear()
+    client = TestClient(app)
+
+    first = client.get("/metric/", params={"detailed": "true"})
+    second = client.get("/metric/", params={"detailed": "true"})
+    assert first.headers["X-Cache"] == "MISS"
+    assert second.headers["X-Cache"] == "HIT"
+    assert first.json() == second.json()
+
+    measure_id = first.json()[0]["measures"][0]["id"]
+    payload = bump_measure(client, measure_id)
+
+    third = client.get("/metric/", params={"detailed": "true"})
+    assert third.headers["X-Cache"] == "MISS"
+    values = {m["id"]: m["value"] for metric in third.json() for m in metric["measures"]}
+    assert values[measure_id] == payload["value"]
@@ -0,0 +1,87 @@
+from fastapi.testclient import TestClient
+
+import main_api
+import readiness
+from benchmarks.immudb_standin import installed
+
+client = TestClient(main_api.app)
+
+
+def test_background_init_retries_until_success():
+    calls = []
+
+    def flaky():
+        calls.append(1)
+        if len(calls) < 3:
+            raise ConnectionError("immudb unavailable")
+
+    init = readiness.BackgroundInit("flaky", flaky, backoff=0.001, backoff_max=0.01)
+    init.start()
+    assert init.wait(5)
+    assert init.status() == {"ready": True, "state": "ready", "attempts": 3}
+
+
+def test_background_init_gives_up_after_attempts():
+    def down():
+        raise ConnectionError("immudb unavailable")
+
+    init = readiness.BackgroundInit("down", down, attempts=2, backoff=0.001)
+    init.start()
+    assert not init.wait(5)
+    status = init.status()
+    assert (status["state"], status["attempts"]) == ("failed", 2)
+    assert "ConnectionError" in status["error"]
+
+
+def test_backoff_is_exponential_and_capped():
+    init = readiness.BackgroundInit("x", lambda: None, backoff=1.0, backoff_max=10.0)
+    assert 0.8 <= init.delay(1) <= 1.2
+    assert 3.2 <= init.delay(3) <= 4.8
+    assert 8.0 <= init.delay(10) <= 12.0
+
+
+def test_probe_caches_results():
+    calls = []
+    probe = readiness.Probe("db", lambda: calls.append(1), ttl=60)
+    assert probe.status()["ready"] and probe.status()["ready"]
+    assert len(calls) == 1
+    failing = readiness.Probe("db", lambda: 1 / 0, ttl=0)
+    assert failing.status()["error"].startswith("ZeroDivisionError")
+
+
+def test_health_endpoints_report_readiness(monkeypatch):
+    monkeypatch.setattr(main_api, "immudb_init", readiness.BackgroundInit(
+        "immudb", main_api.connect_and_init_immudb, backoff=0.001))
+    monkeypatch.setattr(main_api, "immudb_probe", readiness.Probe("immudb", main_api._ping_immudb))
+    assert client.get("/health/live").json() == {"status": "alive"}
+
+    response = client.get("/health/ready")
+    assert response.status_code == 503
+    body = response.json()
+    assert body["checks"]["database"]["ready"] is True
+    assert body["checks"]["immudb"]["state"] == "pending"
+
+    with installed():
+        main_api.immudb_init.start()
+        assert main_api.immudb_init.wait(5)
+        response = client.get("/health/ready")
+        assert response.status_code == 200 and response.json()["status"] == "ready"
+        health = client.get("/health").json()
+        assert (health["status"], health["database"], health["immudb"]) == ("healthy", "connected", "ready")
+
+
+def test_immudb_going_down_after_startup_is_not_ready(monkeypatch):
+    init = readiness.BackgroundInit("immudb", lambda: None)
+    init.start()
+    assert init.wait(5)
+    monkeypatch.setattr(main_api, "immudb_init", init)
+
+    def down():
+        raise ConnectionError("immudb unavailable")
+
+    monkeypatch.setattr(main_api, "immudb_probe", readiness.Probe("immudb", down, ttl=0))
+    response = client.get("/health/ready")
+    assert response.status_code == 503
+    immudb = response.json()["checks"]["immudb"]
+    assert (immudb["ready"], immudb["state"]) == (False, "unreachable")
+    assert "ConnectionError" in immudb["error"]
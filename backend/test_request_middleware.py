@@ -0,0 +1,61 @@
+import logging
+
+from fastapi import FastAPI
+from fastapi.responses import StreamingResponse
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, text
+
+import request_context
+from main_api import app
+from request_context import RequestMiddleware
+
+
+def test_request_id_and_process_time_headers(caplog):
+    client = TestClient(app)
+    with caplog.at_level(logging.INFO, logger="access"):
+        response = client.get("/model/1/", headers={"X-Request-ID": "abc-123"})
+    assert response.headers["x-request-id"] == "abc-123"
+    assert float(response.headers["x-process-time"]) >= 0
+    record = next(record for record in caplog.records if record.name == "access")
+    assert (record.request_id, record.route, record.status) == ("abc-123", "/model/{model_id}/", 200)
+    assert record.db_statements > 0
+
+    generated = client.get("/model/1/", headers={"X-Request-ID": "bad id\twith spaces"}).headers["x-request-id"]
+    assert generated != "bad id\twith spaces" and len(generated) == 32
+
+
+def test_streaming_response_passes_through_with_hooks():
+    events = []
+    streaming = FastAPI()
+
+    @streaming.get("/stream")
+    def stream():
+        def chunks():
+            for index in range(3):
+                events.append(f"chunk {index}")
+                yield f"{index}\n"
+        return StreamingResponse(chunks(), media_type="text/plain")
+
+    streaming.add_middleware(
+        RequestMiddleware,
+        on_start=[lambda stats: events.append("start")],
+        on_headers=[lambda stats, headers: headers.append((b"x-hooked", b"1"))],
+        on_finish=[lambda stats, status, seconds: events.append(("finish", status, stats.route))],
+    )
+    response = TestClient(streaming).get("/stream")
+    assert response.text == "0\n1\n2\n"
+    assert response.headers["x-hooked"] == "1"
+    assert events == ["start", "chunk 0", "chunk 1", "chunk 2", ("finish", 200, "/stream")]
+    assert request_context.current() is None
+
+
+def test_statement_consumers_share_one_timer():
+    engine = create_engine("sqlite://")
+    calls = []
+    request_context.on_statement(engine, lambda conn, statement, *args: calls.append(("a", statement, args[-1])))
+    request_context.on_statement(engine, lambda conn, statement, *args: calls.append(("b", statement, args[-1])))
+    with engine.connect() as connection:
+        connection.execute(text("SELECT 1"))
+    assert [call[0] for call in calls] == ["a", "b"]
+    assert calls[0][1:] == calls[1][1:]
+    assert len(engine.dispatch.before_cursor_execute) == 1
@@ -0,0 +1,47 @@
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+from sqlalchemy import create_engine, inspect
+
+from main_api import ensure_schema
+from sql_alchemy import Base
+
+BACKEND = Path(__file__).resolve().parent
+
+
+def test_importing_the_model_has_no_side_effects(tmp_path):
+    code = (
+        "import sys, gc; sys.path.insert(0, %r)\n"
+        "import sql_alchemy\n"
+        "from sqlalchemy.engine import Engine\n"
+        "assert not [o for o in gc.get_objects() if isinstance(o, Engine)]\n"
+        "assert not hasattr(sql_alchemy, 'engine')\n" % str(BACKEND)
+    )
+    subprocess.run([sys.executable, "-c", code], cwd=tmp_path, check=True)
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_ensure_schema_creates_only_missing_tables(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'schema.db'}")
+    created = ensure_schema(engine)
+    assert set(created) == set(Base.metadata.tables)
+    assert set(inspect(engine).get_table_names()) >= set(Base.metadata.tables)
+    assert ensure_schema(engine) == []
+
+
+def test_importing_the_api_defers_engine_creation_to_init(tmp_path):
+    db_path = tmp_path / "api.db"
+    code = (
+        "import sys, gc; sys.path.insert(0, %r)\n"
+        "import main_api\n"
+        "from sqlalchemy.engine import Engine\n"
+        "assert not [o for o in gc.get_objects() if isinstance(o, Engine)]\n"
+        "assert not main_api.change_tracking._before_commit_subscribers\n"
+        "assert 'pandas' not in sys.modules\n"
+        "assert main_api.SessionLocal is main_api.init()\n" % str(BACKEND)
+    )
+    env = {**os.environ, "SQLALCHEMY_DATABASE_URL": f"sqlite:///{db_path}"}
+    subprocess.run([sys.executable, "-c", code], cwd=tmp_path, env=env, check=True)
+    assert db_path.exists()
@@ -0,0 +1,45 @@
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, text
+
+from main_api import app
+from slow_queries import SlowQueryLog, parameter_shape, slow_query_log
+
+
+def test_parameter_shape_hides_values():
+    assert parameter_shape((1, "secret", None)) == ["int", "str", "NoneType"]
+    assert parameter_shape({"name": "secret"}) == {"name": "str"}
+    assert parameter_shape([(1, 2.0), (3, 4.0)], executemany=True) == {"executemany": 2, "row": ["int", "float"]}
+
+
+def test_slow_queries_are_recorded_with_route_and_plan():
+    client = TestClient(app)
+    threshold = slow_query_log.threshold_ms
+    slow_query_log.threshold_ms = 0
+    try:
+        client.delete("/debug/slow-queries")
+        assert client.get("/model/1/").status_code == 200
+    finally:
+        slow_query_log.threshold_ms = threshold
+
+    slow_query_log.join()
+    entries = client.get("/debug/slow-queries").json()["entries"]
+    entry = next(entry for entry in entries if entry["route"] == "/model/{model_id}/")
+    assert entry["method"] == "GET"
+    assert entry["statement"].lstrip().upper().startswith("SELECT")
+    assert entry["parameters"] and all(kind == "int" for kind in entry["parameters"])
+    assert entry["plan"] and any("SEARCH" in step or "SCAN" in step for step in entry["plan"])
+
+
+def test_failing_explain_runs_off_the_callers_connection(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'explain.db'}")
+    log = SlowQueryLog(threshold_ms=0)
+    with engine.begin() as connection:
+        connection.execute(text("CREATE TABLE t (x INTEGER)"))
+        connection.execute(text("INSERT INTO t VALUES (1)"))
+        # Recorded as slow, but the plan of a statement on a missing table cannot be fetched.
+        log.record(connection, "SELECT * FROM missing", (), False, 1.0)
+        log.join()
+        assert connection.execute(text("SELECT x FROM t")).scalar() == 1
+    entry = log.entries()[0]
+    assert entry["plan"] is None and "missing" in entry["explain_error"]
+    assert log.info()["explain_failures"] == 1
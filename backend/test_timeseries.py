@@ -0,0 +1,51 @@
+from datetime import datetime, timedelta
+
+import numpy as np
+from fastapi.testclient import TestClient
+
+import main_api
+from main_api import app
+from sql_alchemy import Measure, Observation
+from timeseries import lttb, minmax
+
+
+def test_downsamplers_keep_extremes_within_budget():
+    x = np.arange(10_000)
+    y = np.sin(x / 500.0)
+    y[4321] = 5.0
+    for keep in (lttb(x, y, 200), minmax(y, 200)):
+        assert len(keep) <= 200
+        assert keep[0] == 0 and keep[-1] == len(x) - 1
+        assert np.all(np.diff(keep) > 0)
+        assert 4321 in keep
+
+
+def test_timeseries_buckets_observations_in_sql():
+    with main_api.SessionLocal() as session:
+        template = session.query(Observation).first()
+        measure = session.query(Measure).filter(Measure.metric_id == 5).first()
+        start = datetime(2025, 3, 1)
+        for hour in range(48):
+            observation = Observation(
+                name=f"drift {hour}", description="drift", observer="test", whenObserved=start + timedelta(hours=hour),
+                tool_id=template.tool_id, dataset_id=template.dataset_id, eval_id=template.eval_id)
+            session.add(observation)
+            session.flush()
+            session.add(Measure(value=float(hour), error="", uncertainty=0.0, unit="", metric_id=5,
+                                measurand_id=measure.measurand_id, observation_id=observation.id))
+        session.commit()
+        measurand_id = measure.measurand_id
+
+    client = TestClient(app)
+    params = {"metric": 5, "measurand": measurand_id}
+    raw = client.get("/observation/timeseries", params=params).json()
+    assert raw["total_points"] == 49
+
+    daily = client.get("/observation/timeseries", params={**params, "bucket": "1d", "agg": "max"}).json()
+    rows = {row[0]: row[1:] for row in daily["rows"]}
+    assert rows["2025-03-01T00:00:00+00:00"] == [23.0, 24]
+    assert rows["2025-03-02T00:00:00+00:00"] == [47.0, 24]
+
+    sampled = client.get("/observation/timeseries", params={**params, "downsample": "lttb", "points": 10}).json()
+    assert len(sampled["rows"]) == 10
+    assert client.get("/observation/timeseries", params={**params, "bucket": "fortnight"}).status_code == 400
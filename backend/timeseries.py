@@ -0,0 +1,107 @@
+import re
+from datetime import datetime, timezone
+from typing import List, Optional
+
+import numpy as np
+from sqlalchemy import Integer, cast, func, literal, select
+from sqlalchemy.orm import Session
+
+from sql_alchemy import Measure, Observation
+
+
+############################################
+#
+#   Observation time series
+#
+############################################
+
+BUCKET_SECONDS = {"h": 3600, "d": 86400, "w": 7 * 86400}
+# The Unix epoch is a Thursday; weekly buckets are shifted to start on Mondays.
+WEEK_OFFSET = 3 * 86400
+SERIES_AGGREGATES = {"mean": func.avg, "max": func.max, "min": func.min}
+DOWNSAMPLERS = ("lttb", "minmax")
+
+
+def parse_bucket(bucket: str) -> int:
+    """Bucket width in seconds from ``<n>h``, ``<n>d`` or ``<n>w`` (e.g. ``1d``)."""
+    match = re.fullmatch(r"(\d*)([hdw])", bucket.strip().lower())
+    if not match or match.group(1) == "0":
+        raise ValueError("bucket must look like 1h, 1d or 1w")
+    return int(match.group(1) or 1) * BUCKET_SECONDS[match.group(2)]
+
+
+def _epoch(session: Session, column):
+    if session.get_bind().dialect.name == "sqlite":
+        return cast(func.strftime("%s", column), Integer)
+    return cast(func.extract("epoch", column), Integer)
+
+
+def load_series(session: Session, metric_id: int, measurand_id: Optional[int] = None,
+                bucket: Optional[str] = None, agg: str = "mean"):
+    """``(epoch seconds, value, count)`` arrays ordered by time, bucketed in SQL when ``bucket`` is set."""
+    epoch = _epoch(session, Observation.whenObserved)
+    if bucket:
+        width = parse_bucket(bucket)
+        offset = WEEK_OFFSET if width % BUCKET_SECONDS["w"] == 0 else 0
+        time_column = ((epoch + offset) // width) * width - offset
+        query = select(time_column.label("t"), SERIES_AGGREGATES[agg](Measure.value), func.count(Measure.id)) \
+            .group_by(time_column)
+    else:
+        time_column = epoch
+        query = select(time_column.label("t"), Measure.value, literal(1))
+    query = query.join(Observation, Observation.id == Measure.observation_id) \
+        .where(Measure.metric_id == metric_id).order_by(time_column)
+    if measurand_id is not None:
+        query = query.where(Measure.measurand_id == measurand_id)
+
+    rows = session.execute(query).all()
+    if not rows:
+        return np.empty(0, dtype=np.int64), np.empty(0), np.empty(0, dtype=np.int64)
+    t, values, counts = zip(*rows)
+    return np.asarray(t, dtype=np.int64), np.asarray(values, dtype=float), np.asarray(counts, dtype=np.int64)
+
+
+def lttb(x: np.ndarray, y: np.ndarray, threshold: int) -> np.ndarray:
+    """Indices kept by Largest-Triangle-Three-Buckets downsampling to ``threshold`` points."""
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+    x = x.astype(float)
+    every = (n - 2) / (threshold - 2)
+    selected = np.empty(threshold, dtype=np.int64)
+    selected[0], selected[-1] = 0, n - 1
+    a = 0
+    for i in range(threshold - 2):
+        start = int(i * every) + 1
+        end = int((i + 1) * every) + 1
+        next_end = min(int((i + 2) * every) + 1, n)
+        avg_x, avg_y = x[end:next_end].mean(), y[end:next_end].mean()
+        # Twice the triangle area for every candidate in the bucket.
+        areas = np.abs((x[a] - avg_x) * (y[start:end] - y[a]) - (x[a] - x[start:end]) * (avg_y - y[a]))
+        a = start + int(np.argmax(areas))
+        selected[i + 1] = a
+    return selected
+
+
+def minmax(y: np.ndarray, threshold: int) -> np.ndarray:
+    """Indices of the minimum and maximum of equal buckets, plus both ends; at most ``threshold`` points."""
+    n = len(y)
+    if threshold >= n or threshold < 4:
+        return np.arange(n)
+    keep = {0, n - 1}
+    for chunk in np.array_split(np.arange(n), threshold // 2 - 1):
+        if len(chunk):
+            keep.add(int(chunk[np.argmin(y[chunk])]))
+            keep.add(int(chunk[np.argmax(y[chunk])]))
+    return np.array(sorted(keep), dtype=np.int64)
+
+
+def downsample(t: np.ndarray, values: np.ndarray, method: str, points: int) -> np.ndarray:
+    return lttb(t, values, points) if method == "lttb" else minmax(values, points)
+
+
+def series_rows(t: np.ndarray, values: np.ndarray, counts: np.ndarray) -> List[list]:
+    return [
+        [datetime.fromtimestamp(int(seconds), tz=timezone.utc).isoformat(), float(value), int(count)]
+        for seconds, value, count in zip(t, values, counts)
+    ]